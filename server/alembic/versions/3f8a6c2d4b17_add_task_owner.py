@@ -0,0 +1,94 @@
+"""Add task owner
+
+Revision ID: 3f8a6c2d4b17
+Revises: 9c4e2b7d1a30
+Create Date: 2026-10-18 12:21:45.913870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a6c2d4b17'
+down_revision: Union[str, Sequence[str], None] = '9c4e2b7d1a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+INDEXES = {
+    "ix_tasks_user_id_id": ["user_id", "id"],
+    "ix_tasks_user_id_is_done": ["user_id", "is_done"],
+    "ix_tasks_user_id_due_at": ["user_id", "due_at"],
+    "ix_tasks_category_id_is_done": ["category_id", "is_done"],
+}
+
+
+def _owner_column(conn) -> dict:
+    return next(
+        c for c in sa.inspect(conn).get_columns("tasks") if c["name"] == "user_id"
+    )
+
+
+def _owner_foreign_key(conn) -> dict | None:
+    for foreign_key in sa.inspect(conn).get_foreign_keys("tasks"):
+        if foreign_key["constrained_columns"] == ["user_id"]:
+            return foreign_key
+    return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(conn).get_columns("tasks")}
+    if "user_id" not in columns:
+        op.add_column("tasks", sa.Column("user_id", sa.Integer(), nullable=True))
+
+    # Backfill in bounded batches so no single UPDATE has to touch the whole
+    # table. Tasks whose category is gone would never match, so skip them.
+    backfill = sa.text(
+        "UPDATE tasks SET user_id = "
+        "(SELECT categories.user_id FROM categories "
+        "WHERE categories.id = tasks.category_id) "
+        "WHERE id IN (SELECT id FROM tasks WHERE user_id IS NULL "
+        "AND category_id IN (SELECT id FROM categories) LIMIT :batch)"
+    )
+    while conn.execute(backfill, {"batch": BACKFILL_BATCH_SIZE}).rowcount:
+        pass
+
+    # migrate.py runs create_all first, so on a fresh database the column
+    # already has its constraints; only add what is missing. SQLite cannot
+    # alter constraints in place, so batch mode rebuilds the table there.
+    owner = _owner_column(conn)
+    foreign_key = _owner_foreign_key(conn)
+    if owner["nullable"] or foreign_key is None:
+        with op.batch_alter_table("tasks") as batch_op:
+            if owner["nullable"]:
+                batch_op.alter_column(
+                    "user_id", existing_type=sa.Integer(), nullable=False
+                )
+            if foreign_key is None:
+                batch_op.create_foreign_key(
+                    "fk_tasks_user_id_users", "users", ["user_id"], ["id"]
+                )
+
+    for name, index_columns in INDEXES.items():
+        op.create_index(name, "tasks", index_columns, if_not_exists=True)
+    # Covered by the leading column of ix_tasks_category_id_is_done.
+    op.drop_index("ix_tasks_category_id", table_name="tasks", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_tasks_category_id", "tasks", ["category_id"])
+    for name in reversed(INDEXES):
+        op.drop_index(name, table_name="tasks")
+    foreign_key = _owner_foreign_key(op.get_bind())
+    with op.batch_alter_table("tasks") as batch_op:
+        # Named by this migration, or by the database when create_all made it.
+        if foreign_key is not None and foreign_key["name"]:
+            batch_op.drop_constraint(foreign_key["name"], type_="foreignkey")
+        batch_op.drop_column("user_id")
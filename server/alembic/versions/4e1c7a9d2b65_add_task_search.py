@@ -0,0 +1,65 @@
+"""Add task search
+
+Revision ID: 4e1c7a9d2b65
+Revises: 7b2e9d4f6a58
+Create Date: 2026-10-18 16:42:08.193552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e1c7a9d2b65'
+down_revision: Union[str, Sequence[str], None] = '7b2e9d4f6a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_TRIGGERS = ("tasks_fts_ai", "tasks_fts_ad", "tasks_fts_au")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_name_search ON tasks "
+            "USING gin (to_tsvector('simple', name))"
+        )
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "name, user_id, content='tasks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, name, user_id) "
+        "VALUES (new.id, new.name, new.user_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, name, user_id) "
+        "VALUES ('delete', old.id, old.name, old.user_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF name, user_id "
+        "ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, name, user_id) "
+        "VALUES ('delete', old.id, old.name, old.user_id); "
+        "INSERT INTO tasks_fts(rowid, name, user_id) "
+        "VALUES (new.id, new.name, new.user_id); END"
+    )
+    # Index the rows that existed before the triggers.
+    op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        op.execute("DROP INDEX IF EXISTS ix_tasks_name_search")
+        return
+    for trigger in SQLITE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS tasks_fts")
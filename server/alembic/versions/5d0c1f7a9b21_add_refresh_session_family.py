@@ -0,0 +1,51 @@
+"""Add refresh session family
+
+Revision ID: 5d0c1f7a9b21
+Revises: a40862d53e1e
+Create Date: 2026-10-18 10:12:41.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0c1f7a9b21'
+down_revision: Union[str, Sequence[str], None] = 'a40862d53e1e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(conn).get_columns("refresh_sessions")}
+    if "family_id" in columns:
+        return
+
+    op.add_column(
+        "refresh_sessions",
+        sa.Column("family_id", sa.String(length=36), nullable=True),
+    )
+    # Existing sessions each start their own family.
+    conn.execute(sa.text("UPDATE refresh_sessions SET family_id = jti"))
+    # SQLite cannot tighten nullability in place; a batch rebuild would drop
+    # the unnamed unique constraints, so the column stays nullable there.
+    if conn.dialect.name != "sqlite":
+        op.alter_column(
+            "refresh_sessions",
+            "family_id",
+            existing_type=sa.String(length=36),
+            nullable=False,
+        )
+    op.create_index(
+        "ix_refresh_sessions_family_id", "refresh_sessions", ["family_id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_refresh_sessions_family_id", table_name="refresh_sessions")
+    op.drop_column("refresh_sessions", "family_id")
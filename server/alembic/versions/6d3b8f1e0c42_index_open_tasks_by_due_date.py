@@ -0,0 +1,35 @@
+"""Index open tasks by due date
+
+Revision ID: 6d3b8f1e0c42
+Revises: 4e1c7a9d2b65
+Create Date: 2026-10-18 16:41:09.512307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d3b8f1e0c42'
+down_revision: Union[str, Sequence[str], None] = '4e1c7a9d2b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_tasks_open_due_at",
+        "tasks",
+        ["due_at"],
+        sqlite_where=sa.text("is_done = 0"),
+        postgresql_where=sa.text("is_done = false"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_open_due_at", table_name="tasks")
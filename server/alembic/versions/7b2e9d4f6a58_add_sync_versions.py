@@ -0,0 +1,104 @@
+"""Add sync versions
+
+Revision ID: 7b2e9d4f6a58
+Revises: 3f8a6c2d4b17
+Create Date: 2026-10-18 13:05:32.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e9d4f6a58'
+down_revision: Union[str, Sequence[str], None] = '3f8a6c2d4b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    tables = set(inspector.get_table_names())
+
+    # Existing rows start at version 0; clients pick them up with a full sync.
+    for table in ("tasks", "categories"):
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if "version" not in columns:
+            op.add_column(
+                table,
+                sa.Column(
+                    "version", sa.BigInteger(), nullable=False, server_default="0"
+                ),
+            )
+        if "updated_at" not in columns:
+            op.add_column(
+                table, sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True)
+            )
+        conn.execute(
+            sa.text(
+                f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP "
+                "WHERE updated_at IS NULL"
+            )
+        )
+        # SQLite cannot tighten nullability in place (see 5d0c1f7a9b21).
+        if conn.dialect.name != "sqlite":
+            op.alter_column(
+                table,
+                "updated_at",
+                existing_type=sa.DateTime(timezone=True),
+                nullable=False,
+            )
+    op.create_index(
+        "ix_tasks_user_id_version", "tasks", ["user_id", "version"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_categories_user_id_version",
+        "categories",
+        ["user_id", "version"],
+        if_not_exists=True,
+    )
+    # Covered by the leading column of ix_categories_user_id_version.
+    op.drop_index("ix_categories_user_id", table_name="categories", if_exists=True)
+
+    if "sync_counters" not in tables:
+        op.create_table(
+            "sync_counters",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("version", sa.BigInteger(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+    if "sync_tombstones" not in tables:
+        op.create_table(
+            "sync_tombstones",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("entity", sa.String(length=16), nullable=False),
+            sa.Column("entity_id", sa.Integer(), nullable=False),
+            sa.Column("version", sa.BigInteger(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_sync_tombstones_user_id_version",
+            "sync_tombstones",
+            ["user_id", "version"],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sync_tombstones_user_id_version", table_name="sync_tombstones")
+    op.drop_table("sync_tombstones")
+    op.drop_table("sync_counters")
+    op.create_index("ix_categories_user_id", "categories", ["user_id"])
+    op.drop_index("ix_categories_user_id_version", table_name="categories")
+    op.drop_index("ix_tasks_user_id_version", table_name="tasks")
+    for table in ("categories", "tasks"):
+        op.drop_column(table, "updated_at")
+        op.drop_column(table, "version")
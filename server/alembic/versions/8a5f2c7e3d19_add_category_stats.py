@@ -0,0 +1,149 @@
+"""Add category stats
+
+Revision ID: 8a5f2c7e3d19
+Revises: 6d3b8f1e0c42
+Create Date: 2026-10-18 18:07:44.615820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a5f2c7e3d19'
+down_revision: Union[str, Sequence[str], None] = '6d3b8f1e0c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_TRIGGERS = (
+    "category_stats_ci",
+    "category_stats_cd",
+    "category_stats_ti",
+    "category_stats_td",
+    "category_stats_tu",
+)
+
+
+def _delta(row: str, sign: str) -> str:
+    return (
+        "UPDATE category_stats SET "
+        f"open_count = open_count {sign} CASE WHEN {row}.is_done THEN 0 ELSE 1 END, "
+        f"done_count = done_count {sign} CASE WHEN {row}.is_done THEN 1 ELSE 0 END, "
+        f"estimated_duration_s = estimated_duration_s {sign} "
+        f"COALESCE({row}.estimated_duration_s, 0), "
+        f"open_estimated_duration_s = open_estimated_duration_s {sign} "
+        f"CASE WHEN {row}.is_done THEN 0 ELSE COALESCE({row}.estimated_duration_s, 0) END "
+        f"WHERE category_id = {row}.category_id"
+    )
+
+
+def _changed(is_distinct: str) -> str:
+    return " OR ".join(
+        f"old.{column} {is_distinct} new.{column}"
+        for column in ("is_done", "category_id", "estimated_duration_s")
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    if "category_stats" not in sa.inspect(conn).get_table_names():
+        counter = dict(nullable=False, server_default=sa.text("0"))
+        op.create_table(
+            "category_stats",
+            sa.Column("category_id", sa.Integer(), nullable=False),
+            sa.Column("open_count", sa.Integer(), **counter),
+            sa.Column("done_count", sa.Integer(), **counter),
+            sa.Column("estimated_duration_s", sa.BigInteger(), **counter),
+            sa.Column("open_estimated_duration_s", sa.BigInteger(), **counter),
+            sa.ForeignKeyConstraint(
+                ["category_id"], ["categories.id"], ondelete="CASCADE"
+            ),
+            sa.PrimaryKeyConstraint("category_id"),
+        )
+
+    if conn.dialect.name == "sqlite":
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS category_stats_ci AFTER INSERT ON categories "
+            "BEGIN INSERT INTO category_stats (category_id) VALUES (new.id); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS category_stats_cd AFTER DELETE ON categories "
+            "BEGIN DELETE FROM category_stats WHERE category_id = old.id; END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS category_stats_ti AFTER INSERT ON tasks "
+            f"BEGIN {_delta('new', '+')}; END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS category_stats_td AFTER DELETE ON tasks "
+            f"BEGIN {_delta('old', '-')}; END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS category_stats_tu "
+            "AFTER UPDATE OF is_done, category_id, estimated_duration_s ON tasks "
+            f"WHEN {_changed('IS NOT')} "
+            f"BEGIN {_delta('old', '-')}; {_delta('new', '+')}; END"
+        )
+    else:
+        op.execute(
+            "CREATE OR REPLACE FUNCTION category_stats_init() RETURNS trigger "
+            "LANGUAGE plpgsql AS $$ BEGIN "
+            "INSERT INTO category_stats (category_id) VALUES (new.id); "
+            "RETURN NULL; END $$"
+        )
+        op.execute(
+            "CREATE OR REPLACE FUNCTION category_stats_apply() RETURNS trigger "
+            "LANGUAGE plpgsql AS $$ BEGIN "
+            f"IF TG_OP <> 'INSERT' THEN {_delta('old', '-')}; END IF; "
+            f"IF TG_OP <> 'DELETE' THEN {_delta('new', '+')}; END IF; "
+            "RETURN NULL; END $$"
+        )
+        op.execute(
+            "CREATE OR REPLACE TRIGGER category_stats_ci AFTER INSERT ON categories "
+            "FOR EACH ROW EXECUTE FUNCTION category_stats_init()"
+        )
+        op.execute(
+            "CREATE OR REPLACE TRIGGER category_stats_tw "
+            "AFTER INSERT OR DELETE ON tasks "
+            "FOR EACH ROW EXECUTE FUNCTION category_stats_apply()"
+        )
+        op.execute(
+            "CREATE OR REPLACE TRIGGER category_stats_tu "
+            "AFTER UPDATE OF is_done, category_id, estimated_duration_s ON tasks "
+            f"FOR EACH ROW WHEN ({_changed('IS DISTINCT FROM')}) "
+            "EXECUTE FUNCTION category_stats_apply()"
+        )
+
+    # Count the tasks that existed before the triggers.
+    op.execute(
+        "INSERT INTO category_stats (category_id, open_count, done_count, "
+        "estimated_duration_s, open_estimated_duration_s) "
+        "SELECT c.id, COALESCE(t.open_count, 0), COALESCE(t.done_count, 0), "
+        "COALESCE(t.estimated_duration_s, 0), "
+        "COALESCE(t.open_estimated_duration_s, 0) "
+        "FROM categories c LEFT JOIN ("
+        "SELECT category_id, "
+        "SUM(CASE WHEN is_done THEN 0 ELSE 1 END) AS open_count, "
+        "SUM(CASE WHEN is_done THEN 1 ELSE 0 END) AS done_count, "
+        "SUM(COALESCE(estimated_duration_s, 0)) AS estimated_duration_s, "
+        "SUM(CASE WHEN is_done THEN 0 ELSE COALESCE(estimated_duration_s, 0) END) "
+        "AS open_estimated_duration_s "
+        "FROM tasks GROUP BY category_id"
+        ") t ON t.category_id = c.id "
+        "WHERE NOT EXISTS "
+        "(SELECT 1 FROM category_stats s WHERE s.category_id = c.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    else:
+        op.execute("DROP FUNCTION IF EXISTS category_stats_init() CASCADE")
+        op.execute("DROP FUNCTION IF EXISTS category_stats_apply() CASCADE")
+    op.drop_table("category_stats")
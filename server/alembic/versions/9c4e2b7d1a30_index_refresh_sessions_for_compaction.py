@@ -0,0 +1,53 @@
+"""Index refresh sessions for compaction
+
+Revision ID: 9c4e2b7d1a30
+Revises: 5d0c1f7a9b21
+Create Date: 2026-10-18 11:02:17.288431
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e2b7d1a30'
+down_revision: Union[str, Sequence[str], None] = '5d0c1f7a9b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    not_revoked = sa.text("revoked IS false")
+    revoked = sa.text("revoked IS true")
+    op.create_index(
+        "ix_refresh_sessions_user_active",
+        "refresh_sessions",
+        ["user_id", "expires_at"],
+        postgresql_where=not_revoked,
+        sqlite_where=not_revoked,
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_refresh_sessions_expires_at",
+        "refresh_sessions",
+        ["expires_at"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_refresh_sessions_revoked_at",
+        "refresh_sessions",
+        ["revoked_at"],
+        postgresql_where=revoked,
+        sqlite_where=revoked,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_refresh_sessions_revoked_at", table_name="refresh_sessions")
+    op.drop_index("ix_refresh_sessions_expires_at", table_name="refresh_sessions")
+    op.drop_index("ix_refresh_sessions_user_active", table_name="refresh_sessions")
@@ -0,0 +1,32 @@
+"""Index tasks by estimate
+
+Revision ID: b5e1d8c4a7f2
+Revises: 8a5f2c7e3d19
+Create Date: 2026-10-18 19:26:51.308417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1d8c4a7f2'
+down_revision: Union[str, Sequence[str], None] = '8a5f2c7e3d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_tasks_user_id_estimated_duration_s",
+        "tasks",
+        ["user_id", "estimated_duration_s"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tasks_user_id_estimated_duration_s", table_name="tasks")
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import metrics
+from app.database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+# Defaults to what the connection pool can serve at once.
+ADMISSION_MAX_IN_FLIGHT = int(
+    os.getenv("ADMISSION_MAX_IN_FLIGHT", str(DB_POOL_SIZE + DB_MAX_OVERFLOW))
+)
+ADMISSION_QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "2"))
+ADMISSION_RETRY_AFTER_S = 1
+# Requests that never touch the database, and long-lived streams that only
+# borrow a connection per chunk or not at all (holding a slot would starve
+# short requests).
+EXEMPT_PATHS = frozenset({"/", "/health", "/metrics", "/export", "/events"})
+
+_in_flight = metrics.gauge("admission_in_flight")
+_queued = metrics.gauge("admission_queued")
+_rejected = metrics.counter("admission_rejected_total")
+_wait = metrics.summary("admission_wait_seconds")
+
+
+class AdmissionControlMiddleware:
+    """Caps concurrent DB-bound requests; excess ones wait up to a deadline, then get 503."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        queue_timeout_s: float = ADMISSION_QUEUE_TIMEOUT_S,
+        exempt_paths: frozenset[str] = EXEMPT_PATHS,
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.queue_timeout_s = queue_timeout_s
+        self.exempt_paths = exempt_paths
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        return self._slots
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        slots = self._get_slots()
+        _queued.inc()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout_s)
+        except TimeoutError:
+            _rejected.inc()
+            response = JSONResponse(
+                {"detail": "Server is busy. Try again shortly."},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_S)},
+            )
+            await response(scope, receive, send)
+            return
+        finally:
+            _queued.dec()
+            _wait.observe(time.perf_counter() - started)
+
+        _in_flight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _in_flight.dec()
+            slots.release()
@@ -1,24 +1,39 @@
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
+import math
 import secrets
 import hashlib
 import uuid
 import jwt
 from jwt import InvalidTokenError
-from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status
+from fastapi import (
+    APIRouter,
+    Cookie,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 import os
 
 from app.models import UserDB
 
-from .database import get_db
+from .database import SESSION_USER_ID, get_async_db, get_db
+from .principal_cache import Principal, principal_cache
+from .ratelimit import client_ip, login_throttle
+from .revocation import access_revocations
+from .services.aio import users as aio_user_svc
 from .services.users import create_user, get_user
 from .schemas import CategoryCreate, UserCreate, UserRead
-from .security import verify_password
+from .errors import OverloadedException
+from .security import PASSWORD_HASH_RETRY_AFTER_S, verify_password
 from .models import RefreshSession
 
 ALGORITHM = "HS256"
@@ -32,6 +47,9 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=AUTH_TOKEN_ENDPOINT)
 router_name: str = "auth"
 domain = os.getenv("COOKIE_DOMAIN", "vitask.app")
 auth_router = APIRouter(prefix="/" + router_name, tags=[router_name])
+# Async versions of some `auth_router` routes, mounted ahead of it when
+# DB_MODE is "async" (see `app.routers.aio`).
+async_auth_router = APIRouter(prefix="/" + router_name, tags=[router_name])
 is_local = domain in ("localhost", "127.0.0.1")
 
 
@@ -48,6 +66,7 @@ class TokenPayload(BaseModel):
     sub: str
     typ: str
     exp: int
+    jti: str | None = None
 
 
 def _now():
@@ -61,6 +80,7 @@ def _create_token(*, subject: str, token_type: str, expires_delta: timedelta) ->
         "typ": token_type,
         "exp": int(exp.timestamp()),
         "iat": int(_now().timestamp()),
+        "jti": uuid.uuid4().hex,
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
@@ -95,44 +115,96 @@ def authenticate_user(db: Session, username: str, password: str):
     user = db.execute(
         select(UserDB).where(UserDB.username == username)
     ).scalar_one_or_none()
-    if not user or not verify_password(password, user.password):
+    if not user:
+        return None
+    # Hand the connection back to the pool while Argon2 runs.
+    db.expunge(user)
+    db.rollback()
+    if not verify_password(password, user.password):
         return None
     return user
 
 
+def _hashing_overloaded(e: OverloadedException) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_S)},
+    )
+
+
 def _hash_token(raw: str) -> str:
     return hashlib.sha256(raw.encode()).hexdigest()
 
 
-def issue_refresh_token(db: Session, user_id: int) -> str:
-    """Create and store a new refresh token, return raw value."""
+def _add_refresh_session(db: Session, user_id: int, family_id: str) -> str:
     raw = secrets.token_urlsafe(64)
-    row = RefreshSession(
-        user_id=user_id,
-        jti=str(uuid.uuid4()),
-        token_hash=_hash_token(raw),
-        expires_at=_now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    db.add(
+        RefreshSession(
+            user_id=user_id,
+            jti=str(uuid.uuid4()),
+            family_id=family_id,
+            token_hash=_hash_token(raw),
+            expires_at=_now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        )
     )
-    db.add(row)
-    db.commit()
     return raw
 
 
-def rotate_refresh_token(db: Session, old_raw: str, user_id: int) -> str | None:
-    """Revoke old and issue new one if valid."""
-    row = db.scalar(
-        select(RefreshSession).where(
-            RefreshSession.token_hash == _hash_token(old_raw),
+def issue_refresh_token(db: Session, user_id: int) -> str:
+    """Create and store a new refresh token (new family), return raw value."""
+    raw = _add_refresh_session(db, user_id, family_id=str(uuid.uuid4()))
+    db.flush()
+    return raw
+
+
+def rotate_refresh_token(db: Session, old_raw: str) -> tuple[int, str] | None:
+    """Revoke old and issue new one if valid, in a single transaction.
+
+    The revocation is one conditional UPDATE ... RETURNING, so two concurrent
+    rotations of the same token cannot both succeed. Presenting a token that
+    was already rotated revokes its whole family; that is flushed like the
+    rest, so commit it even when rejecting the request.
+    """
+    now = _now()
+    token_hash = _hash_token(old_raw)
+    rotated = db.execute(
+        update(RefreshSession)
+        .where(
+            RefreshSession.token_hash == token_hash,
             RefreshSession.revoked.is_(False),
-            RefreshSession.user_id == user_id,
+            RefreshSession.expires_at > now,
         )
-    )
-    if not row or row.expires_at <= _now():
+        .values(revoked=True, revoked_at=now)
+        .returning(RefreshSession.user_id, RefreshSession.family_id)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if rotated is None:
+        _revoke_reused_family(db, token_hash)
         return None
-    row.revoked = True
-    row.revoked_at = _now()
-    db.commit()
-    return issue_refresh_token(db, user_id)
+    raw = _add_refresh_session(db, rotated.user_id, rotated.family_id)
+    db.flush()
+    return rotated.user_id, raw
+
+
+def _revoke_reused_family(db: Session, token_hash: str) -> None:
+    family_id = db.scalar(
+        select(RefreshSession.family_id).where(
+            RefreshSession.token_hash == token_hash,
+            RefreshSession.revoked.is_(True),
+        )
+    )
+    if family_id is None:
+        return
+    db.execute(
+        update(RefreshSession)
+        .where(
+            RefreshSession.family_id == family_id,
+            RefreshSession.revoked.is_(False),
+        )
+        .values(revoked=True, revoked_at=_now())
+        .execution_options(synchronize_session=False)
+    )
 
 
 def revoke_all_refresh_tokens(db: Session, user_id: int):
@@ -141,11 +213,9 @@ def revoke_all_refresh_tokens(db: Session, user_id: int):
         .where(RefreshSession.user_id == user_id, RefreshSession.revoked.is_(False))
         .values(revoked=True, revoked_at=_now())
     )
-    db.commit()
 
 
-@auth_router.post("/signup", status_code=201, response_model=UserRead)
-def signup(user_in: UserCreate, db: Session = Depends(get_db)):
+def _ensure_available(db: Session, user_in: UserCreate) -> None:
     existing_username = db.scalar(
         select(UserDB.id).where(UserDB.username == user_in.username)
     )
@@ -156,7 +226,34 @@ def signup(user_in: UserCreate, db: Session = Depends(get_db)):
     if existing_email is not None:
         raise HTTPException(400, "A user with the same email exists already.")
 
-    user = create_user(db, user_in)
+
+@auth_router.post("/signup", status_code=201, response_model=UserRead)
+def signup(
+    user_in: UserCreate, db: Session = Depends(get_db, scope="function")
+):
+    _ensure_available(db, user_in)
+    # Release the connection used by the checks above while the password hashes.
+    db.rollback()
+    try:
+        user = create_user(db, user_in)
+    except OverloadedException as e:
+        raise _hashing_overloaded(e)
+    if not user:
+        raise HTTPException(500, "Failed to create the user.")
+
+    return user
+
+
+@async_auth_router.post("/signup", status_code=201, response_model=UserRead)
+async def signup_async(
+    user_in: UserCreate, db: AsyncSession = Depends(get_async_db, scope="function")
+):
+    await db.run_sync(_ensure_available, user_in)
+    await db.rollback()
+    try:
+        user = await aio_user_svc.create_user(db, user_in)
+    except OverloadedException as e:
+        raise _hashing_overloaded(e)
     if not user:
         raise HTTPException(500, "Failed to create the user.")
 
@@ -165,14 +262,21 @@ def signup(user_in: UserCreate, db: Session = Depends(get_db)):
 
 @auth_router.post("/token", response_model=Token)
 def login_for_tokens(
+    request: Request,
     response: Response,
     form: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ):
-    candidate = db.scalar(select(UserDB).where(UserDB.username == form.username))
-    if not candidate:
-        raise HTTPException(401, "The username or password is incorrect.")
-    user = authenticate_user(db, candidate.username, form.password)
+    if retry_after := login_throttle.check(form.username, client_ip(request)):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    try:
+        user = authenticate_user(db, form.username, form.password)
+    except OverloadedException as e:
+        raise _hashing_overloaded(e)
     if not user:
         raise HTTPException(401, "The username or password is incorrect.")
     sub = str(user.id)
@@ -197,29 +301,68 @@ def login_for_tokens(
     )
 
 
-def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)
-) -> UserDB:
+def _access_token_user_id(token: str) -> int:
     payload = decode_token(token)
     if payload.typ != "access":
         raise HTTPException(401, "Use an access token.")
-    user = get_user(db, int(payload.sub))
+    if payload.jti and access_revocations.is_revoked(payload.jti):
+        raise HTTPException(401, "Token has been revoked.")
+    return int(payload.sub)
+
+
+def _cache_principal(user: UserDB | None) -> Principal:
     if not user:
         raise HTTPException(401, "User not found.")
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.put(principal)
+    return principal
 
 
-def get_current_active_user(current_user: UserDB = Depends(get_current_user)) -> UserDB:
-    if getattr(current_user, "is_active", True) is False:
+def _ensure_active(user: Principal) -> Principal:
+    if getattr(user, "is_active", True) is False:
         raise HTTPException(400, "Inactive user.")
-    return current_user
+    return user
+
+
+def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db, scope="function"),
+) -> Principal:
+    user_id = _access_token_user_id(token)
+    db.info[SESSION_USER_ID] = user_id
+    if (principal := principal_cache.get(user_id)) is not None:
+        return principal
+    return _cache_principal(get_user(db, user_id))
+
+
+def get_current_active_user(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
+    return _ensure_active(current_user)
+
+
+async def get_current_user_async(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+) -> Principal:
+    user_id = _access_token_user_id(token)
+    if (principal := principal_cache.get(user_id)) is not None:
+        return principal
+    return _cache_principal(await aio_user_svc.get_user(db, user_id))
+
+
+async def get_current_active_user_async(
+    current_user: Principal = Depends(get_current_user_async),
+) -> Principal:
+    return _ensure_active(current_user)
 
 
 @auth_router.post("/logout")
 def logout(
     response: Response,
-    db: Session = Depends(get_db),
-    user: UserRead = Depends(get_current_active_user),
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     response.delete_cookie(
         key="refresh_token",
@@ -232,7 +375,10 @@ def logout(
         .where(RefreshSession.user_id == user.id, RefreshSession.revoked.is_(False))
         .values(revoked=True, revoked_at=datetime.now(timezone.utc))
     )
-    db.commit()
+    principal_cache.invalidate(user.id)
+    payload = decode_token(token)
+    if payload.jti:
+        access_revocations.revoke(payload.jti, payload.exp)
 
     return {"detail": "Logged out"}
 
@@ -240,28 +386,21 @@ def logout(
 @auth_router.post("/refresh", response_model=Token)
 def refresh_access_token(
     response: Response,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     rtoken: str | None = Cookie(default=None, alias="refresh_token"),
 ):
     if not rtoken:
         raise HTTPException(401, "No refresh token")
 
-    # Look up session
-    row = db.scalar(
-        select(RefreshSession).where(
-            RefreshSession.token_hash == _hash_token(rtoken),
-            RefreshSession.revoked.is_(False),
-        )
-    )
-    if not row or row.expires_at <= _now():
+    rotated = rotate_refresh_token(db, rtoken)
+    if not rotated:
+        # The 401 rolls the request back; keep a reused family's revocation.
+        db.commit()
         raise HTTPException(401, "Invalid or expired refresh token")
-
-    new_raw = rotate_refresh_token(db, rtoken, row.user_id)
-    if not new_raw:
-        raise HTTPException(401, "Rotation failed")
+    user_id, new_raw = rotated
 
     # Issue new access token
-    access = create_access_token(str(row.user_id))
+    access = create_access_token(str(user_id))
 
     # Set new cookie
     response.set_cookie(
@@ -276,7 +415,7 @@ def refresh_access_token(
     )
 
     return Token(
-        user_id=row.user_id,
+        user_id=user_id,
         access_token=access,
         refresh_token="rotated-in-cookie",
     )
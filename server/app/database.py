@@ -1,42 +1,222 @@
+import asyncio
 import os
+import threading
+import time
 from typing import Dict, Any
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
 from sqlalchemy.engine.url import make_url
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+# "sync" serves requests from the threadpool with blocking sessions, "async"
+# swaps in async routes backed by an AsyncSession (aiosqlite / asyncpg) for
+# tasks, categories, /user, signup and the current-user dependency. Login,
+# token refresh, logout, sync, batch, export, import and events keep their
+# sync sessions in both modes; on SQLite both kinds share one writer lock.
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# SQLite profile, applied to every new connection.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Funnel this process's writers through one lock instead of letting them
+# race for SQLite's file lock.
+SQLITE_SERIALIZE_WRITES = os.getenv("SQLITE_SERIALIZE_WRITES", "1") == "1"
+
+# Pool capacity per worker. Request admission and the threadpool are sized
+# against it so handlers don't pile up waiting for a connection checkout.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# Key under which the authenticated user's id is recorded in `Session.info`.
+SESSION_USER_ID = "user_id"
+
+
+def is_sqlite_url(database_url) -> bool:
+    return make_url(database_url).get_backend_name().startswith("sqlite")
+
 
 url = make_url(DATABASE_URL)
+is_sqlite = is_sqlite_url(url)
+
 
-connect_args: Dict[str, Any] = {}
-engine_kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+def engine_options(database_url) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return (connect_args, engine kwargs) for a database URL."""
+    connect_args: Dict[str, Any] = {}
+    engine_kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    if is_sqlite_url(database_url):
+        connect_args = {"check_same_thread": False}
+    else:
+        # Postgres defaults
+        engine_kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    return connect_args, engine_kwargs
 
-if url.get_backend_name().startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-else:
-    # Postgres defaults
-    engine_kwargs.update(
-        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
-        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+
+def create_db_engine(database_url: str):
+    connect_args, engine_kwargs = engine_options(database_url)
+    db_engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        **engine_kwargs,
     )
+    if is_sqlite_url(database_url):
+        event.listen(db_engine, "connect", apply_sqlite_pragmas)
+    return db_engine
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    **engine_kwargs,
-)
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a write is in progress; NORMAL only
+    # fsyncs at checkpoints, which is safe in WAL mode.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+_WRITE_LOCK_HELD = "sqlite_write_lock_held"
+
+
+def _acquire_without_blocking_loop(lock: threading.Lock, timeout: float) -> bool:
+    # Sessions driven by an AsyncSession run on the event loop, where a
+    # blocking acquire would stall every other request, including the one
+    # holding the lock. Poll instead, sleeping on the loop between tries.
+    deadline = time.monotonic() + timeout
+    while not lock.acquire(blocking=False):
+        if time.monotonic() >= deadline:
+            return False
+        await_only(asyncio.sleep(0.005))
+    return True
+
+
+def serialize_writes(
+    session_factory: sessionmaker | type[Session],
+    lock: "threading.Lock | None" = None,
+) -> threading.Lock:
+    """Make sessions from `session_factory` take a shared lock before writing.
+
+    The lock is taken on the first flush or DML statement and released when
+    the transaction ends, so there is at most one write transaction at a time
+    while read-only sessions never wait. Pass the lock returned for another
+    factory to serialize both against each other.
+    """
+    lock = lock or threading.Lock()
+
+    def acquire(session) -> None:
+        if session.info.get(_WRITE_LOCK_HELD):
+            return
+        timeout = SQLITE_BUSY_TIMEOUT_MS / 1000
+        if in_greenlet():
+            acquired = _acquire_without_blocking_loop(lock, timeout)
+        else:
+            acquired = lock.acquire(timeout=timeout)
+        if not acquired:
+            raise SQLAlchemyTimeoutError("Timed out waiting for the SQLite writer lock.")
+        session.info[_WRITE_LOCK_HELD] = True
+
+    @event.listens_for(session_factory, "before_flush")
+    def _before_flush(session, flush_context, instances):
+        acquire(session)
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def _before_dml(orm_execute_state):
+        if (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        ):
+            acquire(orm_execute_state.session)
+
+    @event.listens_for(session_factory, "after_transaction_end")
+    def _release(session, transaction):
+        if transaction.parent is None and session.info.pop(_WRITE_LOCK_HELD, False):
+            lock.release()
+
+    return lock
 
 
 class Base(DeclarativeBase):
     pass
 
 
+engine = create_db_engine(DATABASE_URL)
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
+write_lock = (
+    serialize_writes(SessionLocal) if is_sqlite and SQLITE_SERIALIZE_WRITES else None
+)
+
 
 def get_db():
+    """Request-scoped unit of work.
+
+    Services only flush; the request commits once when the handler returns
+    and rolls back if it raises. Depend on it with `scope="function"` so the
+    commit happens before the response is sent. A session that never ran a
+    statement never checks out a connection.
+    """
     db = SessionLocal()
     try:
         yield db
+        if db.in_transaction():
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
+
+
+def async_url(sync_url: str):
+    parsed = make_url(sync_url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()])
+
+
+class AsyncBackingSession(Session):
+    """The sync session inside each `AsyncSessionLocal` session, kept apart
+    so events can be registered for the async sessions only."""
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    connect_args, engine_kwargs = engine_options(DATABASE_URL)
+    async_engine = create_async_engine(
+        async_url(DATABASE_URL),
+        connect_args=connect_args,
+        **engine_kwargs,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        sync_session_class=AsyncBackingSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    if is_sqlite:
+        event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    if write_lock is not None:
+        serialize_writes(AsyncBackingSession, write_lock)
+
+
+async def get_async_db():
+    """Async counterpart of `get_db`, with the same unit-of-work semantics."""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            if db.in_transaction():
+                await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
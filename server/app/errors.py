@@ -1,2 +1,3 @@
 class NotFoundException(Exception): ...
 class ForbiddenException(Exception): ...
+class OverloadedException(Exception): ...
@@ -0,0 +1,54 @@
+"""Weak ETags for per-user collections.
+
+A collection's tag is derived from the user's sync version (see
+`app.services.sync`), which every task/category write bumps. Checking a
+poll therefore costs one primary-key lookup, and an unchanged collection is
+answered with 304 before any rows are queried or serialized.
+"""
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from app.services import sync as sync_svc
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison: W/"x" and "x" are the same tag.
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Set `etag` on the response; return a 304 if the client already has it."""
+    if _matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+
+def collection_etag(request: Request, collection: str, user_id: int, version: int) -> str:
+    # The query string is part of the tag: filtered pages are separate resources.
+    return make_etag(collection, user_id, version, request.url.query)
+
+
+def version_not_modified(
+    request: Request, response: Response, user_id: int, collection: str, version: int
+) -> Response | None:
+    etag = collection_etag(request, collection, user_id, version)
+    return not_modified(request, response, etag)
+
+
+def collection_not_modified(
+    request: Request, response: Response, db: Session, user_id: int, collection: str
+) -> Response | None:
+    version = sync_svc.current_version(db, user_id)
+    return version_not_modified(request, response, user_id, collection, version)
@@ -0,0 +1,309 @@
+"""Per-user change notifications, pushed to clients over Server-Sent Events.
+
+Every transaction that allocates a sync version (see `app.services.sync`)
+publishes one `sync` event carrying that version once it commits, and
+nothing if it rolls back. Clients react by pulling /sync/changes from their
+cursor, so an event never has to describe the change itself.
+
+Fan-out is in-process: each open stream has a bounded queue, and a stream
+that falls `EVENTS_QUEUE_SIZE` events behind is ended instead of buffered
+without limit; the client reconnects and catches up from its cursor. An
+`EventChannel` carries events between workers.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import event as sa_event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# "local" delivers within one worker; "postgres" uses LISTEN/NOTIFY.
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "64"))
+EVENTS_KEEPALIVE_S = float(os.getenv("EVENTS_KEEPALIVE_S", "15"))
+EVENTS_PG_CHANNEL = "vitask_events"
+# Reconnect delay suggested to EventSource clients, in milliseconds.
+EVENTS_RETRY_MS = 3000
+
+EventCallback = Callable[[int, dict], None]
+
+_PENDING = "pending_events"
+
+_published = metrics.counter("events_published_total")
+_subscribers = metrics.gauge("events_subscribers")
+_dropped = metrics.counter("events_subscribers_dropped_total")
+
+
+class EventChannel(ABC):
+    """Carries committed events to every worker, the publishing one included."""
+
+    def before_commit(self, db: Session, events: list[tuple[int, dict]]) -> None:
+        """Publish from inside the committing transaction, if the channel can."""
+
+    def after_commit(self, events: list[tuple[int, dict]]) -> None:
+        """Publish once the transaction has committed."""
+
+    @abstractmethod
+    def subscribe(self, callback: EventCallback) -> None: ...
+
+
+class LocalEventChannel(EventChannel):
+    """Delivers events to subscribers in this process only."""
+
+    def __init__(self):
+        self._subscribers: list[EventCallback] = []
+
+    def after_commit(self, events: list[tuple[int, dict]]) -> None:
+        for user_id, payload in events:
+            for callback in list(self._subscribers):
+                callback(user_id, payload)
+
+    def subscribe(self, callback: EventCallback) -> None:
+        self._subscribers.append(callback)
+
+
+class PostgresEventChannel(EventChannel):
+    """Delivers events to every worker through Postgres LISTEN/NOTIFY.
+
+    NOTIFY is issued inside the writing transaction, so Postgres delivers it
+    only if that transaction commits. Each worker listens on one dedicated
+    connection from a daemon thread, started on the first subscription.
+    """
+
+    def __init__(self, db_engine: Engine, channel: str = EVENTS_PG_CHANNEL, poll_s: float = 5):
+        self.engine = db_engine
+        self.channel = channel
+        self.poll_s = poll_s
+        self._subscribers: list[EventCallback] = []
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def before_commit(self, db: Session, events: list[tuple[int, dict]]) -> None:
+        for user_id, payload in events:
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {
+                    "channel": self.channel,
+                    "payload": json.dumps({"user_id": user_id, "event": payload}),
+                },
+            )
+
+    def subscribe(self, callback: EventCallback) -> None:
+        self._subscribers.append(callback)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._listen, name="events-listener", daemon=True
+                )
+                self._thread.start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception("Event listener lost its connection, reconnecting")
+                time.sleep(self.poll_s)
+
+    def _listen_once(self) -> None:
+        raw = self.engine.raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while True:
+                readable, _, _ = select.select([conn], [], [], self.poll_s)
+                if not readable:
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    message = json.loads(conn.notifies.pop(0).payload)
+                    for callback in list(self._subscribers):
+                        callback(message["user_id"], message["event"])
+        finally:
+            # A LISTENing connection must not go back to the pool.
+            raw.invalidate()
+
+
+class Subscription:
+    """One open stream: a bounded queue on its event loop, fed from any thread."""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        # None marks the end of the stream.
+        self.queue: asyncio.Queue[dict | None] = asyncio.Queue(queue_size)
+        self.dropped = False
+
+    def put(self, payload: dict) -> None:
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Too far behind: end the stream; the client resyncs on reconnect.
+            self.dropped = True
+            _dropped.inc()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self) -> dict | None:
+        return await self.queue.get()
+
+
+class EventBus:
+    """Fans committed events out to the open streams of their user."""
+
+    def __init__(self, channel: EventChannel, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._listeners: list[EventCallback] = []
+        self._lock = threading.Lock()
+        self._attached = False
+
+    def publish_on_commit(self, db: Session, user_id: int, payload: dict) -> None:
+        """Queue `payload` for `user_id`, sent only if `db`'s transaction commits."""
+        db.info.setdefault(_PENDING, []).append((user_id, payload))
+
+    def _attach(self) -> None:
+        # Called with the lock held.
+        if not self._attached:
+            self.channel.subscribe(self._receive)
+            self._attached = True
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._attach()
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        _subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+        _subscribers.dec()
+
+    def add_listener(self, callback: EventCallback) -> None:
+        """Also hand every user's events reaching this worker to `callback`.
+
+        It is called on whichever thread delivers the event and must not block.
+        """
+        with self._lock:
+            self._attach()
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: EventCallback) -> None:
+        with self._lock:
+            self._listeners.remove(callback)
+
+    def _receive(self, user_id: int, payload: dict) -> None:
+        for callback in list(self._listeners):
+            callback(user_id, payload)
+        self.deliver_local(user_id, payload)
+
+    def deliver_local(self, user_id: int, payload: dict) -> None:
+        """Send to this worker's streams only, for events every worker raises itself."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, payload)
+            except RuntimeError:  # its event loop is closed
+                self.unsubscribe(subscription)
+
+
+def format_sse(payload: dict) -> str:
+    lines = [f"event: {payload['type']}", f"data: {json.dumps(payload)}"]
+    if "version" in payload:
+        # Sent back as Last-Event-ID when an EventSource reconnects.
+        lines.insert(0, f"id: {payload['version']}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def stream(
+    bus: EventBus,
+    user_id: int,
+    catch_up: Callable[[], dict | None] | None = None,
+    keepalive_s: float = EVENTS_KEEPALIVE_S,
+) -> AsyncIterator[str]:
+    """SSE body for `user_id`. `catch_up` runs on the threadpool once
+    subscribed and may return an event the client missed while away."""
+    subscription = bus.subscribe(user_id)
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        if catch_up is not None:
+            missed = await run_in_threadpool(catch_up)
+            if missed is not None:
+                yield format_sse(missed)
+        while True:
+            try:
+                payload = await asyncio.wait_for(subscription.get(), keepalive_s)
+            except TimeoutError:
+                # Comment lines keep proxies from closing an idle stream.
+                yield ": keepalive\n\n"
+                continue
+            if payload is None:
+                yield format_sse({"type": "overflow"})
+                return
+            yield format_sse(payload)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+def _make_channel() -> EventChannel:
+    if EVENTS_BACKEND == "postgres":
+        return PostgresEventChannel(engine)
+    return LocalEventChannel()
+
+
+event_bus = EventBus(_make_channel())
+
+
+# Registered on Session itself so every session, including the ones behind
+# AsyncSession, publishes on commit. Both commit hooks also fire when a
+# savepoint is released; only the outermost commit publishes.
+@sa_event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    pending = session.info.get(_PENDING)
+    if pending:
+        event_bus.channel.before_commit(session, pending)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        _published.inc(len(pending))
+        event_bus.channel.after_commit(pending)
+
+
+@sa_event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
@@ -7,16 +7,29 @@ try:
 except Exception:
     pass
 
+import hmac
+import ipaddress
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import anyio.to_thread
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import metrics, security
+from app.admission import AdmissionControlMiddleware
+from app.replicas import StickyWritesMiddleware
 from app.routers.tasks import task_router
 from app.routers.users import user_router
 from app.routers.categories import category_router, create_category
-from app.database import Base, engine
+from app.routers.sync import sync_router
+from app.routers.batch import batch_router
+from app.routers.export import export_router
+from app.routers.imports import import_router
+from app.routers.events import events_router
+from app.database import DB_MODE, THREADPOOL_SIZE, Base, engine
 from app.auth import auth_router
+from app.maintenance import background_jobs
 from app.schemas import CategoryCreate
 
 # Importing models so SQLAlchemy registers all model classes
@@ -38,8 +51,28 @@ DEFAULT_ORIGINS = [
 raw = os.getenv("ALLOWED_ORIGINS", "")
 origins = parse_origins(raw) or DEFAULT_ORIGINS
 
-app = FastAPI()
+# Bearer token for /metrics; without one only local, unproxied requests are served.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    jobs = background_jobs()
+    for job in jobs:
+        job.start()
+    yield
+    for job in jobs:
+        await job.stop()
+    # The hashing workers are separate processes and would outlive a reload.
+    security.shutdown_hash_executor()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Added before CORS so that 503s from admission control still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(StickyWritesMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -51,14 +84,30 @@ app.add_middleware(
         "Set-Cookie",
         "Cookie",
         "X-Requested-With",
+        "If-None-Match",
     ],
-    expose_headers=["*"],
+    # "*" is not honoured for credentialed requests, so list what clients read.
+    expose_headers=["*", "ETag", "Retry-After", "X-Next-Cursor"],
 )
 
+if DB_MODE == "async":
+    # Registered first so they take precedence over the sync routes they mirror.
+    from app.auth import async_auth_router
+    from app.routers import aio
+
+    app.include_router(aio.user_router)
+    app.include_router(async_auth_router)
+    app.include_router(aio.task_router)
+    app.include_router(aio.category_router)
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(task_router)
 app.include_router(category_router)
+app.include_router(sync_router)
+app.include_router(batch_router)
+app.include_router(export_router)
+app.include_router(import_router)
+app.include_router(events_router)
 
 
 @app.get("/")
@@ -71,4 +120,28 @@ async def health():
     return {"message": "Server running"}
 
 
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def require_metrics_access(request: Request) -> None:
+    if METRICS_TOKEN:
+        given = request.headers.get("authorization", "").encode("latin-1")
+        if not hmac.compare_digest(given, f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(401, "Invalid metrics token.")
+        return
+    # Proxied requests come from the internet, whatever the peer address.
+    peer = request.client.host if request.client else ""
+    if not _is_loopback(peer) or "x-forwarded-for" in request.headers:
+        raise HTTPException(403, "Metrics are only served locally.")
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def read_metrics():
+    return metrics.snapshot()
+
+
 Base.metadata.create_all(engine)
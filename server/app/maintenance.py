@@ -0,0 +1,250 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Callable
+
+from sqlalchemy import and_, case, delete, exists, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.database import SessionLocal
+from app.events import event_bus
+from app.models import CategoryDB, CategoryStats, RefreshSession, TaskDB
+from app.reminders import REMINDER_WINDOW_S, ReminderScheduler
+from app.replicas import REPLICA_HEALTH_INTERVAL_S, replica_set
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the compactor.
+REFRESH_COMPACTION_INTERVAL_S = float(os.getenv("REFRESH_COMPACTION_INTERVAL_S", "3600"))
+REFRESH_COMPACTION_BATCH_SIZE = int(os.getenv("REFRESH_COMPACTION_BATCH_SIZE", "500"))
+# Revoked sessions are kept this long so token reuse can still be detected.
+REFRESH_REVOKED_RETENTION_H = float(os.getenv("REFRESH_REVOKED_RETENTION_H", "24"))
+
+# 0 disables the category_stats reconciler.
+CATEGORY_STATS_RECONCILE_INTERVAL_S = float(
+    os.getenv("CATEGORY_STATS_RECONCILE_INTERVAL_S", "3600")
+)
+CATEGORY_STATS_RECONCILE_BATCH_SIZE = int(
+    os.getenv("CATEGORY_STATS_RECONCILE_BATCH_SIZE", "500")
+)
+
+_purged = metrics.counter("refresh_sessions_purged_total")
+_last_purged = metrics.gauge("refresh_sessions_purged_last_run")
+_duration = metrics.summary("refresh_compaction_seconds")
+_stats_repaired = metrics.counter("category_stats_repaired_total")
+_stats_duration = metrics.summary("category_stats_reconcile_seconds")
+
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def purge_refresh_sessions(
+    db: Session,
+    *,
+    batch_size: int = REFRESH_COMPACTION_BATCH_SIZE,
+    revoked_retention: timedelta = timedelta(hours=REFRESH_REVOKED_RETENTION_H),
+) -> int:
+    """Delete expired and long-revoked sessions, committing every batch.
+
+    Small batches keep each delete's locks short so logins and refreshes are
+    never queued behind the compactor.
+    """
+    now = RefreshSession.now()
+    purgeable = (
+        RefreshSession.expires_at <= now,
+        and_(
+            RefreshSession.revoked.is_(True),
+            RefreshSession.revoked_at <= now - revoked_retention,
+        ),
+    )
+    purged = 0
+    for condition in purgeable:
+        while True:
+            ids = db.scalars(
+                select(RefreshSession.id).where(condition).limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            db.execute(delete(RefreshSession).where(RefreshSession.id.in_(ids)))
+            db.commit()
+            purged += len(ids)
+            if len(ids) < batch_size:
+                break
+    return purged
+
+
+def compact_refresh_sessions() -> int:
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        purged = purge_refresh_sessions(db)
+    _duration.observe(time.perf_counter() - started)
+    _purged.inc(purged)
+    _last_purged.set(purged)
+    logger.info("Purged %d refresh sessions", purged)
+    return purged
+
+
+_STATS_COUNTERS = (
+    CategoryStats.open_count,
+    CategoryStats.done_count,
+    CategoryStats.estimated_duration_s,
+    CategoryStats.open_estimated_duration_s,
+)
+
+
+def _actual_category_stats(db: Session, category_ids: list[int]) -> dict[int, tuple]:
+    is_open = TaskDB.is_done.is_(False)
+    estimate = func.coalesce(TaskDB.estimated_duration_s, 0)
+    rows = db.execute(
+        select(
+            TaskDB.category_id,
+            func.sum(case((is_open, 1), else_=0)),
+            func.sum(case((is_open, 0), else_=1)),
+            func.sum(estimate),
+            func.sum(case((is_open, estimate), else_=0)),
+        )
+        .where(TaskDB.category_id.in_(category_ids))
+        .group_by(TaskDB.category_id)
+    )
+    return {category_id: tuple(counters) for category_id, *counters in rows}
+
+
+def reconcile_category_stats(
+    db: Session, *, batch_size: int = CATEGORY_STATS_RECONCILE_BATCH_SIZE
+) -> int:
+    """Rewrite category_stats rows that disagree with the tasks table.
+
+    Categories are checked a batch at a time, committing every batch. The
+    stored row is read before the tasks and only overwritten if it still
+    holds what was read, so a write committing in between is left for the
+    next run rather than lost.
+    """
+    repaired = 0
+    after = 0
+    while True:
+        ids = db.scalars(
+            select(CategoryDB.id)
+            .where(CategoryDB.id > after)
+            .order_by(CategoryDB.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        stored = {
+            category_id: tuple(counters)
+            for category_id, *counters in db.execute(
+                select(CategoryStats.category_id, *_STATS_COUNTERS).where(
+                    CategoryStats.category_id.in_(ids)
+                )
+            )
+        }
+        actual = _actual_category_stats(db, ids)
+        for category_id in ids:
+            expected = actual.get(category_id, (0,) * len(_STATS_COUNTERS))
+            current = stored.get(category_id)
+            if current == expected:
+                continue
+            values = {c.key: value for c, value in zip(_STATS_COUNTERS, expected)}
+            if current is None:
+                stmt = (
+                    _UPSERTS[db.get_bind().dialect.name](CategoryStats)
+                    .values(category_id=category_id, **values)
+                    .on_conflict_do_nothing()
+                )
+            else:
+                stmt = (
+                    update(CategoryStats)
+                    .where(
+                        CategoryStats.category_id == category_id,
+                        *(c == value for c, value in zip(_STATS_COUNTERS, current)),
+                    )
+                    .values(**values)
+                )
+            repaired += db.execute(stmt).rowcount
+        db.commit()
+        if len(ids) < batch_size:
+            break
+        after = ids[-1]
+    orphans = db.execute(
+        delete(CategoryStats).where(
+            ~exists().where(CategoryDB.id == CategoryStats.category_id)
+        )
+    )
+    db.commit()
+    return repaired + orphans.rowcount
+
+
+def repair_category_stats() -> int:
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        repaired = reconcile_category_stats(db)
+    _stats_duration.observe(time.perf_counter() - started)
+    _stats_repaired.inc(repaired)
+    if repaired:
+        logger.warning("Repaired %d category_stats rows", repaired)
+    return repaired
+
+
+class PeriodicJob:
+    """Runs a blocking function on the threadpool every `interval_s` seconds."""
+
+    def __init__(self, name: str, interval_s: float, fn: Callable[[], object]):
+        self.name = name
+        self.interval_s = interval_s
+        self.fn = fn
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await run_in_threadpool(self.fn)
+            except Exception:
+                logger.exception("Background job %s failed", self.name)
+
+
+def background_jobs() -> list[PeriodicJob | ReminderScheduler]:
+    jobs = []
+    if REFRESH_COMPACTION_INTERVAL_S > 0:
+        jobs.append(
+            PeriodicJob(
+                "refresh-session-compaction",
+                REFRESH_COMPACTION_INTERVAL_S,
+                compact_refresh_sessions,
+            )
+        )
+    if replica_set is not None:
+        jobs.append(
+            PeriodicJob(
+                "replica-health-check",
+                REPLICA_HEALTH_INTERVAL_S,
+                replica_set.check_health,
+            )
+        )
+    if CATEGORY_STATS_RECONCILE_INTERVAL_S > 0:
+        jobs.append(
+            PeriodicJob(
+                "category-stats-reconcile",
+                CATEGORY_STATS_RECONCILE_INTERVAL_S,
+                repair_category_stats,
+            )
+        )
+    if REMINDER_WINDOW_S > 0:
+        jobs.append(ReminderScheduler(SessionLocal, event_bus))
+    return jobs
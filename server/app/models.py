@@ -2,12 +2,26 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, ForeignKey, String, UniqueConstraint
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+    event,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class UserDB(Base):
     __tablename__ = "users"
 
@@ -35,14 +49,17 @@ class CategoryDB(Base):
     __tablename__ = "categories"
     __table_args__ = (
         UniqueConstraint("user_id", "name", name="uq_category_user_name"),
+        Index("ix_categories_user_id_version", "user_id", "version"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(60), nullable=False)
-
-    user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id"), nullable=False, index=True
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow
     )
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     user: Mapped[UserDB] = relationship(back_populates="categories")
 
     tasks: Mapped[list["TaskDB"]] = relationship(
@@ -53,6 +70,25 @@ class CategoryDB(Base):
 
 class TaskDB(Base):
     __tablename__ = "tasks"
+    # Ownership is denormalized from the category so per-user queries are a
+    # single index range scan instead of a join through categories.
+    __table_args__ = (
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+        Index("ix_tasks_user_id_is_done", "user_id", "is_done"),
+        Index("ix_tasks_user_id_due_at", "user_id", "due_at"),
+        Index(
+            "ix_tasks_user_id_estimated_duration_s", "user_id", "estimated_duration_s"
+        ),
+        Index("ix_tasks_category_id_is_done", "category_id", "is_done"),
+        Index("ix_tasks_user_id_version", "user_id", "version"),
+        # Open tasks by due date across users, for the reminder scheduler.
+        Index(
+            "ix_tasks_open_due_at",
+            "due_at",
+            sqlite_where=text("is_done = 0"),
+            postgresql_where=text("is_done = false"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -62,13 +98,218 @@ class TaskDB(Base):
         nullable=True,
     )
     estimated_duration_s: Mapped[int | None] = mapped_column(nullable=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow
+    )
 
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     category_id: Mapped[int] = mapped_column(
-        ForeignKey("categories.id"), nullable=False, index=True
+        ForeignKey("categories.id"), nullable=False
     )
     category: Mapped[CategoryDB] = relationship(back_populates="tasks")
 
 
+# Full-text index on task names, maintained by the database itself so every
+# write path (ORM, Core bulk inserts, COPY) keeps it current. On SQLite an
+# external-content FTS5 table also indexes user_id, so a search intersects
+# the user's posting list instead of filtering every user's matches.
+TASK_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+        "name, user_id, content='tasks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, name, user_id) "
+        "VALUES (new.id, new.name, new.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, name, user_id) "
+        "VALUES ('delete', old.id, old.name, old.user_id); END",
+        "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF name, user_id "
+        "ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, name, user_id) "
+        "VALUES ('delete', old.id, old.name, old.user_id); "
+        "INSERT INTO tasks_fts(rowid, name, user_id) "
+        "VALUES (new.id, new.name, new.user_id); END",
+    ],
+    "postgresql": [
+        "CREATE INDEX IF NOT EXISTS ix_tasks_name_search ON tasks "
+        "USING gin (to_tsvector('simple', name))",
+    ],
+}
+
+for _dialect, _statements in TASK_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            TaskDB.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect)
+        )
+event.listen(
+    TaskDB.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"),
+)
+
+
+class CategoryStats(Base):
+    """Task counters per category, kept current by the triggers below.
+
+    Overdue counts depend on the clock, so they are counted at read time.
+    """
+
+    __tablename__ = "category_stats"
+
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    open_count: Mapped[int] = mapped_column(nullable=False, server_default=text("0"))
+    done_count: Mapped[int] = mapped_column(nullable=False, server_default=text("0"))
+    estimated_duration_s: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=text("0")
+    )
+    open_estimated_duration_s: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, server_default=text("0")
+    )
+
+
+def _stats_delta(row: str, sign: str) -> str:
+    # Adds (sign "+") or removes (sign "-") one task row's contribution.
+    return (
+        "UPDATE category_stats SET "
+        f"open_count = open_count {sign} CASE WHEN {row}.is_done THEN 0 ELSE 1 END, "
+        f"done_count = done_count {sign} CASE WHEN {row}.is_done THEN 1 ELSE 0 END, "
+        f"estimated_duration_s = estimated_duration_s {sign} "
+        f"COALESCE({row}.estimated_duration_s, 0), "
+        f"open_estimated_duration_s = open_estimated_duration_s {sign} "
+        f"CASE WHEN {row}.is_done THEN 0 ELSE COALESCE({row}.estimated_duration_s, 0) END "
+        f"WHERE category_id = {row}.category_id"
+    )
+
+
+def _stats_columns_changed(is_distinct: str) -> str:
+    return " OR ".join(
+        f"old.{column} {is_distinct} new.{column}"
+        for column in ("is_done", "category_id", "estimated_duration_s")
+    )
+
+
+# Every task write adjusts its category's row in the same statement, so bulk
+# deletes, batch ops and imports (COPY included) need no bookkeeping of
+# their own. Task writes take the user's sync counter first (see
+# app.services.sync), which keeps concurrent updates of one user's rows
+# from deadlocking.
+CATEGORY_STATS_DDL = {
+    "sqlite": [
+        "CREATE TRIGGER IF NOT EXISTS category_stats_ci AFTER INSERT ON categories "
+        "BEGIN INSERT INTO category_stats (category_id) VALUES (new.id); END",
+        # SQLite runs without foreign key enforcement, so no ON DELETE CASCADE.
+        "CREATE TRIGGER IF NOT EXISTS category_stats_cd AFTER DELETE ON categories "
+        "BEGIN DELETE FROM category_stats WHERE category_id = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS category_stats_ti AFTER INSERT ON tasks "
+        f"BEGIN {_stats_delta('new', '+')}; END",
+        "CREATE TRIGGER IF NOT EXISTS category_stats_td AFTER DELETE ON tasks "
+        f"BEGIN {_stats_delta('old', '-')}; END",
+        "CREATE TRIGGER IF NOT EXISTS category_stats_tu "
+        "AFTER UPDATE OF is_done, category_id, estimated_duration_s ON tasks "
+        f"WHEN {_stats_columns_changed('IS NOT')} "
+        f"BEGIN {_stats_delta('old', '-')}; {_stats_delta('new', '+')}; END",
+    ],
+    "postgresql": [
+        "CREATE OR REPLACE FUNCTION category_stats_init() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        "INSERT INTO category_stats (category_id) VALUES (new.id); "
+        "RETURN NULL; END $$",
+        "CREATE OR REPLACE FUNCTION category_stats_apply() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        f"IF TG_OP <> 'INSERT' THEN {_stats_delta('old', '-')}; END IF; "
+        f"IF TG_OP <> 'DELETE' THEN {_stats_delta('new', '+')}; END IF; "
+        "RETURN NULL; END $$",
+        "CREATE OR REPLACE TRIGGER category_stats_ci AFTER INSERT ON categories "
+        "FOR EACH ROW EXECUTE FUNCTION category_stats_init()",
+        "CREATE OR REPLACE TRIGGER category_stats_tw AFTER INSERT OR DELETE ON tasks "
+        "FOR EACH ROW EXECUTE FUNCTION category_stats_apply()",
+        "CREATE OR REPLACE TRIGGER category_stats_tu "
+        "AFTER UPDATE OF is_done, category_id, estimated_duration_s ON tasks "
+        f"FOR EACH ROW WHEN ({_stats_columns_changed('IS DISTINCT FROM')}) "
+        "EXECUTE FUNCTION category_stats_apply()",
+    ],
+}
+CATEGORY_STATS_DROP_DDL = {
+    "sqlite": [
+        f"DROP TRIGGER IF EXISTS {name}"
+        for name in (
+            "category_stats_ci",
+            "category_stats_cd",
+            "category_stats_ti",
+            "category_stats_td",
+            "category_stats_tu",
+        )
+    ],
+    "postgresql": [
+        "DROP FUNCTION IF EXISTS category_stats_init() CASCADE",
+        "DROP FUNCTION IF EXISTS category_stats_apply() CASCADE",
+    ],
+}
+
+# The triggers live on tasks, so that table must exist first.
+CategoryStats.__table__.add_is_dependent_on(TaskDB.__table__)
+for _dialect, _statements in CATEGORY_STATS_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            CategoryStats.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
+for _dialect, _statements in CATEGORY_STATS_DROP_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            CategoryStats.__table__,
+            "before_drop",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
+
+
+# Columns behind TaskRead/CategoryRead. Reads select just these as Core rows
+# and writes hand them back through RETURNING.
+TASK_READ_COLUMNS = (
+    TaskDB.id,
+    TaskDB.name,
+    TaskDB.is_done,
+    TaskDB.category_id,
+    TaskDB.due_at,
+    TaskDB.estimated_duration_s,
+)
+CATEGORY_READ_COLUMNS = (CategoryDB.id, CategoryDB.name)
+
+
+class SyncCounter(Base):
+    """Per-user change counter; every write transaction takes the next value."""
+
+    __tablename__ = "sync_counters"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class SyncTombstone(Base):
+    """A deleted task or category, kept so delta sync can report the delete."""
+
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (Index("ix_sync_tombstones_user_id_version", "user_id", "version"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    entity: Mapped[str] = mapped_column(String(16), nullable=False)
+    entity_id: Mapped[int] = mapped_column(nullable=False)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow
+    )
+
+
 class RefreshSession(Base):
     __tablename__ = "refresh_sessions"
 
@@ -80,6 +321,9 @@ class RefreshSession(Base):
     user: Mapped[UserDB] = relationship(back_populates="refresh_sessions")
 
     jti: Mapped[str] = mapped_column(String(36), unique=True, nullable=False)
+    # Every token descending from one login shares a family; reuse of a rotated
+    # token revokes the whole family.
+    family_id: Mapped[str] = mapped_column(String(36), index=True, nullable=False)
     token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
 
     revoked: Mapped[bool] = mapped_column(nullable=False, default=False, index=True)
@@ -93,3 +337,21 @@ class RefreshSession(Base):
     @staticmethod
     def now() -> datetime:
         return datetime.now(timezone.utc)
+
+
+# Logout and revoke-all only ever touch live sessions of one user.
+Index(
+    "ix_refresh_sessions_user_active",
+    RefreshSession.user_id,
+    RefreshSession.expires_at,
+    postgresql_where=RefreshSession.revoked.is_(False),
+    sqlite_where=RefreshSession.revoked.is_(False),
+)
+# Compaction scans: expired sessions, and revoked ones past retention.
+Index("ix_refresh_sessions_expires_at", RefreshSession.expires_at)
+Index(
+    "ix_refresh_sessions_revoked_at",
+    RefreshSession.revoked_at,
+    postgresql_where=RefreshSession.revoked.is_(True),
+    sqlite_where=RefreshSession.revoked.is_(True),
+)
@@ -0,0 +1,149 @@
+import ipaddress
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from starlette.requests import Request
+
+from app import metrics
+
+LOGIN_USER_BURST = int(os.getenv("LOGIN_USER_BURST", "5"))
+LOGIN_USER_PER_MINUTE = float(os.getenv("LOGIN_USER_PER_MINUTE", "5"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Comma-separated addresses or networks of the reverse proxies in front of
+# the app. Only their X-Forwarded-For is believed.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.getenv("TRUSTED_PROXIES", "").split(",")
+    if entry.strip()
+]
+
+
+def _is_trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str | None:
+    """The address of the client behind any trusted proxies.
+
+    X-Forwarded-For is read right to left, since each proxy appends the
+    address it received the request from; the first untrusted hop is the
+    client. Entries left of it are whatever the client sent and are ignored.
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not _is_trusted(peer):
+        return peer
+    hops = request.headers.get("x-forwarded-for", "").split(",")
+    for hop in reversed([hop.strip() for hop in hops if hop.strip()]):
+        if not _is_trusted(hop):
+            try:
+                return str(ipaddress.ip_address(hop))
+            except ValueError:
+                break
+    return peer
+
+
+class RateLimitStore(ABC):
+    """Token-bucket storage. Implementations may be shared between workers."""
+
+    @abstractmethod
+    def consume(self, key: str, capacity: int, refill_per_s: float) -> float:
+        """Take one token for `key`.
+
+        Returns 0 when the token was granted, otherwise the number of seconds
+        until one becomes available.
+        """
+
+    @abstractmethod
+    def reset(self) -> None: ...
+
+
+class LocalRateLimitStore(RateLimitStore):
+    """In-process buckets; counters are per worker.
+
+    Buckets are kept in least-recently-used order. Each records when it will
+    be full again under its own parameters; full buckets carry no state and
+    are dropped from the cold end as other keys are used. Past `max_keys`,
+    the least recently used bucket goes regardless.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        # key -> (tokens, updated_at, full_at)
+        self._buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, refill_per_s: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            tokens = float(capacity)
+            if bucket is not None:
+                tokens = min(tokens, bucket[0] + (now - bucket[1]) * refill_per_s)
+            granted = tokens >= 1
+            if granted:
+                tokens -= 1
+            if refill_per_s > 0:
+                full_at = now + (capacity - tokens) / refill_per_s
+            else:
+                full_at = math.inf
+            self._buckets[key] = (tokens, now, full_at)
+            self._evict(now)
+            if granted:
+                return 0.0
+            return (1 - tokens) / refill_per_s if refill_per_s > 0 else math.inf
+
+    def _evict(self, now: float) -> None:
+        # A couple per call keeps up with the insert rate at O(1) each.
+        for _ in range(2):
+            oldest = next(iter(self._buckets.values()), None)
+            if oldest is None or oldest[2] > now:
+                break
+            self._buckets.popitem(last=False)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+_rejected_user = metrics.counter("login_throttled_user_total")
+_rejected_ip = metrics.counter("login_throttled_ip_total")
+
+
+class LoginThrottle:
+    """Per-IP and per-username limits checked before any DB or hashing work."""
+
+    def __init__(self, store: RateLimitStore):
+        self.store = store
+
+    def check(self, username: str, client_ip: str | None) -> float:
+        """Return 0 if the attempt may proceed, otherwise a Retry-After in seconds."""
+        if client_ip:
+            wait = self.store.consume(
+                f"login:ip:{client_ip}", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE / 60
+            )
+            if wait:
+                _rejected_ip.inc()
+                return wait
+        wait = self.store.consume(
+            f"login:user:{username.strip().lower()}",
+            LOGIN_USER_BURST,
+            LOGIN_USER_PER_MINUTE / 60,
+        )
+        if wait:
+            _rejected_user.inc()
+        return wait
+
+
+login_throttle = LoginThrottle(LocalRateLimitStore())
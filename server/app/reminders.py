@@ -0,0 +1,232 @@
+"""Reminder events for open tasks as they come due.
+
+Each worker keeps the open tasks due within the next REMINDER_WINDOW_S in a
+min-heap and sends a `reminder` event to the owner's streams when one comes
+due. Only that window is ever read (from ix_tasks_open_due_at), and it is
+reloaded every REMINDER_REFRESH_S. Task writes that reach this worker's bus
+as `sync` events are applied sooner: the writer's upcoming tasks are
+reloaded from ix_tasks_user_id_due_at. The periodic reload covers writes
+the bus never carries here, e.g. from other workers on the local channel,
+so they fire at most REMINDER_REFRESH_S late.
+
+Every worker runs its own scheduler and delivers to its own streams only,
+so each connected client hears a reminder once.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.events import EventBus
+from app.models import TaskDB
+
+logger = logging.getLogger(__name__)
+
+# How far ahead due tasks are loaded; 0 disables the scheduler.
+REMINDER_WINDOW_S = float(os.getenv("REMINDER_WINDOW_S", "3600"))
+# How often the whole window is reloaded; 0 reloads only as the window moves,
+# which is enough when every worker's writes arrive over a shared channel.
+REMINDER_REFRESH_S = float(os.getenv("REMINDER_REFRESH_S", "60"))
+# After a write, wait this long so a burst of writes costs one reload.
+REMINDER_DEBOUNCE_S = float(os.getenv("REMINDER_DEBOUNCE_S", "1"))
+REMINDER_RETRY_S = 30
+
+_sent = metrics.counter("reminders_sent_total")
+_scheduled = metrics.gauge("reminders_scheduled")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class ReminderScheduler:
+    """Min-heap of the open tasks due in the next window, across all users.
+
+    `tick` does the work and is safe to call directly; `start`/`stop` run it
+    on the threadpool whenever the next task comes due, a write arrives or
+    the window is due for a reload. The heap covers due times in
+    (fired_until, loaded_until].
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        bus: EventBus,
+        *,
+        window_s: float = REMINDER_WINDOW_S,
+        refresh_s: float = REMINDER_REFRESH_S,
+        clock: Callable[[], datetime] = _utcnow,
+    ):
+        self.session_factory = session_factory
+        self.bus = bus
+        self.window = timedelta(seconds=window_s)
+        self.refresh = timedelta(seconds=refresh_s)
+        self.clock = clock
+        # (due_at, seq, task_id); an entry is live only while _tasks holds its seq.
+        self._heap: list[tuple[datetime, int, int]] = []
+        self._tasks: dict[int, tuple[int, int, str]] = {}  # id -> (seq, user, name)
+        self._by_user: dict[int, set[int]] = {}
+        self._seq = itertools.count()
+        self._fired_until: datetime | None = None
+        self._loaded_until: datetime | None = None
+        self._refreshed_at: datetime | None = None
+        self._dirty: set[int] = set()
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def on_event(self, user_id: int, payload: dict) -> None:
+        if payload.get("type") != "sync":
+            return
+        with self._lock:
+            self._dirty.add(user_id)
+        if self._loop is not None:
+            with contextlib.suppress(RuntimeError):  # loop already closed
+                self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _load(self, db: Session, *criteria) -> None:
+        # `= false`, not `IS false`: SQLite uses ix_tasks_open_due_at only when
+        # the query repeats the index's own condition.
+        stmt = select(TaskDB.id, TaskDB.user_id, TaskDB.name, TaskDB.due_at).where(
+            TaskDB.is_done == False, *criteria  # noqa: E712
+        )
+        for task_id, user_id, name, due_at in db.execute(stmt):
+            seq = next(self._seq)
+            self._tasks[task_id] = (seq, user_id, name)
+            self._by_user.setdefault(user_id, set()).add(task_id)
+            heapq.heappush(self._heap, (_as_utc(due_at), seq, task_id))
+
+    def _forget(self, task_id: int) -> tuple[int, int, str] | None:
+        entry = self._tasks.pop(task_id, None)
+        if entry is not None:
+            user_tasks = self._by_user[entry[1]]
+            user_tasks.discard(task_id)
+            if not user_tasks:
+                del self._by_user[entry[1]]
+        return entry
+
+    def _next_refresh(self) -> datetime:
+        moved = self._loaded_until - self.window / 2
+        if self.refresh:
+            return min(moved, self._refreshed_at + self.refresh)
+        return moved
+
+    def tick(self) -> datetime:
+        """Load and reload what is needed, fire what is due, and return when
+        to tick next."""
+        now = self.clock()
+        if self._fired_until is None:
+            self._fired_until = now
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+
+        if self._refreshed_at is None or now >= self._next_refresh():
+            # Also catches tasks due by now that no event announced: they are
+            # after fired_until, so they fire on this tick.
+            self._heap.clear()
+            self._tasks.clear()
+            self._by_user.clear()
+            until = now + self.window
+            with self.session_factory() as db:
+                self._load(
+                    db, TaskDB.due_at > self._fired_until, TaskDB.due_at <= until
+                )
+            self._loaded_until = until
+            self._refreshed_at = now
+        elif dirty:
+            with self.session_factory() as db:
+                for user_id in dirty:
+                    for task_id in list(self._by_user.get(user_id, ())):
+                        self._forget(task_id)
+                    self._load(
+                        db,
+                        TaskDB.user_id == user_id,
+                        TaskDB.due_at > self._fired_until,
+                        TaskDB.due_at <= self._loaded_until,
+                    )
+
+        while self._heap:
+            due_at, seq, task_id = self._heap[0]
+            entry = self._tasks.get(task_id)
+            if entry is None or entry[0] != seq:
+                heapq.heappop(self._heap)  # superseded by a reload
+                continue
+            if due_at > now:
+                break
+            heapq.heappop(self._heap)
+            _, user_id, name = self._forget(task_id)
+            self.bus.deliver_local(
+                user_id,
+                {
+                    "type": "reminder",
+                    "task_id": task_id,
+                    "name": name,
+                    "due_at": due_at.isoformat(),
+                },
+            )
+            _sent.inc()
+        self._fired_until = now
+
+        # Reloads leave superseded entries behind; drop them once they dominate.
+        if len(self._heap) > 2 * len(self._tasks) + 64:
+            self._heap = [
+                entry
+                for entry in self._heap
+                if self._tasks.get(entry[2], (None,))[0] == entry[1]
+            ]
+            heapq.heapify(self._heap)
+        _scheduled.set(len(self._tasks))
+
+        next_tick = self._next_refresh()
+        if self._heap:
+            next_tick = min(next_tick, self._heap[0][0])
+        return next_tick
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self.bus.add_listener(self.on_event)
+        self._task = asyncio.create_task(self._run(), name="reminder-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self.bus.remove_listener(self.on_event)
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self._loop = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                next_tick = await run_in_threadpool(self.tick)
+            except Exception:
+                logger.exception("Reminder scheduler tick failed")
+                next_tick = self.clock() + timedelta(seconds=REMINDER_RETRY_S)
+            delay = max((next_tick - self.clock()).total_seconds(), 0)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), delay)
+                # Woken by a write: let the burst settle, but not past a due time.
+                remaining = (next_tick - self.clock()).total_seconds()
+                await asyncio.sleep(max(min(REMINDER_DEBOUNCE_S, remaining), 0))
@@ -0,0 +1,250 @@
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+
+from fastapi import Depends, Request
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import metrics
+from app.auth import domain, get_current_active_user, is_local
+from app.database import SESSION_USER_ID, SessionLocal, create_db_engine, get_db
+from app.principal_cache import Principal
+from app.services import sync as sync_svc
+
+logger = logging.getLogger(__name__)
+
+DATABASE_REPLICA_URLS = [
+    u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()
+]
+# After a write, the user's reads stay on the primary for this long.
+REPLICA_STICKY_S = float(os.getenv("REPLICA_STICKY_S", "5"))
+# A replica that failed is skipped for this long before being tried again.
+REPLICA_RETRY_S = float(os.getenv("REPLICA_RETRY_S", "30"))
+REPLICA_HEALTH_INTERVAL_S = float(os.getenv("REPLICA_HEALTH_INTERVAL_S", "10"))
+
+_replica_reads = metrics.counter("replica_reads_total")
+_primary_reads = metrics.counter("replica_fallback_reads_total")
+_replica_failures = metrics.counter("replica_failures_total")
+
+
+class ReplicaSet:
+    """Round-robin over healthy read replicas with read-your-writes stickiness."""
+
+    def __init__(
+        self,
+        urls: list[str],
+        *,
+        sticky_s: float = REPLICA_STICKY_S,
+        retry_s: float = REPLICA_RETRY_S,
+    ):
+        self.engines = [create_db_engine(u) for u in urls]
+        self._sessionmakers = [
+            sessionmaker(bind=e, autoflush=False, expire_on_commit=False)
+            for e in self.engines
+        ]
+        self.sticky_s = sticky_s
+        self.retry_s = retry_s
+        self._down_until = [0.0] * len(self.engines)
+        self._turn = itertools.count()
+        self._last_write: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark_write(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[user_id] = now
+            if len(self._last_write) > 10_000:
+                cutoff = now - self.sticky_s
+                self._last_write = {
+                    uid: at for uid, at in self._last_write.items() if at > cutoff
+                }
+
+    def is_sticky(self, user_id: int) -> bool:
+        written_at = self._last_write.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_s
+
+    def mark_down(self, index: int) -> None:
+        _replica_failures.inc()
+        self._down_until[index] = time.monotonic() + self.retry_s
+        logger.warning("Read replica %d marked down for %ss", index, self.retry_s)
+
+    def pick(self) -> int | None:
+        now = time.monotonic()
+        count = len(self.engines)
+        start = next(self._turn)
+        for offset in range(count):
+            index = (start + offset) % count
+            if self._down_until[index] <= now:
+                return index
+        return None
+
+    def session(self, index: int) -> Session:
+        return self._sessionmakers[index]()
+
+    def check_health(self) -> None:
+        for index, replica in enumerate(self.engines):
+            try:
+                with replica.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except DBAPIError:
+                self.mark_down(index)
+            else:
+                self._down_until[index] = 0.0
+
+
+_WROTE = "wrote"
+# Carries the user's last written sync version to the client as
+# "<user_id>.<version>"; whichever worker serves its next reads uses a
+# replica only once it has that version. The in-process map only covers
+# this worker.
+STICKY_COOKIE = "last_write"
+# (user_id, version) of the writes committed by the current request.
+_request_writes: ContextVar[list[tuple[int, int]] | None] = ContextVar(
+    "request_writes", default=None
+)
+
+
+def track_writes(session_factory: sessionmaker, replicas: ReplicaSet) -> None:
+    """Pin a user to the primary for a while after each committed write."""
+
+    @event.listens_for(session_factory, "after_flush")
+    def _flag_flush(session, flush_context):
+        session.info[_WROTE] = True
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def _flag_dml(orm_execute_state):
+        if (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        ):
+            orm_execute_state.session.info[_WROTE] = True
+
+    @event.listens_for(session_factory, "after_commit")
+    def _remember_write(session):
+        user_id = session.info.get(SESSION_USER_ID)
+        if session.info.pop(_WROTE, False) and user_id is not None:
+            replicas.mark_write(user_id)
+            version = sync_svc.allocated_version(session, user_id)
+            writes = _request_writes.get()
+            if version is not None and writes is not None:
+                writes.append((user_id, version))
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _forget_write(session):
+        session.info.pop(_WROTE, None)
+
+
+def _sticky_cookie(user_id: int, version: int, max_age: float) -> str:
+    cookie = SimpleCookie()
+    cookie[STICKY_COOKIE] = f"{user_id}.{version}"
+    morsel = cookie[STICKY_COOKIE]
+    morsel["max-age"] = math.ceil(max_age)
+    morsel["path"] = "/"
+    morsel["httponly"] = True
+    morsel["secure"] = not is_local
+    morsel["samesite"] = "lax" if is_local else "none"
+    if not is_local:
+        morsel["domain"] = domain
+    return morsel.OutputString()
+
+
+class StickyWritesMiddleware:
+    """Sets the last-write cookie on responses to requests that committed a write.
+
+    The commit happens before the response starts (get_db is function-scoped),
+    so the cookie can still be added to its headers.
+    """
+
+    def __init__(self, app: ASGIApp, *, sticky_s: float = REPLICA_STICKY_S):
+        self.app = app
+        self.sticky_s = sticky_s
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        writes: list[tuple[int, int]] = []
+        token = _request_writes.set(writes)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes:
+                cookie = _sticky_cookie(*writes[-1], self.sticky_s)
+                MutableHeaders(scope=message).append("set-cookie", cookie)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_writes.reset(token)
+
+
+def _written_version(request: Request, user_id: int) -> int:
+    """The version of the client's last write for `user_id`, or 0."""
+    cookie_user, _, version = request.cookies.get(STICKY_COOKIE, "").partition(".")
+    if cookie_user != str(user_id) or not version.isdigit():
+        return 0
+    return int(version)
+
+
+def caught_up(db: Session, primary: Session, user_id: int, version: int) -> Session:
+    """`db` if it has reached `version` of the user's data, else the primary.
+
+    Collection ETags are read from the primary; a body from a replica that is
+    behind would be cached by the client under a tag it does not match. The
+    version is the one the tag was made from, so this asks only the replica.
+    """
+    if db is primary or sync_svc.current_version(db, user_id) >= version:
+        return db
+    _primary_reads.inc()
+    return primary
+
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS) if DATABASE_REPLICA_URLS else None
+if replica_set is not None:
+    track_writes(SessionLocal, replica_set)
+
+
+def get_read_db(
+    request: Request,
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Session for read-only endpoints: a replica unless the user just wrote."""
+    if replica_set is None:
+        yield db
+        return
+    index = None if replica_set.is_sticky(user.id) else replica_set.pick()
+    replica_db = None if index is None else replica_set.session(index)
+    if replica_db is not None and (written := _written_version(request, user.id)):
+        # The client wrote recently, maybe through another worker: read from
+        # the replica only if it has replayed that write.
+        try:
+            behind = sync_svc.current_version(replica_db, user.id) < written
+        except OperationalError:
+            replica_set.mark_down(index)
+            behind = True
+        if behind:
+            replica_db.close()
+            replica_db = None
+    if replica_db is None:
+        _primary_reads.inc()
+        yield db
+        return
+    _replica_reads.inc()
+    try:
+        yield replica_db
+    except OperationalError:
+        replica_set.mark_down(index)
+        raise
+    finally:
+        replica_db.close()
@@ -0,0 +1,81 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable
+
+RevocationCallback = Callable[[str, float], None]
+
+PRUNE_INTERVAL_S = 60
+
+
+class RevocationChannel(ABC):
+    """Carries revocations between workers. Delivery must be idempotent."""
+
+    @abstractmethod
+    def publish(self, jti: str, expires_at: float) -> None: ...
+
+    @abstractmethod
+    def subscribe(self, callback: RevocationCallback) -> None: ...
+
+
+class LocalRevocationChannel(RevocationChannel):
+    """Delivers revocations to subscribers in this process only."""
+
+    def __init__(self):
+        self._subscribers: list[RevocationCallback] = []
+
+    def publish(self, jti: str, expires_at: float) -> None:
+        for callback in list(self._subscribers):
+            callback(jti, expires_at)
+
+    def subscribe(self, callback: RevocationCallback) -> None:
+        self._subscribers.append(callback)
+
+
+class RevocationList:
+    """Revoked access-token ids, each kept only until the token would expire.
+
+    Lookups are a single dict probe, so the check is safe to run on every
+    authenticated request.
+    """
+
+    def __init__(self, channel: RevocationChannel):
+        self.channel = channel
+        self._revoked: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        channel.subscribe(self._apply)
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        self._apply(jti, expires_at)
+        self.channel.publish(jti, expires_at)
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _apply(self, jti: str, expires_at: float) -> None:
+        now = time.time()
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        if now < self._next_prune:
+            return
+        self._next_prune = now + PRUNE_INTERVAL_S
+        expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+        for jti in expired:
+            del self._revoked[jti]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+access_revocations = RevocationList(LocalRevocationChannel())
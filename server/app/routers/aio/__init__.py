@@ -0,0 +1,5 @@
+from .tasks import task_router
+from .categories import category_router
+from .users import user_router
+
+__all__ = ["task_router", "category_router", "user_router"]
@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import etags
+from app.database import get_async_db
+from app.errors import ForbiddenException, NotFoundException
+from app.principal_cache import Principal
+from app.serialization import json_list
+
+from ...auth import get_current_active_user_async
+from ...schemas import CategoryCreate, CategoryRead, CategoryStatsRead, TaskRead
+from ...services.aio import categories as category_svc
+
+category_router = APIRouter(prefix="/category", tags=["categories"])
+
+
+@category_router.get("/list", response_model=list[CategoryRead])
+async def list_categories(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    if cached := await db.run_sync(
+        lambda sync_db: etags.collection_not_modified(
+            request, response, sync_db, user.id, "categories"
+        )
+    ):
+        return cached
+    return json_list(
+        CategoryRead, await category_svc.list_categories(db, user.id), response
+    )
+
+
+@category_router.get("/stats", response_model=list[CategoryStatsRead])
+async def list_category_stats(
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    # No ETag: overdue counts change with the clock, not just with writes.
+    return json_list(
+        CategoryStatsRead, await category_svc.list_category_stats(db, user.id)
+    )
+
+
+@category_router.post("/create", status_code=201, response_model=CategoryRead)
+async def create_category(
+    category: CategoryCreate,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        created = await category_svc.create_category(
+            db,
+            category_name=category.name,
+            user_id=user.id,
+        )
+    except Exception as e:
+        raise HTTPException(400, str(e))
+    return CategoryRead.model_validate(created)
+
+
+@category_router.patch("/name/{category_id}/{name}", response_model=CategoryRead)
+async def change_category_name(
+    category_id: int,
+    name: str,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        updated = await category_svc.change_category_name(
+            db,
+            category_name=name,
+            category_id=category_id,
+            user_id=user.id,
+        )
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return CategoryRead.model_validate(updated)
+
+
+@category_router.delete("/delete/{category_id}")
+async def delete_category(
+    category_id: int,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        await category_svc.delete_category(db, category_id, user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+
+
+@category_router.get("/tasks/{category_id}", response_model=list[TaskRead])
+async def list_category_tasks(
+    category_id: int,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        tasks = await category_svc.list_category_tasks(db, category_id, user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+    return json_list(TaskRead, tasks)
+
+
+# Only matches integer ids so sync-only /category/* getters registered later still resolve
+@category_router.get("/{category_id:int}", response_model=CategoryRead)
+async def get_category(
+    category_id: int,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        category_db = await category_svc.fetch_category(db, category_id, user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+    return CategoryRead.model_validate(category_db)
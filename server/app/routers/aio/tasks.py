@@ -0,0 +1,190 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import etags
+from app.database import get_async_db
+from app.errors import ForbiddenException, NotFoundException
+from app.principal_cache import Principal
+from app.serialization import json_list
+from app.services.tasks import encode_cursor
+
+from ...services.aio import tasks as task_svc
+from ...services.aio import categories as category_svc
+from ...auth import get_current_active_user_async
+from ...schemas import (
+    Agenda,
+    AgendaQuery,
+    TaskCreate,
+    TaskListQuery,
+    TaskRead,
+    TaskSearchQuery,
+)
+
+task_router = APIRouter(prefix="/task", tags=["tasks"])
+
+
+@task_router.get("/list", response_model=list[TaskRead])
+async def list_tasks(
+    request: Request,
+    response: Response,
+    query: Annotated[TaskListQuery, Query()],
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    if cached := await db.run_sync(
+        lambda sync_db: etags.collection_not_modified(
+            request, response, sync_db, user.id, "tasks"
+        )
+    ):
+        return cached
+    try:
+        tasks = await task_svc.list_tasks(db, user.id, query)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    # A full page means there may be more; the client follows X-Next-Cursor.
+    if query.limit is not None and len(tasks) == query.limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(tasks[-1].id)
+    return json_list(TaskRead, tasks, response)
+
+
+@task_router.get("/list_category_tasks/{category_id}", response_model=list[TaskRead])
+async def list_category_tasks(
+    category_id: int,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    return json_list(
+        TaskRead, await category_svc.list_category_tasks(db, category_id, user.id)
+    )
+
+
+@task_router.get("/agenda", response_model=Agenda)
+async def agenda(
+    query: Annotated[AgendaQuery, Query()],
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    """Open tasks that are overdue, due today and due later, up to `to`."""
+    try:
+        sections = await task_svc.agenda(db, user.id, query)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    # Validate and dump in one pass, as /sync/bootstrap does.
+    agenda = Agenda.model_validate(sections, from_attributes=True)
+    return Response(agenda.model_dump_json(by_alias=True), media_type="application/json")
+
+
+@task_router.get("/search", response_model=list[TaskRead])
+async def search_tasks(
+    query: Annotated[TaskSearchQuery, Query()],
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    """Prefix search over task names, best matches first."""
+    return json_list(TaskRead, await task_svc.search_tasks(db, user.id, query))
+
+
+# Only matches integer ids so sync-only /task/* getters registered later still resolve
+@task_router.get("/{task_id:int}", response_model=TaskRead)
+async def get_task(
+    task_id: int,
+    user: Principal = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+):
+    try:
+        task = await task_svc.fetch_task(db, task_id, user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+    return task
+
+
+@task_router.post("/create", status_code=201, response_model=TaskRead)
+async def create_task(
+    task: TaskCreate,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        created = await task_svc.create_task(db, task, user.id)
+    except Exception as e:
+        raise HTTPException(400, str(e))
+    return created
+
+
+@task_router.delete("/delete/{task_id}")
+async def delete_task(
+    task_id: int,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        await task_svc.delete_task(db, task_id, user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+
+
+@task_router.patch("/is_done/{task_id}/{is_done}", response_model=TaskRead)
+async def change_done(
+    task_id: int,
+    is_done: bool,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        return await task_svc.change_done(db, task_id, is_done, user_id=user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+
+
+@task_router.patch("/name/{task_id}/{name}", response_model=TaskRead)
+async def change_name(
+    task_id: int,
+    name: str,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        return await task_svc.change_name(db, task_id, name, user_id=user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
+
+
+@task_router.delete("/category_done/{category_id}")
+async def delete_category_done(
+    category_id: int,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    await task_svc.delete_category_done(db, category_id, user.id)
+
+
+@task_router.delete("/done")
+async def delete_all_done(
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    await task_svc.delete_all_done(db, user_id=user.id)
+
+
+@task_router.patch("/update", response_model=TaskRead)
+async def task_update(
+    task: TaskRead,
+    db: AsyncSession = Depends(get_async_db, scope="function"),
+    user: Principal = Depends(get_current_active_user_async),
+):
+    try:
+        return await task_svc.update_task(task, db, user.id)
+    except NotFoundException as e:
+        raise HTTPException(404, str(e))
+    except ForbiddenException as e:
+        raise HTTPException(401, str(e))
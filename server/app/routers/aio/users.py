@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from app import etags
+
+from ...auth import get_current_active_user_async
+from ...schemas import UserBase
+
+user_router = APIRouter(prefix="/user", tags=["user"])
+
+
+@user_router.get("", response_model=UserBase)
+async def read_me(
+    request: Request, response: Response, user=Depends(get_current_active_user_async)
+):
+    if not user:
+        raise HTTPException(400, "User is not logged in.")
+    etag = etags.make_etag("user", user.id, user.username, user.email)
+    if cached := etags.not_modified(request, response, etag):
+        return cached
+    return UserBase.model_validate(user)
+
+
+@user_router.get("/username")
+async def get_username(user=Depends(get_current_active_user_async)):
+    if not user:
+        raise HTTPException(400, "User is not logged in.")
+    return user.username
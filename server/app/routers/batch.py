@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.principal_cache import Principal
+
+from ..auth import get_current_active_user
+from ..schemas import BatchRequest, BatchResponse
+from ..services import batch as batch_svc
+
+batch_router = APIRouter(tags=["batch"])
+
+
+@batch_router.post("/batch", response_model=BatchResponse)
+def apply_batch(
+    batch: BatchRequest,
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Apply queued task/category operations in order, in one transaction.
+
+    Each op gets its own result; a failed op is rolled back on its own and
+    does not stop the ones after it. `idMap` maps client temp ids to new ids.
+    """
+    return batch_svc.apply_batch(db, batch.ops, user.id)
@@ -1,33 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
+from app import etags
 from app.database import get_db
 from app.errors import ForbiddenException, NotFoundException
-from app.models import UserDB
+from app.principal_cache import Principal
+from app.serialization import json_list
+from app.replicas import caught_up, get_read_db
 
 from ..auth import get_current_active_user
-from ..schemas import CategoryCreate, CategoryRead, TaskRead
+from ..schemas import CategoryCreate, CategoryRead, CategoryStatsRead, TaskRead
 from ..services import categories as category_svc
+from ..services import sync as sync_svc
 
 category_router = APIRouter(prefix="/category", tags=["categories"])
 
 
 @category_router.get("/list", response_model=list[CategoryRead])
 def list_categories(
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db, scope="function"),
+    primary: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
-    return [
-        CategoryRead.model_validate(c)
-        for c in category_svc.list_categories(db, user.id)
-    ]
+    version = sync_svc.current_version(primary, user.id)
+    if cached := etags.version_not_modified(
+        request, response, user.id, "categories", version
+    ):
+        return cached
+    db = caught_up(db, primary, user.id, version)
+    return json_list(
+        CategoryRead, category_svc.list_categories(db, user.id), response
+    )
+
+
+@category_router.get("/stats", response_model=list[CategoryStatsRead])
+def list_category_stats(
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    # No ETag: overdue counts change with the clock, not just with writes.
+    return json_list(
+        CategoryStatsRead, category_svc.list_category_stats(db, user.id)
+    )
 
 
 @category_router.post("/create", status_code=201, response_model=CategoryRead)
 def create_category(
     category: CategoryCreate,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         created = category_svc.create_category(
@@ -44,8 +67,8 @@ def create_category(
 def change_category_name(
     category_id: int,
     name: str,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         updated = category_svc.change_category_name(
@@ -58,14 +81,16 @@ def change_category_name(
         raise HTTPException(404, str(e))
     except ForbiddenException as e:
         raise HTTPException(401, str(e))
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     return CategoryRead.model_validate(updated)
 
 
 @category_router.delete("/delete/{category_id}")
 def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         category_svc.delete_category(db, category_id, user.id)
@@ -78,8 +103,8 @@ def delete_category(
 @category_router.get("/tasks/{category_id}", response_model=list[TaskRead])
 def list_category_tasks(
     category_id: int,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         tasks = category_svc.list_category_tasks(db, category_id, user.id)
@@ -87,15 +112,15 @@ def list_category_tasks(
         raise HTTPException(404, str(e))
     except ForbiddenException as e:
         raise HTTPException(401, str(e))
-    return [TaskRead.model_validate(t) for t in tasks]
+    return json_list(TaskRead, tasks)
 
 
 # Put only after all of the other getters for /category
 @category_router.get("/{category_id}", response_model=CategoryRead)
 def get_category(
     category_id: int,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         category_db = category_svc.fetch_category(db, category_id, user.id)
@@ -0,0 +1,49 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import events
+from app.database import get_db
+from app.principal_cache import Principal
+
+from ..auth import get_current_active_user
+from ..services import sync as sync_svc
+
+events_router = APIRouter(tags=["events"])
+
+
+@events_router.get("/events")
+async def stream_events(
+    last_event_id: Annotated[int | None, Header()] = None,
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Server-Sent Events announcing the user's committed changes.
+
+    Each `sync` event carries the new version; pull /sync/changes from your
+    cursor when one arrives. Open the stream before the first pull so no
+    change falls in between. An `overflow` event ends a stream that fell too
+    far behind; reconnect and pull.
+    """
+    # The request session is closed before the body is sent; catching up
+    # after a reconnect reads through a short session of its own.
+    bind = db.get_bind()
+
+    def catch_up() -> dict | None:
+        with Session(bind) as session:
+            version = sync_svc.current_version(session, user.id)
+        if version > last_event_id:
+            return {"type": "sync", "version": version}
+        return None
+
+    return StreamingResponse(
+        events.stream(
+            events.event_bus,
+            user.id,
+            catch_up if last_event_id is not None else None,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
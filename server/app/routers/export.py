@@ -0,0 +1,47 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.principal_cache import Principal
+
+from ..auth import get_current_active_user
+from ..services import export as export_svc
+
+export_router = APIRouter(tags=["export"])
+
+
+@export_router.get("/export")
+def export_data(
+    format: Literal["ndjson", "csv"] = export_svc.NDJSON,
+    cursor: str | None = None,
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Stream all of the user's categories, then tasks.
+
+    NDJSON output carries a `cursor` line after every chunk; pass the last
+    one back as `cursor` to resume an interrupted export.
+    """
+    if cursor is not None:
+        try:
+            export_svc.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+    # The stream opens its own short sessions per chunk; the request session
+    # is closed before the body is sent.
+    bind = db.get_bind()
+    rows = (
+        export_svc.iter_csv(bind, user.id, cursor)
+        if format == export_svc.CSV
+        else export_svc.iter_ndjson(bind, user.id, cursor)
+    )
+    return StreamingResponse(
+        rows,
+        media_type=export_svc.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="vitask-export.{format}"'
+        },
+    )
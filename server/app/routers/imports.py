@@ -0,0 +1,53 @@
+import io
+import os
+import tempfile
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.principal_cache import Principal
+
+from ..auth import get_current_active_user
+from ..schemas import ImportReport
+from ..services import importer as import_svc
+
+# Uploads larger than this spill from memory to a temporary file.
+IMPORT_SPOOL_MAX_MEMORY = 1024 * 1024
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+
+import_router = APIRouter(tags=["import"])
+
+
+@import_router.post("/import", response_model=ImportReport)
+async def import_data(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    on_duplicate: import_svc.OnDuplicate = "merge",
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Import categories and tasks from an NDJSON or CSV request body.
+
+    Accepts the format GET /export produces. Invalid records are skipped and
+    listed in the report; everything else is committed together.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_MEMORY) as spool:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > IMPORT_MAX_BYTES:
+                raise HTTPException(413, "Import file is too large.")
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        try:
+            return await run_in_threadpool(
+                import_svc.import_stream, db, user.id, stream, format, on_duplicate
+            )
+        except UnicodeDecodeError:
+            raise HTTPException(400, "Import file must be UTF-8.")
+        finally:
+            stream.detach()
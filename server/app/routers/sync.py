@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+
+from app.principal_cache import Principal
+from app.replicas import get_read_db
+
+from ..auth import get_current_active_user
+from ..schemas import SyncBootstrap, SyncChanges
+from ..services import sync as sync_svc
+
+sync_router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@sync_router.get("/changes", response_model=SyncChanges)
+def list_changes(
+    since: int | None = None,
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Tasks and categories changed after `since`, plus deletes.
+
+    Omit `since` for the full state; pass the returned `cursor` next time.
+    """
+    return sync_svc.changes_since(db, user.id, since)
+
+
+@sync_router.get("/bootstrap", response_model=SyncBootstrap)
+def bootstrap(
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Everything a client needs at startup, read as one consistent snapshot.
+
+    Continue with /sync/changes?since=<cursor> afterwards.
+    """
+    snapshot = sync_svc.bootstrap(db, user.id)
+    snapshot["user"] = {"username": user.username, "email": user.email}
+    # Validate and dump in one pass; the task list can be large.
+    body = SyncBootstrap.model_validate(snapshot).model_dump_json(by_alias=True)
+    return Response(body, media_type="application/json")
@@ -1,42 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
+from app import etags
 from app.database import get_db
 from app.errors import ForbiddenException, NotFoundException
-from app.models import UserDB
+from app.principal_cache import Principal
+from app.serialization import json_list
+from app.replicas import caught_up, get_read_db
 
+from ..services import sync as sync_svc
 from ..services import tasks as task_svc
 from ..services import categories as category_svc
 from ..auth import get_current_active_user
-from ..schemas import TaskCreate, TaskRead
+from ..schemas import (
+    Agenda,
+    AgendaQuery,
+    TaskCreate,
+    TaskListQuery,
+    TaskRead,
+    TaskSearchQuery,
+)
 
 task_router = APIRouter(prefix="/task", tags=["tasks"])
 
 
 @task_router.get("/list", response_model=list[TaskRead])
 def list_tasks(
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    request: Request,
+    response: Response,
+    query: Annotated[TaskListQuery, Query()],
+    db: Session = Depends(get_read_db, scope="function"),
+    primary: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
-    return task_svc.list_tasks(db, user.id)
+    version = sync_svc.current_version(primary, user.id)
+    if cached := etags.version_not_modified(
+        request, response, user.id, "tasks", version
+    ):
+        return cached
+    db = caught_up(db, primary, user.id, version)
+    try:
+        tasks = task_svc.list_tasks(db, user.id, query)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    # A full page means there may be more; the client follows X-Next-Cursor.
+    if query.limit is not None and len(tasks) == query.limit:
+        response.headers["X-Next-Cursor"] = task_svc.encode_cursor(tasks[-1].id)
+    return json_list(TaskRead, tasks, response)
 
 
 @task_router.get("/list_category_tasks/{category_id}", response_model=list[TaskRead])
 def list_category_tasks(
     category_id: int,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    return json_list(
+        TaskRead, category_svc.list_category_tasks(db, category_id, user.id)
+    )
+
+
+@task_router.get("/agenda", response_model=Agenda)
+def agenda(
+    query: Annotated[AgendaQuery, Query()],
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
-    return [
-        TaskRead.model_validate(t)
-        for t in category_svc.list_category_tasks(db, category_id, user.id)
-    ]
+    """Open tasks that are overdue, due today and due later, up to `to`."""
+    try:
+        sections = task_svc.agenda(db, user.id, query)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    # Validate and dump in one pass, as /sync/bootstrap does.
+    agenda = Agenda.model_validate(sections, from_attributes=True)
+    return Response(agenda.model_dump_json(by_alias=True), media_type="application/json")
+
+
+@task_router.get("/search", response_model=list[TaskRead])
+def search_tasks(
+    query: Annotated[TaskSearchQuery, Query()],
+    db: Session = Depends(get_read_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
+):
+    """Prefix search over task names, best matches first."""
+    return json_list(TaskRead, task_svc.search_tasks(db, user.id, query))
 
 
 # Put only after all of the other getters for /task
 @task_router.get("/{task_id}", response_model=TaskRead)
 def get_task(
-    task_id: int, user=Depends(get_current_active_user), db: Session = Depends(get_db)
+    task_id: int,
+    user=Depends(get_current_active_user),
+    db: Session = Depends(get_read_db, scope="function"),
 ):
     try:
         task = task_svc.fetch_task(db, task_id, user.id)
@@ -50,8 +107,8 @@ def get_task(
 @task_router.post("/create", status_code=201, response_model=TaskRead)
 def create_task(
     task: TaskCreate,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         created = task_svc.create_task(db, task, user.id)
@@ -63,8 +120,8 @@ def create_task(
 @task_router.delete("/delete/{task_id}")
 def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         task_svc.delete_task(db, task_id, user.id)
@@ -78,8 +135,8 @@ def delete_task(
 def change_done(
     task_id: int,
     is_done: bool,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         return task_svc.change_done(db, task_id, is_done, user_id=user.id)
@@ -93,8 +150,8 @@ def change_done(
 def change_name(
     task_id: int,
     name: str,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         return task_svc.change_name(db, task_id, name, user_id=user.id)
@@ -107,15 +164,16 @@ def change_name(
 @task_router.delete("/category_done/{category_id}")
 def delete_category_done(
     category_id: int,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     task_svc.delete_category_done(db, category_id, user.id)
 
 
 @task_router.delete("/done")
 def delete_all_done(
-    db: Session = Depends(get_db), user: UserDB = Depends(get_current_active_user)
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     task_svc.delete_all_done(db, user_id=user.id)
 
@@ -123,8 +181,8 @@ def delete_all_done(
 @task_router.patch("/update", response_model=TaskRead)
 def task_update(
     task: TaskRead,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_active_user),
+    db: Session = Depends(get_db, scope="function"),
+    user: Principal = Depends(get_current_active_user),
 ):
     try:
         return task_svc.update_task(task, db, user.id)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from app import etags
 
 from ..auth import get_current_active_user
 from ..schemas import UserBase
@@ -7,9 +9,16 @@ user_router = APIRouter(prefix="/user", tags=["user"])
 
 
 @user_router.get("", response_model=UserBase)
-def read_me(user=Depends(get_current_active_user)):
+def read_me(
+    request: Request, response: Response, user=Depends(get_current_active_user)
+):
     if not user:
         raise HTTPException(400, "User is not logged in.")
+    # The profile comes from the principal cache, so the tag is derived from
+    # its contents rather than from a database version.
+    etag = etags.make_etag("user", user.id, user.username, user.email)
+    if cached := etags.not_modified(request, response, etag):
+        return cached
     return UserBase.model_validate(user)
 
 
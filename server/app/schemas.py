@@ -1,4 +1,17 @@
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
+from datetime import datetime, timezone
+from typing import Annotated, Literal
+
+from pydantic import AfterValidator, BaseModel, Field, EmailStr, ConfigDict
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Stored in UTC; SQLite hands datetimes back without a timezone.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+UTCDatetime = Annotated[datetime, AfterValidator(_as_utc)]
 
 
 class UserBase(BaseModel):
@@ -30,6 +43,8 @@ class TaskCreate(BaseModel):
     name: str
     is_done: bool = Field(alias="isDone")
     category_id: int | None = Field(None, alias="categoryId")
+    due_at: UTCDatetime | None = Field(None, alias="dueAt")
+    estimated_duration_s: int | None = Field(None, ge=0, alias="estimatedDurationS")
 
     model_config = ConfigDict(validate_by_name=True, from_attributes=True)
 
@@ -37,3 +52,215 @@ class TaskCreate(BaseModel):
 class TaskRead(TaskCreate):
     id: int
     category_id: int = Field(alias="categoryId")
+
+
+class CategorySummary(CategoryRead):
+    open_count: int = Field(alias="openCount")
+    done_count: int = Field(alias="doneCount")
+
+    model_config = ConfigDict(validate_by_name=True)
+
+
+class CategoryStatsRead(CategorySummary):
+    # Open tasks whose due date has passed.
+    overdue_count: int = Field(alias="overdueCount")
+    estimated_duration_s: int = Field(alias="estimatedDurationS")
+    # The part of estimatedDurationS still to do.
+    open_estimated_duration_s: int = Field(alias="openEstimatedDurationS")
+
+
+class SyncBootstrap(BaseModel):
+    user: UserBase
+    categories: list[CategorySummary]
+    tasks: list[TaskRead]
+    # Pass to /sync/changes as `since` to continue from this snapshot.
+    cursor: int
+
+
+TASK_LIST_MAX_LIMIT = 1000
+
+
+class TaskListQuery(BaseModel):
+    """Query parameters of /task/list. With no limit every matching task is returned."""
+
+    limit: int | None = Field(None, ge=1, le=TASK_LIST_MAX_LIMIT)
+    cursor: str | None = None
+    is_done: bool | None = None
+    category_id: int | None = None
+    due_before: UTCDatetime | None = None
+    due_after: UTCDatetime | None = None
+    has_estimate: bool | None = None
+
+
+AGENDA_MAX_LIMIT = 1000
+
+
+class AgendaQuery(BaseModel):
+    """Query parameters of /task/agenda.
+
+    `from` should be the start of the client's local today; `to` defaults to
+    a week after it. `limit` applies to each section.
+    """
+
+    from_: UTCDatetime | None = Field(None, alias="from")
+    to: UTCDatetime | None = None
+    limit: int = Field(200, ge=1, le=AGENDA_MAX_LIMIT)
+
+    model_config = ConfigDict(validate_by_name=True)
+
+
+class Agenda(BaseModel):
+    """Open tasks due before `from`, on the day from `from`, and up to `to`."""
+
+    overdue: list[TaskRead]
+    today: list[TaskRead]
+    upcoming: list[TaskRead]
+
+
+TASK_SEARCH_MAX_LIMIT = 100
+
+
+class TaskSearchQuery(BaseModel):
+    """Query parameters of /task/search. Every word of `q` must prefix-match."""
+
+    q: str = Field(min_length=1, max_length=200)
+    limit: int = Field(20, ge=1, le=TASK_SEARCH_MAX_LIMIT)
+
+
+class SyncChanges(BaseModel):
+    cursor: int
+    tasks: list[TaskRead]
+    categories: list[CategoryRead]
+    deleted_tasks: list[int] = Field(alias="deletedTasks")
+    deleted_categories: list[int] = Field(alias="deletedCategories")
+
+    model_config = ConfigDict(validate_by_name=True)
+
+
+# Batch operations mirror the single-item routes. `id` and `categoryId` take
+# either a server id or the `tempId` of an entity created earlier in the batch.
+Ref = int | str
+
+BATCH_MAX_OPS = 500
+
+
+class BatchOp(BaseModel):
+    model_config = ConfigDict(validate_by_name=True)
+
+
+class TaskCreateOp(BatchOp):
+    op: Literal["task.create"]
+    temp_id: str | None = Field(None, alias="tempId")
+    name: str = Field(max_length=255)
+    is_done: bool = Field(False, alias="isDone")
+    category_id: Ref | None = Field(None, alias="categoryId")
+    due_at: UTCDatetime | None = Field(None, alias="dueAt")
+    estimated_duration_s: int | None = Field(None, ge=0, alias="estimatedDurationS")
+
+
+class TaskUpdateOp(BatchOp):
+    op: Literal["task.update"]
+    id: Ref
+    name: str = Field(max_length=255)
+    is_done: bool = Field(alias="isDone")
+    category_id: Ref = Field(alias="categoryId")
+    # Left unchanged when omitted.
+    due_at: UTCDatetime | None = Field(None, alias="dueAt")
+    estimated_duration_s: int | None = Field(None, ge=0, alias="estimatedDurationS")
+
+
+class TaskToggleOp(BatchOp):
+    op: Literal["task.toggle"]
+    id: Ref
+    is_done: bool = Field(alias="isDone")
+
+
+class TaskRenameOp(BatchOp):
+    op: Literal["task.rename"]
+    id: Ref
+    name: str = Field(max_length=255)
+
+
+class TaskDeleteOp(BatchOp):
+    op: Literal["task.delete"]
+    id: Ref
+
+
+class CategoryCreateOp(BatchOp):
+    op: Literal["category.create"]
+    temp_id: str | None = Field(None, alias="tempId")
+    name: str = Field(max_length=60)
+
+
+class CategoryRenameOp(BatchOp):
+    op: Literal["category.rename"]
+    id: Ref
+    name: str = Field(max_length=60)
+
+
+class CategoryDeleteOp(BatchOp):
+    op: Literal["category.delete"]
+    id: Ref
+
+
+BatchOperation = Annotated[
+    TaskCreateOp
+    | TaskUpdateOp
+    | TaskToggleOp
+    | TaskRenameOp
+    | TaskDeleteOp
+    | CategoryCreateOp
+    | CategoryRenameOp
+    | CategoryDeleteOp,
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    ops: list[BatchOperation] = Field(max_length=BATCH_MAX_OPS)
+
+
+class BatchResult(BaseModel):
+    status: int
+    id: int | None = None
+    task: TaskRead | None = None
+    category: CategoryRead | None = None
+    error: str | None = None
+
+
+class BatchResponse(BaseModel):
+    results: list[BatchResult]
+    id_map: dict[str, int] = Field(alias="idMap")
+
+    model_config = ConfigDict(validate_by_name=True)
+
+
+# Records accepted by POST /import; the same shape GET /export produces.
+class ImportCategoryRecord(BaseModel):
+    id: int | None = None
+    name: str = Field(min_length=1, max_length=60)
+
+
+class ImportTaskRecord(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    is_done: bool = False
+    # Either the `id` of a category record in the same file, or a category name.
+    category_id: int | None = None
+    category: str | None = Field(None, min_length=1, max_length=60)
+    due_at: UTCDatetime | None = None
+    estimated_duration_s: int | None = Field(None, ge=0)
+
+
+class ImportIssue(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    categories_created: int = 0
+    categories_merged: int = 0
+    categories_renamed: int = 0
+    categories_skipped: int = 0
+    tasks_imported: int = 0
+    tasks_skipped: int = 0
+    errors: list[ImportIssue] = []
@@ -1,11 +1,109 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
 from pwdlib import PasswordHash
 
+from app import metrics
+from app.errors import OverloadedException
+
 ph = PasswordHash.recommended()
 
+# 0 hashes inline on the calling thread (useful for tests and tiny deployments).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hash jobs allowed in flight (running + queued) before new ones are rejected.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+PASSWORD_HASH_TIMEOUT_S = float(os.getenv("PASSWORD_HASH_TIMEOUT_S", "10"))
+PASSWORD_HASH_RETRY_AFTER_S = 1
 
-def verify_password(plain: str, hashed: str) -> bool:
+_pending = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+_in_flight = metrics.gauge("password_hash_in_flight")
+_rejected = metrics.counter("password_hash_rejected_total")
+_failed = metrics.counter("password_hash_failed_total")
+_latency = metrics.summary("password_hash_seconds")
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_hash_executor(broken: ProcessPoolExecutor | None = None) -> None:
+    """Shut the pool down; with `broken`, only if it is still that pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None and broken in (None, _executor):
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _verify(plain: str, hashed: str) -> bool:
     return ph.verify(plain, hashed)
 
 
-def get_password_hash(password: str) -> str:
+def _hash(password: str) -> str:
     return ph.hash(password)
+
+
+def _release(_future: Future | None = None) -> None:
+    _in_flight.dec()
+    _pending.release()
+
+
+def _run(fn, *args):
+    if not _pending.acquire(blocking=False):
+        _rejected.inc()
+        raise OverloadedException("Too many password operations in flight.")
+    _in_flight.inc()
+    started = time.perf_counter()
+    if PASSWORD_HASH_WORKERS <= 0:
+        try:
+            return fn(*args)
+        finally:
+            _latency.observe(time.perf_counter() - started)
+            _release()
+
+    executor = _get_executor()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        _release()
+        _failed.inc()
+        shutdown_hash_executor(executor)
+        raise OverloadedException("Password hashing is restarting.")
+    # The slot is held until the job is done, not until we stop waiting, so a
+    # timed-out job still counts against PASSWORD_HASH_MAX_PENDING.
+    future.add_done_callback(_release)
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT_S)
+    except FutureTimeoutError:
+        _failed.inc()
+        raise OverloadedException("Password operation timed out.")
+    except BrokenProcessPool:
+        # A worker died; every later job on this pool would fail too.
+        _failed.inc()
+        shutdown_hash_executor(executor)
+        raise OverloadedException("Password hashing is restarting.")
+    finally:
+        _latency.observe(time.perf_counter() - started)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _run(_verify, plain, hashed)
+
+
+def get_password_hash(password: str) -> str:
+    return _run(_hash, password)
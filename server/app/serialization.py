@@ -0,0 +1,49 @@
+"""One-pass JSON responses for list endpoints.
+
+Returning a list from a route makes FastAPI validate it against
+`response_model` and then serialize it. For lists built from Core rows that
+is wasted work: a cached `TypeAdapter` validates the rows once and dumps
+them inside pydantic-core, and the bytes go straight into the response.
+Routes keep their `response_model` for the OpenAPI schema.
+"""
+from functools import cache
+from typing import Iterable
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Row
+
+
+@cache
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def _as_dicts(rows: Iterable) -> list:
+    rows = list(rows)
+    if rows and isinstance(rows[0], Row):
+        # Attribute access on Row is slow enough to dominate validation;
+        # plain dicts keyed by column name validate several times faster.
+        fields = rows[0]._fields
+        return [dict(zip(fields, row)) for row in rows]
+    return rows
+
+
+def dump_list(model: type[BaseModel], rows: Iterable) -> bytes:
+    adapter = _list_adapter(model)
+    items = adapter.validate_python(_as_dicts(rows), from_attributes=True)
+    return adapter.dump_json(items, by_alias=True)
+
+
+def json_list(
+    model: type[BaseModel], rows: Iterable, response: Response | None = None
+) -> Response:
+    """A JSON array of `model` built from `rows`.
+
+    Headers already set on the route's injected `response` (ETag, cursors)
+    are carried over, since FastAPI ignores them once a Response is returned.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return Response(
+        dump_list(model, rows), media_type="application/json", headers=headers
+    )
@@ -0,0 +1,49 @@
+"""Async counterparts of `app.services.categories` (see `app.services.aio.tasks`)."""
+from typing import Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CategoryDB
+from app.schemas import CategoryRead
+from app.services import categories as category_svc
+
+
+async def list_categories(db: AsyncSession, user_id: int) -> Sequence[Row]:
+    return await db.run_sync(category_svc.list_categories, user_id)
+
+
+async def list_category_stats(db: AsyncSession, user_id: int) -> Sequence[Row]:
+    return await db.run_sync(category_svc.list_category_stats, user_id)
+
+
+async def fetch_category(db: AsyncSession, category_id: int, user_id: int) -> CategoryDB:
+    return await db.run_sync(category_svc.fetch_category, category_id, user_id)
+
+
+async def create_category(
+    db: AsyncSession, *, category_name: str, user_id: int
+) -> CategoryRead:
+    return await db.run_sync(
+        lambda s: category_svc.create_category(
+            s, category_name=category_name, user_id=user_id
+        )
+    )
+
+
+async def delete_category(db: AsyncSession, category_id: int, user_id: int) -> None:
+    await db.run_sync(category_svc.delete_category, category_id, user_id)
+
+
+async def change_category_name(
+    db: AsyncSession, category_name: str, category_id: int, user_id: int
+) -> CategoryRead:
+    return await db.run_sync(
+        category_svc.change_category_name, category_name, category_id, user_id
+    )
+
+
+async def list_category_tasks(
+    db: AsyncSession, category_id: int, user_id: int
+) -> Sequence[Row]:
+    return await db.run_sync(category_svc.list_category_tasks, category_id, user_id)
@@ -0,0 +1,71 @@
+"""Async counterparts of `app.services.tasks`.
+
+Each function runs the sync implementation through `AsyncSession.run_sync`,
+so the queries are identical in both modes while I/O goes through the async
+driver.
+"""
+from typing import Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas import (
+    AgendaQuery,
+    TaskCreate,
+    TaskListQuery,
+    TaskRead,
+    TaskSearchQuery,
+)
+from app.services import tasks as task_svc
+
+
+async def fetch_task(db: AsyncSession, task_id: int, user_id: int) -> TaskRead:
+    return await db.run_sync(task_svc.fetch_task, task_id, user_id)
+
+
+async def list_tasks(
+    db: AsyncSession, user_id: int, query: TaskListQuery | None = None
+) -> Sequence[Row]:
+    return await db.run_sync(task_svc.list_tasks, user_id, query)
+
+
+async def agenda(
+    db: AsyncSession, user_id: int, query: AgendaQuery
+) -> dict[str, Sequence[Row]]:
+    return await db.run_sync(task_svc.agenda, user_id, query)
+
+
+async def search_tasks(
+    db: AsyncSession, user_id: int, query: TaskSearchQuery
+) -> Sequence[Row]:
+    return await db.run_sync(task_svc.search_tasks, user_id, query)
+
+
+async def create_task(db: AsyncSession, task: TaskCreate, user_id: int) -> TaskRead:
+    return await db.run_sync(task_svc.create_task, task, user_id)
+
+
+async def delete_task(db: AsyncSession, task_id: int, user_id: int) -> None:
+    await db.run_sync(task_svc.delete_task, task_id, user_id)
+
+
+async def delete_all_done(db: AsyncSession, user_id: int) -> None:
+    await db.run_sync(task_svc.delete_all_done, user_id)
+
+
+async def delete_category_done(db: AsyncSession, category_id: int, user_id: int):
+    await db.run_sync(task_svc.delete_category_done, category_id, user_id)
+
+
+async def change_done(
+    db: AsyncSession, task_id: int, is_done: bool, user_id: int
+) -> TaskRead:
+    return await db.run_sync(task_svc.change_done, task_id, is_done, user_id)
+
+
+async def change_name(db: AsyncSession, task_id: int, name: str, user_id: int) -> TaskRead:
+    return await db.run_sync(task_svc.change_name, task_id, name, user_id)
+
+
+async def update_task(task: TaskRead, db: AsyncSession, user_id: int) -> TaskRead:
+    return await db.run_sync(lambda s: task_svc.update_task(task, s, user_id))
@@ -0,0 +1,34 @@
+"""Async counterparts of `app.services.users` (see `app.services.aio.tasks`)."""
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import UserDB
+from app.schemas import UserCreate, UserRead
+from app.security import get_password_hash
+from app.services import users as user_svc
+
+
+async def get_user(db: AsyncSession, user_id: int) -> UserDB:
+    return await db.run_sync(user_svc.get_user, user_id)
+
+
+async def get_user_by_username(db: AsyncSession, username: str) -> UserDB:
+    return await db.run_sync(user_svc.get_user_by_username, username)
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> UserDB | None:
+    return await db.run_sync(user_svc.get_user_by_email, email)
+
+
+async def create_user(db: AsyncSession, user_in: UserCreate) -> UserRead:
+    # Hash off the event loop; only the insert runs on the session.
+    password_hash = await run_in_threadpool(get_password_hash, user_in.password)
+    return await db.run_sync(user_svc.insert_user, user_in, password_hash)
+
+
+async def delete_user(db: AsyncSession, userid: int):
+    return await db.run_sync(user_svc.delete_user, userid)
+
+
+async def patch_user(db: AsyncSession, user: UserRead):
+    return await db.run_sync(user_svc.patch_user, user)
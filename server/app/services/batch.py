@@ -0,0 +1,187 @@
+"""Apply a client's queued task/category edits in one transaction.
+
+Ownership of every server id in the batch is resolved up front with one
+query per entity type, so failing ops cost no statements at all. Each op
+then runs the regular service function inside its own savepoint: a failing
+op is rolled back and reported while the rest of the batch still commits.
+"""
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.errors import ForbiddenException, NotFoundException
+from app.models import CategoryDB, TaskDB
+from app.schemas import (
+    BatchOp,
+    BatchResponse,
+    BatchResult,
+    CategoryCreateOp,
+    CategoryDeleteOp,
+    CategoryRenameOp,
+    Ref,
+    TaskCreate,
+    TaskCreateOp,
+    TaskDeleteOp,
+    TaskRead,
+    TaskRenameOp,
+    TaskToggleOp,
+    TaskUpdateOp,
+)
+from app.services import categories as category_svc
+from app.services import sync as sync_svc
+from app.services import tasks as task_svc
+
+_TASK_OPS = (TaskUpdateOp, TaskToggleOp, TaskRenameOp, TaskDeleteOp)
+_CATEGORY_OPS = (CategoryRenameOp, CategoryDeleteOp)
+
+
+class _Owners:
+    """Owner ids of the tasks and categories a batch refers to."""
+
+    def __init__(self, db: Session, ops: list[BatchOp]):
+        task_ids = {op.id for op in ops if isinstance(op, _TASK_OPS)}
+        category_ids = {op.id for op in ops if isinstance(op, _CATEGORY_OPS)}
+        category_ids |= {
+            op.category_id
+            for op in ops
+            if isinstance(op, (TaskCreateOp, TaskUpdateOp))
+        }
+        self.tasks = self._load(db, TaskDB, task_ids)
+        self.categories = self._load(db, CategoryDB, category_ids)
+
+    @staticmethod
+    def _load(db: Session, model, refs: set) -> dict[int, int]:
+        ids = [ref for ref in refs if isinstance(ref, int)]
+        if not ids:
+            return {}
+        rows = db.execute(select(model.id, model.user_id).where(model.id.in_(ids)))
+        return dict(rows.all())
+
+
+def _check(owners: dict[int, int], entity_id: int, user_id: int, kind: str) -> None:
+    if entity_id not in owners:
+        raise NotFoundException(f"{kind} not found.")
+    if owners[entity_id] != user_id:
+        raise ForbiddenException(f"You have no right to access this {kind.lower()}.")
+
+
+class _Batch:
+    def __init__(self, db: Session, ops: list[BatchOp], user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.owners = _Owners(db, ops)
+        self.id_map: dict[str, int] = {}
+
+    def _resolve(self, ref: Ref) -> int:
+        if isinstance(ref, int):
+            return ref
+        if ref not in self.id_map:
+            raise NotFoundException(f"Unknown temp id {ref!r}.")
+        return self.id_map[ref]
+
+    def task_id(self, ref: Ref) -> int:
+        task_id = self._resolve(ref)
+        _check(self.owners.tasks, task_id, self.user_id, "Task")
+        return task_id
+
+    def category_id(self, ref: Ref | None) -> int | None:
+        if ref is None:
+            return None
+        category_id = self._resolve(ref)
+        _check(self.owners.categories, category_id, self.user_id, "Category")
+        return category_id
+
+    def created(self, owners: dict[int, int], temp_id: str | None, new_id: int) -> None:
+        owners[new_id] = self.user_id
+        if temp_id is not None:
+            self.id_map[temp_id] = new_id
+
+    def apply(self, op: BatchOp) -> BatchResult:
+        db, user_id = self.db, self.user_id
+        match op:
+            case TaskCreateOp():
+                task_in = TaskCreate(
+                    name=op.name,
+                    is_done=op.is_done,
+                    category_id=self.category_id(op.category_id),
+                    due_at=op.due_at,
+                    estimated_duration_s=op.estimated_duration_s,
+                )
+                with db.begin_nested():
+                    task = task_svc.create_task(db, task_in, user_id)
+                self.created(self.owners.tasks, op.temp_id, task.id)
+                return BatchResult(status=201, id=task.id, task=task)
+            case TaskUpdateOp():
+                task_in = TaskRead(
+                    id=self.task_id(op.id),
+                    name=op.name,
+                    is_done=op.is_done,
+                    category_id=self.category_id(op.category_id),
+                    # Only what the op sets, so omitted fields stay as stored.
+                    **op.model_dump(
+                        include={"due_at", "estimated_duration_s"}, exclude_unset=True
+                    ),
+                )
+                with db.begin_nested():
+                    task = task_svc.update_task(task_in, db, user_id)
+                return BatchResult(status=200, id=task.id, task=task)
+            case TaskToggleOp():
+                task_id = self.task_id(op.id)
+                with db.begin_nested():
+                    task = task_svc.change_done(db, task_id, op.is_done, user_id)
+                return BatchResult(status=200, id=task.id, task=task)
+            case TaskRenameOp():
+                task_id = self.task_id(op.id)
+                with db.begin_nested():
+                    task = task_svc.change_name(db, task_id, op.name, user_id)
+                return BatchResult(status=200, id=task.id, task=task)
+            case TaskDeleteOp():
+                task_id = self.task_id(op.id)
+                with db.begin_nested():
+                    task_svc.delete_task(db, task_id, user_id)
+                del self.owners.tasks[task_id]
+                return BatchResult(status=200, id=task_id)
+            case CategoryCreateOp():
+                with db.begin_nested():
+                    category = category_svc.create_category(
+                        db, category_name=op.name, user_id=user_id
+                    )
+                self.created(self.owners.categories, op.temp_id, category.id)
+                return BatchResult(status=201, id=category.id, category=category)
+            case CategoryRenameOp():
+                category_id = self.category_id(op.id)
+                with db.begin_nested():
+                    category = category_svc.change_category_name(
+                        db, op.name, category_id, user_id
+                    )
+                return BatchResult(status=200, id=category.id, category=category)
+            case CategoryDeleteOp():
+                category_id = self.category_id(op.id)
+                with db.begin_nested():
+                    category_svc.delete_category(db, category_id, user_id)
+                del self.owners.categories[category_id]
+                return BatchResult(status=200, id=category_id)
+        raise ValueError(f"Unsupported operation {op!r}.")
+
+
+def apply_batch(db: Session, ops: list[BatchOp], user_id: int) -> BatchResponse:
+    # Take the sync version before any savepoint so a rolled-back op cannot
+    # undo the counter bump the rest of the batch is stamped with.
+    sync_svc.next_version(db, user_id)
+    batch = _Batch(db, ops, user_id)
+    results = []
+    for op in ops:
+        try:
+            results.append(batch.apply(op))
+        except NotFoundException as e:
+            results.append(BatchResult(status=404, error=str(e)))
+        except ForbiddenException as e:
+            results.append(BatchResult(status=401, error=str(e)))
+        except ValueError as e:
+            results.append(BatchResult(status=400, error=str(e)))
+        except SQLAlchemyError:
+            # e.g. a value the column rejects; the op's savepoint is rolled back.
+            results.append(
+                BatchResult(status=400, error="The database rejected this operation.")
+            )
+    return BatchResponse(results=results, id_map=batch.id_map)
@@ -1,14 +1,69 @@
-from sqlalchemy import select
+from datetime import datetime, timezone
+from typing import Sequence
+
+from sqlalchemy import Row, delete, func, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.errors import ForbiddenException, NotFoundException
-from app.models import CategoryDB, TaskDB
+from app.models import (
+    CATEGORY_READ_COLUMNS,
+    TASK_READ_COLUMNS,
+    CategoryDB,
+    CategoryStats,
+    TaskDB,
+)
+from app.schemas import CategoryRead
+from app.services import sync as sync_svc
+
+
+def list_categories(db: Session, user_id: int) -> Sequence[Row]:
+    stmt = (
+        select(*CATEGORY_READ_COLUMNS)
+        .where(CategoryDB.user_id == user_id)
+        .order_by(CategoryDB.id)
+    )
+    return db.execute(stmt).all()
+
 
+def list_category_stats(
+    db: Session, user_id: int, now: datetime | None = None
+) -> Sequence[Row]:
+    """Every category of the user with its task counters, in one statement.
 
-def list_categories(db: Session, user_id: int) -> list[CategoryDB]:
-    stmt = select(CategoryDB).where(CategoryDB.user_id == user_id)
-    return list(db.scalars(stmt).all())
+    The counters come from category_stats; only the overdue count, which
+    changes with the clock, is counted from the user's tasks due before now.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    overdue = (
+        select(TaskDB.category_id, func.count().label("overdue_count"))
+        .where(
+            TaskDB.user_id == user_id,
+            TaskDB.due_at < now,
+            TaskDB.is_done.is_(False),
+        )
+        .group_by(TaskDB.category_id)
+        .subquery()
+    )
+    counters = [
+        CategoryStats.open_count,
+        CategoryStats.done_count,
+        CategoryStats.estimated_duration_s,
+        CategoryStats.open_estimated_duration_s,
+        overdue.c.overdue_count,
+    ]
+    stmt = (
+        select(
+            *CATEGORY_READ_COLUMNS,
+            *(func.coalesce(c, 0).label(c.name) for c in counters),
+        )
+        .outerjoin(CategoryStats, CategoryStats.category_id == CategoryDB.id)
+        .outerjoin(overdue, overdue.c.category_id == CategoryDB.id)
+        .where(CategoryDB.user_id == user_id)
+        .order_by(CategoryDB.id)
+    )
+    return db.execute(stmt).all()
 
 
 def fetch_category(db: Session, category_id: int, user_id: int) -> CategoryDB:
@@ -19,40 +74,59 @@ def fetch_category(db: Session, category_id: int, user_id: int) -> CategoryDB:
     return category_db
 
 
-def create_category(db: Session, *, category_name: str, user_id: int) -> CategoryDB:
-    category_db = CategoryDB(name=category_name, user_id=user_id)
-    db.add(category_db)
+def create_category(db: Session, *, category_name: str, user_id: int) -> CategoryRead:
+    version = sync_svc.next_version(db, user_id)
+    stmt = (
+        insert(CategoryDB)
+        .values(name=category_name, user_id=user_id, version=version)
+        .returning(CategoryDB.id, CategoryDB.name)
+    )
     try:
-        db.commit()
+        with db.begin_nested():
+            row = db.execute(stmt).one()
     except IntegrityError as e:
-        db.rollback()
         raise ValueError(str(e.orig)) from e
-    db.refresh(category_db)
-    fetch_category(db, category_db.id, user_id)
-    return category_db
+    return CategoryRead.model_validate(row)
 
 
 def delete_category(db: Session, category_id: int, user_id: int) -> None:
     category_db: CategoryDB = fetch_category(db, category_id, user_id)
-    db.delete(category_db)
-    db.commit()
+    version = sync_svc.next_version(db, user_id)
+    # Core deletes so the removed task ids can be recorded as tombstones.
+    task_ids = db.scalars(
+        delete(TaskDB)
+        .where(TaskDB.category_id == category_db.id)
+        .returning(TaskDB.id)
+    ).all()
+    db.execute(delete(CategoryDB).where(CategoryDB.id == category_db.id))
+    sync_svc.record_deletes(db, user_id, sync_svc.TASK, list(task_ids), version)
+    sync_svc.record_deletes(db, user_id, sync_svc.CATEGORY, [category_db.id], version)
 
 
 def change_category_name(
     db: Session, category_name: str, category_id: int, user_id: int
-) -> CategoryDB:
-    category_db: CategoryDB = fetch_category(db, category_id, user_id)
-    category_db.name = category_name
+) -> CategoryRead:
+    stmt = (
+        update(CategoryDB)
+        .where(CategoryDB.id == category_id, CategoryDB.user_id == user_id)
+        .values(name=category_name, version=sync_svc.next_version(db, user_id))
+        .returning(CategoryDB.id, CategoryDB.name)
+    )
     try:
-        db.commit()
+        with db.begin_nested():
+            row = db.execute(stmt).one_or_none()
     except IntegrityError as e:
-        db.rollback()
         raise ValueError(str(e.orig)) from e
-    db.refresh(category_db)
-    return category_db
+    if row is None:
+        fetch_category(db, category_id, user_id)  # raises NotFound or Forbidden
+    return CategoryRead.model_validate(row)
 
 
-def list_category_tasks(db: Session, category_id: int, user_id: int) -> list[TaskDB]:
+def list_category_tasks(db: Session, category_id: int, user_id: int) -> Sequence[Row]:
     category_db: CategoryDB = fetch_category(db, category_id, user_id)
-    stmt = select(TaskDB).where(TaskDB.category_id == category_db.id)
-    return list(db.scalars(stmt).all())
+    stmt = (
+        select(*TASK_READ_COLUMNS)
+        .where(TaskDB.category_id == category_db.id)
+        .order_by(TaskDB.id)
+    )
+    return db.execute(stmt).all()
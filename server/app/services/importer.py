@@ -0,0 +1,282 @@
+"""Bulk import of categories and tasks from NDJSON or CSV.
+
+The input is parsed one record at a time from a file object. Tasks are
+written in chunks of IMPORT_CHUNK_SIZE with a single executemany (COPY on
+psycopg2). Categories are resolved against the user's existing ones and
+created in bulk. Category names clash with `uq_category_user_name`
+according to `on_duplicate`:
+
+- merge: tasks go into the existing category
+- rename: a new category named "Name (2)", "Name (3)", ... is created
+- skip: the category and every task pointing at it are left out
+
+Category records must come before the tasks that refer to them by id, as
+they do in GET /export output.
+"""
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+from typing import IO, Iterator, Literal
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models import CategoryDB, TaskDB
+from app.schemas import ImportCategoryRecord, ImportIssue, ImportReport, ImportTaskRecord
+from app.services import sync as sync_svc
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_ERRORS = 100
+
+OnDuplicate = Literal["merge", "rename", "skip"]
+
+_TASK_COLUMNS = [
+    "name",
+    "is_done",
+    "user_id",
+    "category_id",
+    "due_at",
+    "estimated_duration_s",
+    "version",
+    "updated_at",
+]
+_CATEGORY_NAME_MAX = CategoryDB.__table__.c.name.type.length
+
+
+def iter_ndjson(stream: IO[str]) -> Iterator[tuple[int, str]]:
+    # Lines are decoded by the caller so one bad line is reported, not fatal.
+    for line_no, line in enumerate(stream, 1):
+        if line.strip():
+            yield line_no, line
+
+
+def iter_csv(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        # Empty cells mean "not set", like missing keys in NDJSON.
+        record = {key: value for key, value in row.items() if key and value != ""}
+        yield reader.line_num, record
+
+
+class _Categories:
+    """Maps names and source-file ids to the user's category ids."""
+
+    def __init__(
+        self,
+        db: Session,
+        user_id: int,
+        version: int,
+        on_duplicate: OnDuplicate,
+        report: ImportReport,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.version = version
+        self.on_duplicate = on_duplicate
+        self.report = report
+        self.by_name: dict[str, int] = dict(
+            db.execute(
+                select(CategoryDB.name, CategoryDB.id).where(
+                    CategoryDB.user_id == user_id
+                )
+            ).all()
+        )
+        # Source id -> category id, or None when the category was skipped.
+        self.by_source_id: dict[int, int | None] = {}
+        # Names of skipped category records; tasks naming them are skipped too,
+        # unless the file also brought a category of that name that was created.
+        self.skipped_names: set[str] = set()
+        self._created_names: set[str] = set()
+        self._pending: list[tuple[int | None, str]] = []
+
+    def add(self, record: ImportCategoryRecord) -> None:
+        self._pending.append((record.id, record.name))
+
+    def _free_name(self, name: str, taken: set[str]) -> str:
+        n = 2
+        while True:
+            suffix = f" ({n})"
+            candidate = name[: _CATEGORY_NAME_MAX - len(suffix)] + suffix
+            if candidate not in self.by_name and candidate not in taken:
+                return candidate
+            n += 1
+
+    def flush(self, extra_names: set[str] = frozenset()) -> None:
+        """Create pending category records and any missing `extra_names`."""
+        to_create: dict[str, list[int | None]] = {}
+        for source_id, name in self._pending:
+            if name in self.by_name or name in to_create:
+                if self.on_duplicate == "skip":
+                    self.report.categories_skipped += 1
+                    if name not in to_create and name not in self._created_names:
+                        self.skipped_names.add(name)
+                    if source_id is not None:
+                        self.by_source_id[source_id] = None
+                    continue
+                if self.on_duplicate == "rename":
+                    self.report.categories_renamed += 1
+                    to_create[self._free_name(name, set(to_create))] = [source_id]
+                    continue
+                self.report.categories_merged += 1
+                if name in to_create:
+                    to_create[name].append(source_id)
+                elif source_id is not None:
+                    self.by_source_id[source_id] = self.by_name[name]
+                continue
+            to_create[name] = [source_id]
+        self._pending.clear()
+        for name in extra_names:
+            if name not in self.by_name:
+                to_create.setdefault(name, [])
+        if not to_create:
+            return
+
+        rows = self.db.execute(
+            insert(CategoryDB).returning(
+                CategoryDB.id, CategoryDB.name, sort_by_parameter_order=True
+            ),
+            [
+                {"name": name, "user_id": self.user_id, "version": self.version}
+                for name in to_create
+            ],
+        )
+        for category_id, name in rows:
+            self.by_name[name] = category_id
+            self._created_names.add(name)
+            for source_id in to_create[name]:
+                if source_id is not None:
+                    self.by_source_id[source_id] = category_id
+        self.report.categories_created += len(to_create)
+
+    def default_id(self) -> int:
+        if not self.by_name:
+            self.flush({"Inbox"})
+        return min(self.by_name.values())
+
+
+class Importer:
+    def __init__(self, db: Session, user_id: int, on_duplicate: OnDuplicate = "merge"):
+        self.db = db
+        self.user_id = user_id
+        self.report = ImportReport()
+        self.version = sync_svc.next_version(db, user_id)
+        self.categories = _Categories(
+            db, user_id, self.version, on_duplicate, self.report
+        )
+        self._tasks: list[tuple[int, ImportTaskRecord]] = []
+
+    def report_error(self, line_no: int, error: str) -> None:
+        if len(self.report.errors) < IMPORT_MAX_ERRORS:
+            self.report.errors.append(ImportIssue(line=line_no, error=error))
+
+    def add(self, line_no: int, record: dict) -> None:
+        kind = record.pop("type", "task")
+        try:
+            if kind == "category":
+                self.categories.add(ImportCategoryRecord.model_validate(record))
+            elif kind == "task":
+                self._tasks.append((line_no, ImportTaskRecord.model_validate(record)))
+                if len(self._tasks) >= IMPORT_CHUNK_SIZE:
+                    self._flush_tasks()
+            elif kind != "cursor":  # export resume markers carry no data
+                self.report_error(line_no, f"Unknown record type {kind!r}.")
+        except ValidationError as e:
+            first = e.errors()[0]
+            location = ".".join(map(str, first["loc"]))
+            message = f"{location}: {first['msg']}" if location else first["msg"]
+            self.report_error(line_no, message)
+            if kind == "task":
+                self.report.tasks_skipped += 1
+
+    def _category_for(self, line_no: int, task: ImportTaskRecord) -> int | None:
+        if task.category_id is not None:
+            if task.category_id not in self.categories.by_source_id:
+                self.report_error(line_no, f"Unknown category id {task.category_id}.")
+            return self.categories.by_source_id.get(task.category_id)
+        if task.category is not None:
+            if task.category in self.categories.skipped_names:
+                return None
+            return self.categories.by_name[task.category]
+        return self.categories.default_id()
+
+    def _flush_tasks(self) -> None:
+        self.categories.flush(
+            {t.category for _, t in self._tasks if t.category is not None}
+        )
+        now = datetime.now(timezone.utc)
+        rows = []
+        for line_no, task in self._tasks:
+            category_id = self._category_for(line_no, task)
+            if category_id is None:
+                self.report.tasks_skipped += 1
+                continue
+            rows.append(
+                {
+                    "name": task.name,
+                    "is_done": task.is_done,
+                    "user_id": self.user_id,
+                    "category_id": category_id,
+                    "due_at": task.due_at,
+                    "estimated_duration_s": task.estimated_duration_s,
+                    "version": self.version,
+                    "updated_at": now,
+                }
+            )
+        self._tasks.clear()
+        if rows:
+            _insert_tasks(self.db, rows)
+            self.report.tasks_imported += len(rows)
+
+    def finish(self) -> ImportReport:
+        self._flush_tasks()
+        self.categories.flush()
+        return self.report
+
+
+def _insert_tasks(db: Session, rows: list[dict]) -> None:
+    if db.get_bind().dialect.driver != "psycopg2":
+        # Core, not ORM, insert: the ORM splits a batch into one statement per
+        # run of rows with the same None columns.
+        db.execute(insert(TaskDB.__table__), rows)
+        return
+    # COPY skips per-row statement overhead entirely. Unquoted empty CSV
+    # fields are NULL in COPY's csv format.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column] for column in _TASK_COLUMNS])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY tasks ({', '.join(_TASK_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def import_stream(
+    db: Session,
+    user_id: int,
+    stream: IO[str],
+    fmt: Literal["ndjson", "csv"] = "ndjson",
+    on_duplicate: OnDuplicate = "merge",
+) -> ImportReport:
+    importer = Importer(db, user_id, on_duplicate)
+    records = iter_csv(stream) if fmt == "csv" else iter_ndjson(stream)
+    for line_no, record in records:
+        if isinstance(record, str):
+            try:
+                record = json.loads(record)
+            except json.JSONDecodeError as e:
+                importer.report_error(line_no, f"Invalid JSON: {e.msg}")
+                continue
+        if not isinstance(record, dict):
+            importer.report_error(line_no, "Expected a JSON object.")
+            continue
+        importer.add(line_no, record)
+    return importer.finish()
@@ -0,0 +1,177 @@
+"""Per-user change versions and the delta feed built on them.
+
+Every task/category write stamps the rows it touches with the user's next
+version from `sync_counters`. The counter row is updated in the writing
+transaction, so a user's writes commit in version order and a client that
+has seen everything up to version N only needs rows with version > N.
+Each committed version is also announced on `app.events`.
+"""
+from sqlalchemy import String, insert, literal, null, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.events import event_bus
+from app.models import (
+    CATEGORY_READ_COLUMNS,
+    TASK_READ_COLUMNS,
+    CategoryDB,
+    SyncCounter,
+    SyncTombstone,
+    TaskDB,
+)
+from app.schemas import CategoryRead, SyncChanges, TaskRead
+
+TASK = "task"
+CATEGORY = "category"
+
+_VERSION = "sync_version"
+
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def next_version(db: Session, user_id: int) -> int:
+    """The version stamped on this transaction's writes for `user_id`.
+
+    Allocated once per transaction, so a request touching many rows costs a
+    single counter upsert. Call it outside of savepoints: a rolled-back
+    savepoint would undo the bump but not the cached value.
+    """
+    transaction = db.get_transaction()
+    cached = db.info.get(_VERSION)
+    if cached and cached[0] is transaction and cached[1] == user_id:
+        return cached[2]
+
+    upsert = _UPSERTS[db.get_bind().dialect.name](SyncCounter).values(
+        user_id=user_id, version=1
+    )
+    stmt = upsert.on_conflict_do_update(
+        index_elements=[SyncCounter.user_id],
+        set_={"version": SyncCounter.version + 1},
+    ).returning(SyncCounter.version)
+    version = db.scalar(stmt)
+    db.info[_VERSION] = (db.get_transaction(), user_id, version)
+    event_bus.publish_on_commit(db, user_id, {"type": "sync", "version": version})
+    return version
+
+
+def allocated_version(db: Session, user_id: int) -> int | None:
+    """The version `next_version` last handed out for `user_id` in `db`."""
+    cached = db.info.get(_VERSION)
+    return cached[2] if cached and cached[1] == user_id else None
+
+
+def record_deletes(
+    db: Session, user_id: int, entity: str, entity_ids: list[int], version: int
+) -> None:
+    if not entity_ids:
+        return
+    db.execute(
+        insert(SyncTombstone),
+        [
+            {
+                "user_id": user_id,
+                "entity": entity,
+                "entity_id": entity_id,
+                "version": version,
+            }
+            for entity_id in entity_ids
+        ],
+    )
+
+
+def current_version(db: Session, user_id: int) -> int:
+    version = db.scalar(
+        select(SyncCounter.version).where(SyncCounter.user_id == user_id)
+    )
+    return version or 0
+
+
+def bootstrap(db: Session, user_id: int) -> dict:
+    """Categories (with task counts), tasks and the sync cursor in one read.
+
+    Everything comes from a single UNION ALL statement, which every backend
+    answers from one snapshot; separate SELECTs would not be consistent on
+    SQLite, where the driver does not open read transactions.
+    """
+    tasks = select(
+        literal("task", String).label("kind"),
+        TaskDB.id.label("id"),
+        TaskDB.name.label("name"),
+        TaskDB.is_done.label("is_done"),
+        TaskDB.category_id.label("category_id"),
+        TaskDB.due_at.label("due_at"),
+        TaskDB.estimated_duration_s.label("estimated_duration_s"),
+    ).where(TaskDB.user_id == user_id)
+    categories = select(
+        literal("category", String),
+        CategoryDB.id,
+        CategoryDB.name,
+        *[null()] * 4,
+    ).where(CategoryDB.user_id == user_id)
+    cursor = select(
+        literal("cursor", String), SyncCounter.version, *[null()] * 5
+    ).where(SyncCounter.user_id == user_id)
+    stmt = union_all(tasks, categories, cursor).order_by("kind", "id")
+
+    snapshot = {"cursor": 0, "categories": [], "tasks": []}
+    summaries: dict[int, dict] = {}
+    for row in db.execute(stmt):
+        if row.kind == "cursor":
+            snapshot["cursor"] = row.id
+        elif row.kind == "category":
+            summaries[row.id] = {
+                "id": row.id,
+                "name": row.name,
+                "open_count": 0,
+                "done_count": 0,
+            }
+            snapshot["categories"].append(summaries[row.id])
+        else:
+            task = row._asdict()
+            del task["kind"]
+            snapshot["tasks"].append(task)
+            # Categories sort before tasks, so every summary exists by now.
+            summary = summaries.get(row.category_id)
+            if summary is not None:
+                summary["done_count" if row.is_done else "open_count"] += 1
+    return snapshot
+
+
+def changes_since(db: Session, user_id: int, since: int | None) -> SyncChanges:
+    """Everything that changed after `since`, or the full state when it is None.
+
+    The cursor is read before the rows. Rows committed in between are sent
+    now and again on the next call, which is harmless because clients apply
+    changes as upserts. Nothing committed before the cursor can be missed.
+    """
+    cursor = current_version(db, user_id)
+
+    task_stmt = (
+        select(*TASK_READ_COLUMNS)
+        .where(TaskDB.user_id == user_id)
+        .order_by(TaskDB.id)
+    )
+    category_stmt = (
+        select(*CATEGORY_READ_COLUMNS)
+        .where(CategoryDB.user_id == user_id)
+        .order_by(CategoryDB.id)
+    )
+    deleted: dict[str, list[int]] = {TASK: [], CATEGORY: []}
+    if since is not None:
+        task_stmt = task_stmt.where(TaskDB.version > since)
+        category_stmt = category_stmt.where(CategoryDB.version > since)
+        tombstones = db.execute(
+            select(SyncTombstone.entity, SyncTombstone.entity_id).where(
+                SyncTombstone.user_id == user_id, SyncTombstone.version > since
+            )
+        )
+        for entity, entity_id in tombstones:
+            deleted[entity].append(entity_id)
+
+    return SyncChanges(
+        cursor=cursor,
+        tasks=[TaskRead.model_validate(r) for r in db.execute(task_stmt)],
+        categories=[CategoryRead.model_validate(r) for r in db.execute(category_stmt)],
+        deleted_tasks=deleted[TASK],
+        deleted_categories=deleted[CATEGORY],
+    )
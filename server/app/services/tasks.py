@@ -1,128 +1,364 @@
-from sqlalchemy import delete, exists, select
+import base64
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Integer,
+    Row,
+    String,
+    column,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    table,
+    update,
+)
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.errors import ForbiddenException, NotFoundException
-from app.models import CategoryDB, TaskDB
-from app.schemas import TaskCreate, TaskRead
+from app.models import TASK_READ_COLUMNS, CategoryDB, TaskDB
+from app.schemas import (
+    AgendaQuery,
+    TaskCreate,
+    TaskListQuery,
+    TaskRead,
+    TaskSearchQuery,
+)
+from app.services import sync as sync_svc
 from app.services.categories import fetch_category
 
 
-def _get_or_create_default_category(db: Session, user_id: int) -> CategoryDB:
-    category_db = db.scalar(
-        select(CategoryDB).where(CategoryDB.user_id == user_id).order_by(CategoryDB.id)
-    )
-    if category_db:
-        return category_db
+def _raise_task_error(db: Session, task_id: int, user_id: int) -> None:
+    """Explain why an ownership-scoped statement matched no row.
+
+    Only runs on the error path, so the happy path stays a single statement.
+    """
+    owner_id = db.scalar(select(TaskDB.user_id).where(TaskDB.id == task_id))
+    if owner_id is None:
+        raise NotFoundException("Task not found.")
+    if owner_id != user_id:
+        raise ForbiddenException("You have no right to access this task.")
 
-    category_db = CategoryDB(name="Inbox", user_id=user_id)
-    db.add(category_db)
+
+def _create_default_category(db: Session, user_id: int, version: int) -> int:
     try:
-        db.commit()
+        with db.begin_nested():
+            return db.scalar(
+                insert(CategoryDB)
+                .values(name="Inbox", user_id=user_id, version=version)
+                .returning(CategoryDB.id)
+            )
     except IntegrityError:
-        db.rollback()
-        category_db = db.scalar(
-            select(CategoryDB).where(
+        category_id = db.scalar(
+            select(CategoryDB.id).where(
                 CategoryDB.user_id == user_id, CategoryDB.name == "Inbox"
             )
         )
-        if not category_db:
+        if category_id is None:
             raise
-    db.refresh(category_db)
-    return category_db
+        return category_id
 
 
-def _fetch_task_db(db: Session, task_id: int, user_id: int) -> TaskDB:
-    if not (task_db := db.get(TaskDB, task_id)):
-        raise NotFoundException("Task not found.")
-    task_category = fetch_category(db, task_db.category_id, user_id)
-    if user_id != task_category.user_id:
-        raise ForbiddenException("You have no right to access this task.")
-    return task_db
+def _insert_task(
+    db: Session, task: TaskCreate, user_id: int, version: int, category_ids
+) -> TaskRead | None:
+    """INSERT ... SELECT ... RETURNING into the first category `category_ids` yields."""
+    source = select(
+        literal(task.name, String),
+        literal(task.is_done, Boolean),
+        literal(task.due_at, DateTime(timezone=True)),
+        literal(task.estimated_duration_s, Integer),
+        literal(user_id, Integer),
+        literal(version, BigInteger),
+        category_ids.c.id,
+    ).limit(1)
+    columns = [
+        "name",
+        "is_done",
+        "due_at",
+        "estimated_duration_s",
+        "user_id",
+        "version",
+        "category_id",
+    ]
+    stmt = (
+        insert(TaskDB)
+        .from_select(columns, source)
+        .returning(*TASK_READ_COLUMNS)
+    )
+    row = db.execute(stmt).one_or_none()
+    return TaskRead.model_validate(row) if row else None
 
 
 def fetch_task(db: Session, task_id: int, user_id: int) -> TaskRead:
-    return TaskRead.model_validate(_fetch_task_db(db, task_id, user_id))
+    row = db.execute(
+        select(*TASK_READ_COLUMNS).where(TaskDB.id == task_id, TaskDB.user_id == user_id)
+    ).one_or_none()
+    if row is None:
+        _raise_task_error(db, task_id, user_id)
+    return TaskRead.model_validate(row)
+
+
+def encode_cursor(task_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": task_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))["id"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if not isinstance(task_id, int):
+        raise ValueError("Invalid cursor.")
+    return task_id
+
 
+def list_tasks(
+    db: Session, user_id: int, query: TaskListQuery | None = None
+) -> Sequence[Row]:
+    """The user's tasks in id order, optionally filtered and keyset-paginated.
 
-def list_tasks(db: Session, user_id: int) -> list[TaskRead]:
+    Returns Core rows with the TaskRead columns; see `app.serialization`.
+
+    Every filter narrows a range of one of the (user_id, ...) or
+    (category_id, is_done) indexes; the cursor continues after the last id.
+    """
     stmt = (
-        select(TaskDB)
-        .join(CategoryDB, CategoryDB.id == TaskDB.category_id)
-        .where(CategoryDB.user_id == user_id)
+        select(*TASK_READ_COLUMNS)
+        .where(TaskDB.user_id == user_id)
         .order_by(TaskDB.id)
     )
-    return [TaskRead.model_validate(t) for t in db.scalars(stmt).all()]
+    if query is not None:
+        if query.cursor is not None:
+            stmt = stmt.where(TaskDB.id > decode_cursor(query.cursor))
+        if query.is_done is not None:
+            stmt = stmt.where(TaskDB.is_done.is_(query.is_done))
+        if query.category_id is not None:
+            stmt = stmt.where(TaskDB.category_id == query.category_id)
+        if query.due_before is not None:
+            stmt = stmt.where(TaskDB.due_at < query.due_before)
+        if query.due_after is not None:
+            stmt = stmt.where(TaskDB.due_at >= query.due_after)
+        if query.has_estimate is not None:
+            has_estimate = TaskDB.estimated_duration_s.is_not(None)
+            stmt = stmt.where(has_estimate if query.has_estimate else ~has_estimate)
+        if query.limit is not None:
+            stmt = stmt.limit(query.limit)
+    return db.execute(stmt).all()
+
+
+AGENDA_DEFAULT_DAYS = 7
+
+
+def agenda(db: Session, user_id: int, query: AgendaQuery) -> dict[str, Sequence[Row]]:
+    """Open tasks in the sections of `Agenda`, each ordered by due date.
+
+    Each section is one range scan of ix_tasks_user_id_due_at.
+    """
+    start = query.from_
+    if start is None:
+        now = datetime.now(timezone.utc)
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end = query.to
+    if end is None:
+        end = start + timedelta(days=AGENDA_DEFAULT_DAYS)
+    if end <= start:
+        raise ValueError("`to` must be after `from`.")
+    tomorrow = start + timedelta(days=1)
+
+    open_tasks = (
+        select(*TASK_READ_COLUMNS)
+        .where(TaskDB.user_id == user_id, TaskDB.is_done.is_(False))
+        .order_by(TaskDB.due_at, TaskDB.id)
+        .limit(query.limit)
+    )
+    sections = {
+        "overdue": (None, start),
+        "today": (start, min(tomorrow, end)),
+        "upcoming": (tomorrow, end),
+    }
+    result: dict[str, Sequence[Row]] = {}
+    for section, (due_from, due_before) in sections.items():
+        if due_from is not None and due_from >= due_before:
+            result[section] = []
+            continue
+        stmt = open_tasks.where(TaskDB.due_at < due_before)
+        if due_from is not None:
+            stmt = stmt.where(TaskDB.due_at >= due_from)
+        result[section] = db.execute(stmt).all()
+    return result
+
+
+SEARCH_MAX_TERMS = 8
+# Matches are ranked among the newest SEARCH_RANK_WINDOW of them, so a short
+# prefix hitting most of a large account still reads a bounded number of rows.
+SEARCH_RANK_WINDOW = 1000
+
+_WORD = re.compile(r"\w+")
+_TASKS_FTS = table("tasks_fts", column("rowid", Integer))
+
+
+def _search_matches_sqlite(user_id: int, terms: list[str]):
+    # Each term is a quoted prefix query; quoting keeps FTS5 syntax inert.
+    words = " ".join(f'"{term}"*' for term in terms)
+    match = f'user_id : "{user_id}" AND name : ({words})'
+    return (
+        select(_TASKS_FTS.c.rowid.label("id"))
+        .where(literal_column("tasks_fts").op("MATCH")(match))
+        .order_by(_TASKS_FTS.c.rowid.desc())
+    )
+
+
+def _search_matches_postgresql(user_id: int, terms: list[str]):
+    # Must spell the expression of ix_tasks_name_search for the index to apply.
+    document = func.to_tsvector(literal_column("'simple'"), TaskDB.name)
+    tsquery = func.to_tsquery(
+        literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms)
+    )
+    return (
+        select(TaskDB.id)
+        .where(TaskDB.user_id == user_id, document.op("@@")(tsquery))
+        .order_by(TaskDB.id.desc())
+    )
+
+
+_SEARCH_MATCHES = {
+    "sqlite": _search_matches_sqlite,
+    "postgresql": _search_matches_postgresql,
+}
+
+
+def search_tasks(db: Session, user_id: int, query: TaskSearchQuery) -> Sequence[Row]:
+    """The user's tasks with a word starting with every word of `query.q`.
+
+    Names starting with the first word rank first, then shorter names (the
+    query covers more of them), then newer tasks.
+    """
+    terms = _WORD.findall(query.q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        return []
+    matches_for = _SEARCH_MATCHES[db.get_bind().dialect.name]
+    matches = matches_for(user_id, terms).limit(SEARCH_RANK_WINDOW).subquery()
+    # Not ranked with bm25/ts_rank: bm25 scans every posting of each term to
+    # weigh it, a fixed cost of milliseconds for a common prefix.
+    stmt = (
+        select(*TASK_READ_COLUMNS)
+        .join(matches, matches.c.id == TaskDB.id)
+        .order_by(
+            TaskDB.name.istartswith(terms[0], autoescape=True).desc(),
+            func.length(TaskDB.name),
+            TaskDB.id.desc(),
+        )
+        .limit(query.limit)
+    )
+    return db.execute(stmt).all()
 
 
 def create_task(db: Session, task: TaskCreate, user_id: int) -> TaskRead:
+    version = sync_svc.next_version(db, user_id)
     if task.category_id is not None:
-        category_db = fetch_category(db, task.category_id, user_id)
-    else:
-        category_db = _get_or_create_default_category(db, user_id=user_id)
-    task_db = TaskDB(name=task.name, is_done=task.is_done, category_id=category_db.id)
-    db.add(task_db)
-    db.commit()
-    db.refresh(task_db)
-    return TaskRead.model_validate(task_db)
+        target = select(CategoryDB.id).where(
+            CategoryDB.id == task.category_id, CategoryDB.user_id == user_id
+        )
+        if created := _insert_task(db, task, user_id, version, target.subquery()):
+            return created
+        fetch_category(db, task.category_id, user_id)  # raises the right error
+        raise NotFoundException("Category not found.")
+
+    # The user's oldest category doubles as the inbox.
+    default = (
+        select(CategoryDB.id)
+        .where(CategoryDB.user_id == user_id)
+        .order_by(CategoryDB.id)
+        .limit(1)
+    )
+    if created := _insert_task(db, task, user_id, version, default.subquery()):
+        return created
+    category_id = _create_default_category(db, user_id, version)
+    target = select(CategoryDB.id).where(CategoryDB.id == category_id)
+    return _insert_task(db, task, user_id, version, target.subquery())
 
 
 def delete_task(db: Session, task_id: int, user_id: int) -> None:
-    task_db: TaskDB = _fetch_task_db(db, task_id, user_id)
-    db.delete(task_db)
-    db.commit()
+    version = sync_svc.next_version(db, user_id)
+    stmt = (
+        delete(TaskDB)
+        .where(TaskDB.id == task_id, TaskDB.user_id == user_id)
+        .returning(TaskDB.id)
+    )
+    if db.scalar(stmt) is None:
+        _raise_task_error(db, task_id, user_id)
+    sync_svc.record_deletes(db, user_id, sync_svc.TASK, [task_id], version)
+
+
+def _delete_tasks_where(db: Session, user_id: int, *criteria) -> None:
+    version = sync_svc.next_version(db, user_id)
+    stmt = delete(TaskDB).where(TaskDB.user_id == user_id, *criteria)
+    deleted = db.scalars(stmt.returning(TaskDB.id)).all()
+    sync_svc.record_deletes(db, user_id, sync_svc.TASK, list(deleted), version)
 
 
 def delete_all_done(db: Session, user_id: int) -> None:
-    stmt = delete(TaskDB).where(
-        TaskDB.is_done.is_(True),
-        exists(
-            select(1)
-            .where(CategoryDB.id == TaskDB.category_id)
-            .where(CategoryDB.user_id == user_id)
-        ),
-    )
-    db.execute(stmt)
-    db.commit()
+    _delete_tasks_where(db, user_id, TaskDB.is_done.is_(True))
 
 
 def delete_category_done(db: Session, category_id: int, user_id: int):
     fetch_category(db, category_id, user_id)  # checking if the category belongs to user
-    stmt = delete(TaskDB).where(
-        TaskDB.is_done.is_(True),
-        TaskDB.category_id == category_id,
+    _delete_tasks_where(
+        db, user_id, TaskDB.is_done.is_(True), TaskDB.category_id == category_id
+    )
+
+
+def _update_task_row(db: Session, task_id: int, user_id: int, *criteria, **values):
+    stmt = (
+        update(TaskDB)
+        .where(TaskDB.id == task_id, TaskDB.user_id == user_id, *criteria)
+        # The counter is locked before the row, like every other task write.
+        .values(**values, version=sync_svc.next_version(db, user_id))
+        .returning(*TASK_READ_COLUMNS)
     )
-    db.execute(stmt)
-    db.commit()
+    return db.execute(stmt).one_or_none()
 
 
 def change_done(db: Session, task_id: int, is_done: bool, user_id: int) -> TaskRead:
-    task_db: TaskDB = _fetch_task_db(db, task_id=task_id, user_id=user_id)
-    task_db.is_done = is_done
-    db.commit()
-    db.refresh(task_db)
-    return TaskRead.model_validate(task_db)
+    row = _update_task_row(db, task_id, user_id, is_done=is_done)
+    if row is None:
+        _raise_task_error(db, task_id, user_id)
+    return TaskRead.model_validate(row)
 
 
 def change_name(db: Session, task_id: int, name: str, user_id: int) -> TaskRead:
-    task_db: TaskDB = _fetch_task_db(db, task_id, user_id)
-    task_db.name = name
-    db.commit()
-    db.refresh(task_db)
-    return TaskRead.model_validate(task_db)
+    row = _update_task_row(db, task_id, user_id, name=name)
+    if row is None:
+        _raise_task_error(db, task_id, user_id)
+    return TaskRead.model_validate(row)
 
 
 def update_task(task: TaskRead, db: Session, user_id: int) -> TaskRead:
-    task_db: TaskDB = _fetch_task_db(db, task.id, user_id)  # existing row
-
-    if task.category_id != task_db.category_id:
+    # Moving the task is only allowed into one of the user's own categories.
+    target_owned = exists().where(
+        CategoryDB.id == task.category_id, CategoryDB.user_id == user_id
+    )
+    row = _update_task_row(
+        db,
+        task.id,
+        user_id,
+        target_owned,
+        # Fields the client left out (e.g. dueAt) keep their stored value.
+        **task.model_dump(exclude={"id"}, exclude_unset=True),
+    )
+    if row is None:
+        _raise_task_error(db, task.id, user_id)
         fetch_category(db, task.category_id, user_id)
-
-    for field, value in task.model_dump().items():
-        if field == "id":
-            continue
-        setattr(task_db, field, value)
-
-    db.commit()
-    db.refresh(task_db)
-    return TaskRead.model_validate(task_db)
+        raise NotFoundException("Task not found.")
+    return TaskRead.model_validate(row)
@@ -5,6 +5,7 @@ from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.principal_cache import principal_cache
 from app.security import get_password_hash
 from app.schemas import UserCreate, UserRead
 
@@ -37,16 +38,19 @@ def get_user_by_email(db, email: str) -> UserDB | None:
 
 
 def create_user(db: Session, user_in: UserCreate) -> UserRead:
+    return insert_user(db, user_in, get_password_hash(user_in.password))
+
+
+def insert_user(db: Session, user_in: UserCreate, password_hash: str) -> UserRead:
     user = UserDB(
         username=user_in.username,
         email=user_in.email,
-        password=get_password_hash(user_in.password),
+        password=password_hash,
     )
-    db.add(user)
     try:
-        db.commit()
+        with db.begin_nested():
+            db.add(user)
     except IntegrityError as exc:
-        db.rollback()
         orig = getattr(exc, "orig", None)
         message = str(orig or exc)
         message_lc = message.lower()
@@ -84,7 +88,6 @@ def create_user(db: Session, user_in: UserCreate) -> UserRead:
         )
         raise HTTPException(500, "Database constraint error while creating user")
     except SQLAlchemyError:
-        db.rollback()
         logger.exception(
             "Database error while creating user (username=%s, email=%s)",
             user_in.username,
@@ -92,7 +95,6 @@ def create_user(db: Session, user_in: UserCreate) -> UserRead:
         )
         raise HTTPException(500, "Database error while creating user")
 
-    db.refresh(user)
     return UserRead.model_validate(user)
 
 
@@ -100,6 +102,7 @@ def delete_user(db: Session, userid: int):
     stmt = select(UserDB).where(UserDB.id == userid)
     user = db.execute(stmt).one_or_none()
     db.delete(user)
+    principal_cache.invalidate(userid)
     return user
 
 
@@ -109,5 +112,6 @@ def patch_user(db: Session, user: UserRead):
         return None
     for fields, attributes in user.model_dump().items():
         setattr(userdb, fields, attributes)
-    db.commit()
+    db.flush()
+    principal_cache.invalidate(userdb.id)
     return userdb
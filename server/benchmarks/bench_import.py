@@ -0,0 +1,79 @@
+"""Wall time of importing a large NDJSON file through the import service.
+
+    cd server && python -m benchmarks.bench_import [--tasks N] [--database-url URL]
+
+Defaults to a file-backed SQLite database so the numbers include real
+writes; pass a Postgres URL to exercise the COPY path.
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import Base, create_db_engine  # noqa: E402
+from app.models import TaskDB, UserDB  # noqa: E402
+from app.services.importer import import_stream  # noqa: E402
+
+
+def _payload(tasks: int, categories: int) -> str:
+    lines = [
+        json.dumps({"type": "category", "id": i, "name": f"Space {i}"})
+        for i in range(categories)
+    ]
+    lines += [
+        json.dumps(
+            {
+                "type": "task",
+                "name": f"Imported task {i}",
+                "is_done": i % 4 == 0,
+                "category_id": i % categories,
+                "estimated_duration_s": 900 if i % 2 else None,
+            }
+        )
+        for i in range(tasks)
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        engine = create_db_engine(url)
+        Base.metadata.create_all(engine)
+        payload = _payload(args.tasks, args.categories)
+
+        with Session(engine) as db:
+            user = UserDB(username="importer", email="importer@example.com", password="x")
+            db.add(user)
+            db.commit()
+
+            started = time.perf_counter()
+            report = import_stream(db, user.id, io.StringIO(payload))
+            db.commit()
+            elapsed = time.perf_counter() - started
+
+            stored = db.scalar(select(func.count()).where(TaskDB.user_id == user.id))
+        engine.dispose()
+
+    assert stored == report.tasks_imported == args.tasks, report
+    print(
+        f"imported {args.tasks} tasks in {elapsed:.2f} s "
+        f"({args.tasks / elapsed:,.0f} tasks/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
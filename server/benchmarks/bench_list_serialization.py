@@ -0,0 +1,98 @@
+"""Per-row cost of serving /task/list for a 10k-task account.
+
+Compares the old path (ORM entities, `TaskRead.model_validate` per row, then
+FastAPI's response_model validation and JSON encoding) with the Core-row
+path used by the routers now (`app.serialization.dump_list`).
+
+    cd server && python -m benchmarks.bench_list_serialization [--tasks N]
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models import TASK_READ_COLUMNS, CategoryDB, TaskDB, UserDB  # noqa: E402
+from app.schemas import TaskRead  # noqa: E402
+from app.serialization import dump_list  # noqa: E402
+
+
+def _seed(session: Session, count: int) -> int:
+    user = UserDB(username="bench", email="bench@example.com", password="x")
+    category = CategoryDB(name="Inbox", user=user)
+    session.add_all([user, category])
+    session.flush()
+    session.execute(
+        insert(TaskDB),
+        [
+            {
+                "name": f"Task number {i}",
+                "is_done": i % 3 == 0,
+                "user_id": user.id,
+                "category_id": category.id,
+            }
+            for i in range(count)
+        ],
+    )
+    session.commit()
+    return user.id
+
+
+def orm_path(session: Session, user_id: int) -> bytes:
+    stmt = select(TaskDB).where(TaskDB.user_id == user_id).order_by(TaskDB.id)
+    tasks = [TaskRead.model_validate(t) for t in session.scalars(stmt).all()]
+    # What FastAPI does with response_model=list[TaskRead].
+    adapter = TypeAdapter(list[TaskRead])
+    validated = adapter.validate_python(tasks, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json", by_alias=True)).encode()
+
+
+def core_path(session: Session, user_id: int) -> bytes:
+    stmt = select(*TASK_READ_COLUMNS).where(TaskDB.user_id == user_id).order_by(TaskDB.id)
+    return dump_list(TaskRead, session.execute(stmt).all())
+
+
+def _time(fn, engine, user_id: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # A fresh session each round, as each request gets one.
+        with Session(engine) as session:
+            started = time.perf_counter()
+            fn(session, user_id)
+            best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        user_id = _seed(session, args.tasks)
+
+    with Session(engine) as session:
+        assert json.loads(orm_path(session, user_id)) == json.loads(
+            core_path(session, user_id)
+        )
+
+    for name, fn in (("orm + model_validate", orm_path), ("core rows + adapter", core_path)):
+        seconds = _time(fn, engine, user_id, args.repeat)
+        per_row_us = seconds / args.tasks * 1e6
+        print(f"{name:<22} {seconds * 1e3:8.1f} ms  {per_row_us:6.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
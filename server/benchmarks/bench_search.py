@@ -0,0 +1,108 @@
+"""Latency of GET /task/search for a 100k-task account.
+
+Compares the full-text index (`app.services.tasks.search_tasks`) with the
+`LIKE '%word%'` scan a search would otherwise need, on a file-backed
+database that also holds a second, equally large account. The unranked scan
+stops after `limit` rows, so it is fast while matches are dense; with rare
+or no matches it reads the whole account, where the index stays bounded.
+
+    cd server && python -m benchmarks.bench_search [--tasks N] [--database-url URL]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import Base, create_db_engine  # noqa: E402
+from app.models import TASK_READ_COLUMNS, CategoryDB, TaskDB, UserDB  # noqa: E402
+from app.schemas import TaskSearchQuery  # noqa: E402
+from app.services.tasks import search_tasks  # noqa: E402
+
+WORDS = (
+    "report invoice call email review plan draft meeting budget design "
+    "deploy fix write read buy clean book schedule update prepare"
+).split()
+QUERIES = ["re", "rep", "report", "bud pla", "inv", "schedule meeting", "zzz"]
+
+
+def _seed(db: Session, tasks: int, rng: random.Random) -> int:
+    user_ids = []
+    for name in ("searcher", "neighbour"):
+        user = UserDB(username=name, email=f"{name}@example.com", password="x")
+        category = CategoryDB(name="Inbox", user=user)
+        db.add_all([user, category])
+        db.flush()
+        for start in range(0, tasks, 10_000):
+            db.execute(
+                insert(TaskDB.__table__),
+                [
+                    {
+                        "name": " ".join(rng.choices(WORDS, k=4)) + f" {i}",
+                        "is_done": False,
+                        "user_id": user.id,
+                        "category_id": category.id,
+                        "version": 0,
+                    }
+                    for i in range(start, min(start + 10_000, tasks))
+                ],
+            )
+        user_ids.append(user.id)
+    db.commit()
+    return user_ids[0]
+
+
+def _like_scan(db: Session, user_id: int, q: str, limit: int):
+    stmt = select(*TASK_READ_COLUMNS).where(TaskDB.user_id == user_id)
+    for word in q.split():
+        stmt = stmt.where(TaskDB.name.ilike(f"%{word}%"))
+    return db.execute(stmt.order_by(TaskDB.id.desc()).limit(limit)).all()
+
+
+def _time_ms(fn, repeat: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        engine = create_db_engine(url)
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            user_id = _seed(db, args.tasks, random.Random(7))
+            print(f"{'query':<18} {'index p50/p95 ms':>18} {'LIKE p50/p95 ms':>18}")
+            for q in QUERIES:
+                query = TaskSearchQuery(q=q)
+                indexed = _time_ms(
+                    lambda: search_tasks(db, user_id, query), args.repeat
+                )
+                scanned = _time_ms(
+                    lambda: _like_scan(db, user_id, q, query.limit), args.repeat
+                )
+                print(
+                    f"{q!r:<18} {indexed[0]:>8.2f} / {indexed[1]:<7.2f} "
+                    f"{scanned[0]:>8.2f} / {scanned[1]:<7.2f}"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
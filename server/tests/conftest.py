@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -5,9 +7,16 @@ from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 from uuid import uuid4
 
-from app.main import app
-from app.database import Base, get_db
-from app import models
+# The app's own scheduler would read the real database, not the test one;
+# tests drive ReminderScheduler directly instead.
+os.environ.setdefault("REMINDER_WINDOW_S", "0")
+
+from app.main import app  # noqa: E402
+from app.database import Base, get_db  # noqa: E402
+from app.principal_cache import principal_cache  # noqa: E402
+from app.ratelimit import login_throttle  # noqa: E402
+from app.revocation import access_revocations  # noqa: E402
+from app import models  # noqa: E402
 
 TEST_PASSWORD = "P@SSWORD"
 
@@ -35,15 +44,30 @@ def db_session() -> Session:
         engine.dispose()
 
 
+def _reset_process_state():
+    # Every test gets a fresh database, so user ids repeat between tests.
+    principal_cache.clear()
+    login_throttle.store.reset()
+    access_revocations.clear()
+
+
 @pytest.fixture()
 def client(db_session):
     def override_get_db():
-        yield db_session  # ← same session for app routes
+        # Same session for app routes, committed per request like get_db.
+        try:
+            yield db_session
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            raise
 
     app.dependency_overrides[get_db] = override_get_db
+    _reset_process_state()
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+    _reset_process_state()
 
 
 @pytest.fixture(scope="function")
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.admission import AdmissionControlMiddleware
+
+
+async def _call(app, path: str) -> tuple[int, dict]:
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return start["status"], {k.decode(): v.decode() for k, v in start["headers"]}
+
+
+def test_admission_sheds_requests_beyond_capacity():
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await gate.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        app = AdmissionControlMiddleware(slow_app, max_in_flight=1, queue_timeout_s=0.05)
+        first = asyncio.create_task(_call(app, "/task/list"))
+        await asyncio.sleep(0)
+
+        status, headers = await _call(app, "/task/list")
+        assert status == 503
+        assert headers["retry-after"]
+
+        # Exempt paths bypass the limit entirely.
+        health = asyncio.create_task(_call(app, "/health"))
+        await asyncio.sleep(0)
+        gate.set()
+        assert (await first)[0] == 200
+        assert (await health)[0] == 200
+
+    asyncio.run(scenario())
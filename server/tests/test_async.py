@@ -0,0 +1,156 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.auth import async_auth_router, auth_router
+from app.database import (
+    AsyncBackingSession,
+    Base,
+    async_url,
+    get_async_db,
+    get_db,
+    serialize_writes,
+)
+from app.models import UserDB
+
+from .conftest import TEST_PASSWORD, _reset_process_state
+
+pytest.importorskip("aiosqlite")
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.routers import aio  # noqa: E402
+
+
+def _sessionmakers(tmp_path):
+    # Sync (login) and async (signup/task/category) sessions must see the same
+    # data, so this uses a file database instead of the in-memory one.
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SyncSession = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    AsyncSession = async_sessionmaker(
+        bind=create_async_engine(async_url(url), poolclass=NullPool),
+        sync_session_class=AsyncBackingSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    return engine, SyncSession, AsyncSession
+
+
+@pytest.fixture()
+def async_client(tmp_path):
+    engine, SyncSession, AsyncSession = _sessionmakers(tmp_path)
+
+    def override_get_db():
+        with SyncSession() as db:
+            yield db
+            db.commit()
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+            await db.commit()
+
+    test_app = FastAPI()
+    test_app.include_router(async_auth_router)
+    test_app.include_router(auth_router)
+    test_app.include_router(aio.user_router)
+    test_app.include_router(aio.task_router)
+    test_app.include_router(aio.category_router)
+    test_app.dependency_overrides[get_db] = override_get_db
+    test_app.dependency_overrides[get_async_db] = override_get_async_db
+    _reset_process_state()
+    with TestClient(test_app) as c:
+        yield c
+    _reset_process_state()
+    engine.dispose()
+
+
+def test_async_task_and_category_flow(async_client: TestClient):
+    r = async_client.post(
+        "/auth/signup",
+        json={"username": "aio", "password": TEST_PASSWORD, "email": "aio@example.com"},
+    )
+    assert r.status_code == 201, r.text
+    r = async_client.post(
+        "/auth/token",
+        data={"username": "aio", "password": TEST_PASSWORD, "grant_type": "password"},
+    )
+    assert r.status_code == 200, r.text
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    me = async_client.get("/user", headers=headers)
+    assert me.status_code == 200, me.text
+    assert me.json()["username"] == "aio"
+
+    created = async_client.post(
+        "/task/create", headers=headers, json={"name": "Code", "isDone": False}
+    )
+    assert created.status_code == 201, created.text
+    task = created.json()
+
+    toggled = async_client.patch(f"/task/is_done/{task['id']}/true", headers=headers)
+    assert toggled.status_code == 200, toggled.text
+    assert toggled.json()["isDone"] is True
+
+    listed = async_client.get("/task/list", headers=headers)
+    assert listed.status_code == 200, listed.text
+    assert listed.json() == [toggled.json()]
+
+    category = async_client.get(f"/category/{task['categoryId']}", headers=headers)
+    assert category.status_code == 200, category.text
+    assert category.json()["id"] == task["categoryId"]
+
+    etag = listed.headers["ETag"]
+    cached = async_client.get(
+        "/task/list", headers={**headers, "If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+
+
+def test_async_writes_share_the_sync_writer_lock(tmp_path):
+    engine, SyncSession, AsyncSession = _sessionmakers(tmp_path)
+    lock = serialize_writes(SyncSession)
+    serialize_writes(AsyncBackingSession, lock)
+
+    sync_writer = SyncSession()
+    sync_writer.add(UserDB(username="a", email="a@example.com", password="x"))
+    sync_writer.flush()
+    assert lock.locked()
+    released = threading.Timer(0.2, sync_writer.commit)
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        released.start()
+        async with AsyncSession() as db:
+            db.add(UserDB(username="b", email="b@example.com", password="x"))
+            await db.flush()
+            assert not sync_writer.in_transaction()
+            assert lock.locked()
+            await db.commit()
+        ticker.cancel()
+        return ticks
+
+    # The async writer waited for the sync one without stalling the loop.
+    assert asyncio.run(main()) > 5
+    released.join()
+    assert not lock.locked()
+    with SyncSession() as db:
+        assert db.query(UserDB).count() == 2
+    sync_writer.close()
+    engine.dispose()
@@ -1,5 +1,19 @@
+import ipaddress
+import os
+import threading
+import time
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import main, ratelimit, security
+from app.auth import issue_refresh_token, rotate_refresh_token
+from app.errors import OverloadedException
+from app.models import RefreshSession
+from app.principal_cache import Principal, PrincipalCache, principal_cache
+
 from .conftest import TEST_PASSWORD
 
 AUTH_TOKEN_ENDPOINT = "/auth/token"
@@ -61,3 +75,217 @@ def test_logout_successful(client: TestClient, user_access_token: str):
     )
     assert r.status_code == 200, r.text
     assert r.json() == {"detail": "Logged out"}, r.text
+
+
+def test_principal_cached_after_first_request(
+    client: TestClient, seed_user: dict, user_access_token: str
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    r = client.get("/user", headers=headers)
+    assert r.status_code == 200, r.text
+    cached = principal_cache.get(seed_user["id"])
+    assert cached is not None
+    assert cached.username == seed_user["username"]
+
+    r = client.post("/auth/logout", headers=headers)
+    assert r.status_code == 200, r.text
+    assert principal_cache.get(seed_user["id"]) is None
+
+
+def test_principal_cache_bounds():
+    cache = PrincipalCache(ttl_s=60, max_size=2)
+    for user_id in (1, 2, 3):
+        cache.put(Principal(id=user_id, username=f"u{user_id}", email="a@b.co"))
+    assert cache.get(1) is None
+    assert cache.get(3) is not None
+    assert len(cache) == 2
+
+    expired = PrincipalCache(ttl_s=0, max_size=2)
+    expired.put(Principal(id=1, username="u1", email="a@b.co"))
+    assert expired.get(1) is None
+
+
+def test_login_sheds_load_when_hashing_is_saturated(
+    client: TestClient, seed_user: dict, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(security, "_pending", threading.BoundedSemaphore(0))
+    monkeypatch.setattr(main, "METRICS_TOKEN", "scrape")
+    scrape = {"Authorization": "Bearer scrape"}
+    before = client.get("/metrics", headers=scrape).json()
+    data = {
+        "username": seed_user["username"],
+        "password": TEST_PASSWORD,
+        "grant_type": "password",
+    }
+    r = client.post(AUTH_TOKEN_ENDPOINT, data=data)
+    assert r.status_code == 503, r.text
+    assert r.headers["Retry-After"]
+    after = client.get("/metrics", headers=scrape).json()
+    assert (
+        after["password_hash_rejected_total"]
+        == before["password_hash_rejected_total"] + 1
+    )
+
+
+def test_hash_timeout_keeps_its_slot(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(security, "PASSWORD_HASH_TIMEOUT_S", 0.05)
+    monkeypatch.setattr(security, "_pending", threading.BoundedSemaphore(1))
+    try:
+        # Warm the pool up so spawning it does not count against the timeout.
+        monkeypatch.setattr(security, "PASSWORD_HASH_TIMEOUT_S", 30)
+        assert security._run(abs, -1) == 1
+        monkeypatch.setattr(security, "PASSWORD_HASH_TIMEOUT_S", 0.05)
+
+        with pytest.raises(OverloadedException, match="timed out"):
+            security._run(time.sleep, 0.5)
+        # The sleeping job still holds the only slot.
+        with pytest.raises(OverloadedException, match="in flight"):
+            security._run(abs, -1)
+        time.sleep(0.6)
+        assert security._run(abs, -1) == 1
+    finally:
+        security.shutdown_hash_executor()
+
+
+def test_broken_hash_pool_is_replaced(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_WORKERS", 1)
+    try:
+        with pytest.raises(OverloadedException, match="restarting"):
+            security._run(os._exit, 1)
+        assert security.verify_password("secret", security.get_password_hash("secret"))
+    finally:
+        security.shutdown_hash_executor()
+
+
+def test_login_throttled_per_username(client: TestClient, seed_user: dict):
+    data = {
+        "username": seed_user["username"],
+        "password": "wrong",
+        "grant_type": "password",
+    }
+    for _ in range(ratelimit.LOGIN_USER_BURST):
+        r = client.post(AUTH_TOKEN_ENDPOINT, data=data)
+        assert r.status_code == 401, r.text
+
+    # Even the right password is refused once the bucket is empty.
+    data["password"] = TEST_PASSWORD
+    r = client.post(AUTH_TOKEN_ENDPOINT, data=data)
+    assert r.status_code == 429, r.text
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+def test_login_throttled_per_forwarded_ip(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(
+        ratelimit, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")]
+    )
+    monkeypatch.setattr(ratelimit, "LOGIN_IP_BURST", 1)
+    proxied = TestClient(client.app, client=("10.0.0.2", 40000))
+
+    def login(http: TestClient, username: str, forwarded_for: str) -> int:
+        data = {"username": username, "password": "wrong", "grant_type": "password"}
+        headers = {"X-Forwarded-For": forwarded_for}
+        return http.post(AUTH_TOKEN_ENDPOINT, data=data, headers=headers).status_code
+
+    # Clients behind the proxy get buckets of their own...
+    assert login(proxied, "a", "198.51.100.9, 203.0.113.7") == 401
+    assert login(proxied, "b", "203.0.113.8") == 401
+    # ...keyed on the hop the proxy appended, not on what the client sent.
+    assert login(proxied, "c", "198.51.100.1, 203.0.113.7") == 429
+
+    # Without a trusted peer the header is ignored.
+    assert login(client, "d", "203.0.113.20") == 401
+    assert login(client, "e", "203.0.113.21") == 429
+
+
+def test_local_store_rejects_empty_bucket():
+    store = ratelimit.LocalRateLimitStore()
+    assert store.consume("k", capacity=1, refill_per_s=1000) == 0
+    assert store.consume("k", capacity=1, refill_per_s=0) > 0
+
+
+def test_local_store_evicts_by_each_buckets_own_refill(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    store = ratelimit.LocalRateLimitStore(max_keys=3)
+    # A slow bucket, drained, then a fast one that is full again a second later.
+    for _ in range(2):
+        store.consume("slow", capacity=2, refill_per_s=0.01)
+    store.consume("fast", capacity=2, refill_per_s=10)
+
+    now[0] += 1
+    store.consume("other", capacity=2, refill_per_s=10)
+    # "slow" is at the cold end but still drained, so it stays; "fast" is
+    # full and goes once it reaches the cold end.
+    assert list(store._buckets) == ["slow", "fast", "other"]
+    assert store.consume("slow", capacity=2, refill_per_s=0.01) > 0
+
+    # "fast" is now coldest and full; after it, "other" is evicted as the
+    # least recently used bucket, drained or not, to stay within max_keys.
+    store.consume("a", capacity=2, refill_per_s=0.01)
+    store.consume("b", capacity=2, refill_per_s=0.01)
+    assert list(store._buckets) == ["slow", "a", "b"]
+
+
+def test_refresh_rotates_token(client: TestClient, seed_user: dict, db_session: Session):
+    raw = issue_refresh_token(db_session, seed_user["id"])
+    r = client.post("/auth/refresh", headers={"Cookie": f"refresh_token={raw}"})
+    assert r.status_code == 200, r.text
+    assert r.json()["user_id"] == seed_user["id"]
+    assert r.json()["access_token"]
+
+    # The old token is spent.
+    r = client.post("/auth/refresh", headers={"Cookie": f"refresh_token={raw}"})
+    assert r.status_code == 401, r.text
+
+
+def test_refresh_token_reuse_revokes_family(client: TestClient, seed_user: dict, db_session: Session):
+    first = issue_refresh_token(db_session, seed_user["id"])
+    rotated = rotate_refresh_token(db_session, first)
+    assert rotated is not None
+    user_id, second = rotated
+    assert user_id == seed_user["id"]
+
+    # Replaying the first token revokes the token that replaced it as well.
+    assert rotate_refresh_token(db_session, first) is None
+    assert rotate_refresh_token(db_session, second) is None
+    revoked = db_session.scalars(
+        select(RefreshSession.revoked).where(RefreshSession.user_id == user_id)
+    ).all()
+    assert revoked and all(revoked)
+
+
+def test_refresh_endpoint_keeps_family_revocation(
+    client: TestClient, seed_user: dict, db_session: Session
+):
+    first = issue_refresh_token(db_session, seed_user["id"])
+    db_session.commit()
+    r = client.post("/auth/refresh", headers={"Cookie": f"refresh_token={first}"})
+    assert r.status_code == 200, r.text
+
+    # The replay is answered 401, and the revocation survives its rollback.
+    r = client.post("/auth/refresh", headers={"Cookie": f"refresh_token={first}"})
+    assert r.status_code == 401, r.text
+    db_session.expire_all()
+    revoked = db_session.scalars(
+        select(RefreshSession.revoked).where(
+            RefreshSession.user_id == seed_user["id"]
+        )
+    ).all()
+    assert len(revoked) == 2 and all(revoked)
+
+
+def test_access_token_rejected_after_logout(client: TestClient, user_access_token: str):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    assert client.get("/user", headers=headers).status_code == 200
+
+    r = client.post("/auth/logout", headers=headers)
+    assert r.status_code == 200, r.text
+
+    r = client.get("/user", headers=headers)
+    assert r.status_code == 401, r.text
+    assert "revoked" in r.text.lower()
@@ -0,0 +1,91 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import DataError
+
+from app.services import tasks as task_svc
+
+
+def test_batch_applies_ops_with_temp_ids(
+    client: TestClient, user_access_token: str, seed_task: dict
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    ops = [
+        {"op": "category.create", "tempId": "c1", "name": "Work"},
+        {"op": "task.create", "tempId": "t1", "name": "Report", "categoryId": "c1"},
+        {"op": "task.toggle", "id": "t1", "isDone": True},
+        {"op": "task.rename", "id": seed_task["id"], "name": "Code more"},
+        {"op": "task.toggle", "id": 999_999, "isDone": True},
+        {"op": "category.create", "name": "Work"},
+        {"op": "task.delete", "id": seed_task["id"]},
+    ]
+    r = client.post("/batch", headers=headers, json={"ops": ops})
+    assert r.status_code == 200, r.text
+    body = r.json()
+
+    statuses = [result["status"] for result in body["results"]]
+    assert statuses == [201, 201, 200, 200, 404, 400, 200]
+    new_category, new_task = body["idMap"]["c1"], body["idMap"]["t1"]
+    assert body["results"][2]["task"] == {
+        "id": new_task,
+        "name": "Report",
+        "isDone": True,
+        "categoryId": new_category,
+        "dueAt": None,
+        "estimatedDurationS": None,
+    }
+
+    tasks = client.get("/task/list", headers=headers).json()
+    assert [(t["id"], t["isDone"]) for t in tasks] == [(new_task, True)]
+    categories = client.get("/category/list", headers=headers).json()
+    assert sorted(c["name"] for c in categories) == ["Inbox", "Work"]
+
+
+def test_batch_rejects_foreign_ids(
+    client: TestClient, user_access_token: str, seed_task: dict
+):
+    r = client.post(
+        "/auth/signup",
+        json={"username": "mallory", "email": "mallory@example.com", "password": "P@SSWORD"},
+    )
+    assert r.status_code in (200, 201), r.text
+    r = client.post(
+        "/auth/token",
+        data={"username": "mallory", "password": "P@SSWORD", "grant_type": "password"},
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    ops = [
+        {"op": "task.delete", "id": seed_task["id"]},
+        {"op": "task.create", "name": "Sneaky", "categoryId": seed_task["categoryId"]},
+    ]
+    r = client.post("/batch", headers=headers, json={"ops": ops})
+    assert [result["status"] for result in r.json()["results"]] == [401, 401]
+
+
+def test_batch_rejects_overlong_names(client: TestClient, user_access_token: str):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    ops = [{"op": "task.create", "name": "x" * 256}]
+    r = client.post("/batch", headers=headers, json={"ops": ops})
+    assert r.status_code == 422, r.text
+
+
+def test_batch_reports_database_errors_per_op(
+    client: TestClient,
+    user_access_token: str,
+    seed_task: dict,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def rejected(*args, **kwargs):
+        raise DataError("UPDATE tasks", {}, Exception("value too long"))
+
+    monkeypatch.setattr(task_svc, "change_name", rejected)
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    ops = [
+        {"op": "task.rename", "id": seed_task["id"], "name": "Renamed"},
+        {"op": "task.toggle", "id": seed_task["id"], "isDone": True},
+    ]
+    r = client.post("/batch", headers=headers, json={"ops": ops})
+    assert r.status_code == 200, r.text
+    assert [result["status"] for result in r.json()["results"]] == [400, 200]
+    task = client.get("/task/list", headers=headers).json()[0]
+    assert (task["name"], task["isDone"]) == ("Code", True)
@@ -94,3 +94,54 @@ def test_list_category_tasks(client: TestClient, user_access_token: str):
     assert r.status_code == 200, r.text
     assert r.json() == [moved_task.json()]
 
+
+def test_duplicate_category_rolls_back_cleanly(
+    client: TestClient, user_access_token: str
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    first = client.post("/category/create", headers=headers, json={"name": "Work"})
+    assert first.status_code == 201, first.text
+
+    dupe = client.post("/category/create", headers=headers, json={"name": "Work"})
+    assert dupe.status_code == 400, dupe.text
+
+    listed = client.get("/category/list", headers=headers)
+    assert listed.status_code == 200, listed.text
+    assert listed.json() == [first.json()]
+
+
+def test_category_stats(client: TestClient, user_access_token: str):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    category = client.post(
+        "/category/create", headers=headers, json={"name": "Work"}
+    ).json()
+    tasks = [
+        {
+            "name": "Late",
+            "isDone": False,
+            "dueAt": "2000-01-01T00:00:00Z",
+            "estimatedDurationS": 600,
+        },
+        {"name": "Next", "isDone": False, "dueAt": "2999-01-01T00:00:00Z"},
+        {"name": "Done", "isDone": True, "estimatedDurationS": 120},
+    ]
+    for task in tasks:
+        client.post(
+            "/task/create", headers=headers, json={**task, "categoryId": category["id"]}
+        )
+    client.post("/category/create", headers=headers, json={"name": "Empty"})
+
+    r = client.get("/category/stats", headers=headers)
+    assert r.status_code == 200, r.text
+    work, empty = r.json()
+    assert work == {
+        "id": category["id"],
+        "name": "Work",
+        "openCount": 2,
+        "doneCount": 1,
+        "overdueCount": 1,
+        "estimatedDurationS": 720,
+        "openEstimatedDurationS": 600,
+    }
+    assert empty["name"] == "Empty"
+    assert empty["openCount"] == empty["overdueCount"] == 0
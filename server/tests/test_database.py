@@ -0,0 +1,63 @@
+import threading
+
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, apply_sqlite_pragmas, serialize_writes
+from app.models import UserDB
+
+
+def _file_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'profile.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def test_sqlite_profile_pragmas(tmp_path):
+    engine = _file_engine(tmp_path)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
+    engine.dispose()
+
+
+def test_writes_are_serialized_and_reads_are_not(tmp_path):
+    engine = _file_engine(tmp_path)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    lock = serialize_writes(Session)
+
+    with Session() as reader:
+        reader.scalars(select(UserDB)).all()
+        assert not lock.locked()
+
+    writer = Session()
+    writer.add(UserDB(username="a", email="a@example.com", password="x"))
+    writer.flush()
+    assert lock.locked()
+
+    second_done = threading.Event()
+
+    def second_writer():
+        with Session() as other:
+            other.add(UserDB(username="b", email="b@example.com", password="x"))
+            other.commit()
+        second_done.set()
+
+    thread = threading.Thread(target=second_writer)
+    thread.start()
+    # Reads still go through while the first writer holds the lock.
+    with Session() as reader:
+        assert reader.scalars(select(UserDB)).all() == []
+    assert not second_done.wait(0.2)
+
+    writer.commit()
+    thread.join(5)
+    assert second_done.is_set()
+    assert not lock.locked()
+    writer.close()
+    engine.dispose()
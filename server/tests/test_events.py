@@ -0,0 +1,69 @@
+import asyncio
+
+from sqlalchemy.orm import Session
+
+from app import events
+from app.events import EventBus, LocalEventChannel, event_bus
+from app.schemas import TaskCreate
+from app.services import sync as sync_svc
+from app.services import tasks as task_svc
+
+
+def test_events_published_only_on_commit(seed_user: dict, db_session: Session):
+    user_id = seed_user["id"]
+
+    async def scenario():
+        subscription = event_bus.subscribe(user_id)
+        try:
+            task_svc.create_task(db_session, TaskCreate(name="Dropped", isDone=False), user_id)
+            db_session.rollback()
+            task_svc.create_task(db_session, TaskCreate(name="Kept", isDone=False), user_id)
+            task_svc.create_task(db_session, TaskCreate(name="Same txn", isDone=False), user_id)
+            db_session.commit()
+            received = await asyncio.wait_for(subscription.get(), 1)
+            assert subscription.queue.empty()
+            return received
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    received = asyncio.run(scenario())
+    assert received["type"] == "sync"
+    # One event per committed transaction, carrying its version.
+    assert received["version"] == sync_svc.current_version(db_session, user_id)
+
+
+def test_slow_subscriber_is_dropped():
+    channel = LocalEventChannel()
+    bus = EventBus(channel, queue_size=2)
+
+    async def scenario():
+        slow = bus.subscribe(1)
+        other = bus.subscribe(2)
+        channel.after_commit([(1, {"type": "sync", "version": v}) for v in (1, 2, 3)])
+        channel.after_commit([(2, {"type": "sync", "version": 4})])
+        await asyncio.sleep(0)
+        return slow, other
+
+    slow, other = asyncio.run(scenario())
+    assert slow.dropped and slow.queue.get_nowait() is None
+    assert other.queue.get_nowait() == {"type": "sync", "version": 4}
+
+
+def test_stream_formats_events_and_catches_up():
+    channel = LocalEventChannel()
+    bus = EventBus(channel)
+
+    async def scenario():
+        body = events.stream(bus, 1, lambda: {"type": "sync", "version": 5})
+        chunks = [await anext(body), await anext(body)]
+        channel.after_commit([(1, {"type": "sync", "version": 6})])
+        chunks.append(await anext(body))
+        await body.aclose()
+        return chunks
+
+    assert asyncio.run(scenario()) == [
+        f"retry: {events.EVENTS_RETRY_MS}\n\n",
+        'id: 5\nevent: sync\ndata: {"type": "sync", "version": 5}\n\n',
+        'id: 6\nevent: sync\ndata: {"type": "sync", "version": 6}\n\n',
+    ]
+    assert bus._subscriptions == {}
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.services import export as export_svc
+
+
+def _lines(body: str) -> list[dict]:
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_export_ndjson(client: TestClient, user_access_token: str, seed_tasks: list[dict]):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    r = client.get("/export", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+
+    records = [line for line in _lines(r.text) if line["type"] != "cursor"]
+    assert [(line["type"], line["name"]) for line in records] == [("category", "Inbox")] + [
+        ("task", t["name"]) for t in seed_tasks
+    ]
+
+
+def test_export_csv(client: TestClient, user_access_token: str, seed_task: dict):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    r = client.get("/export", headers=headers, params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [(row["type"], row["name"]) for row in rows] == [
+        ("category", "Inbox"),
+        ("task", "Code"),
+    ]
+    assert rows[1]["is_done"] == "False"
+
+
+def test_export_resumes_from_cursor(
+    client: TestClient, seed_user: dict, seed_tasks: list[dict], db_session: Session
+):
+    bind = db_session.get_bind()
+    chunks = list(export_svc.iter_ndjson(bind, seed_user["id"], chunk_size=2))
+    # One category chunk, then two chunks of two tasks.
+    assert len(chunks) == 3
+
+    resume_from = _lines(chunks[1])[-1]["cursor"]
+    rest = "".join(
+        export_svc.iter_ndjson(bind, seed_user["id"], resume_from, chunk_size=2)
+    )
+    assert [line["name"] for line in _lines(rest) if line["type"] == "task"] == [
+        t["name"] for t in seed_tasks[2:]
+    ]
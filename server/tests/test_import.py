@@ -0,0 +1,82 @@
+import json
+
+from fastapi.testclient import TestClient
+
+
+def _ndjson(*records: dict) -> str:
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def test_import_ndjson(client: TestClient, user_access_token: str, seed_task: dict):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    body = _ndjson(
+        {"type": "category", "id": 1, "name": "Inbox"},
+        {"type": "category", "id": 2, "name": "Work"},
+        {"type": "task", "name": "Merged", "category_id": 1},
+        {"type": "task", "name": "Report", "is_done": True, "category_id": 2},
+        {"type": "task", "name": "By name", "category": "Errands"},
+        {"type": "task", "name": ""},
+    ) + "{not json\n"
+    r = client.post("/import", headers=headers, content=body)
+    assert r.status_code == 200, r.text
+    report = r.json()
+    assert report["categories_created"] == 2
+    assert report["categories_merged"] == 1
+    assert report["tasks_imported"] == 3
+    assert report["tasks_skipped"] == 1
+    assert [e["line"] for e in report["errors"]] == [6, 7]
+
+    tasks = client.get("/task/list", headers=headers).json()
+    categories = {
+        c["id"]: c["name"] for c in client.get("/category/list", headers=headers).json()
+    }
+    assert [(t["name"], categories[t["categoryId"]]) for t in tasks] == [
+        ("Code", "Inbox"),
+        ("Merged", "Inbox"),
+        ("Report", "Work"),
+        ("By name", "Errands"),
+    ]
+
+
+def test_import_csv_round_trip_with_rename(
+    client: TestClient, user_access_token: str, seed_tasks: list[dict]
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    exported = client.get("/export", headers=headers, params={"format": "csv"}).text
+
+    r = client.post(
+        "/import",
+        headers=headers,
+        params={"format": "csv", "on_duplicate": "rename"},
+        content=exported,
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["categories_renamed"] == 1
+    assert r.json()["tasks_imported"] == len(seed_tasks)
+
+    categories = client.get("/category/list", headers=headers).json()
+    assert [c["name"] for c in categories] == ["Inbox", "Inbox (2)"]
+    tasks = client.get("/task/list", headers=headers).json()
+    copies = [t for t in tasks if t["categoryId"] == categories[1]["id"]]
+    assert [(t["name"], t["isDone"]) for t in copies] == [
+        (t["name"], t["isDone"]) for t in seed_tasks
+    ]
+
+
+def test_import_skip_drops_tasks_of_duplicate_categories(
+    client: TestClient, user_access_token: str, seed_task: dict
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    body = _ndjson(
+        {"type": "category", "id": 7, "name": "Inbox"},
+        {"type": "task", "name": "Dropped", "category_id": 7},
+        {"type": "task", "name": "Dropped by name", "category": "Inbox"},
+        {"type": "task", "name": "Kept", "category": "Errands"},
+    )
+    r = client.post(
+        "/import", headers=headers, params={"on_duplicate": "skip"}, content=body
+    )
+    assert r.json()["categories_skipped"] == 1
+    assert r.json()["tasks_skipped"] == 2
+    tasks = client.get("/task/list", headers=headers).json()
+    assert [t["name"] for t in tasks] == ["Code", "Kept"]
@@ -1,3 +1,9 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, security
+
+
 def test_read_main(client):
     resp = client.get("/")
     assert resp.status_code == 200
@@ -38,3 +44,27 @@ def test_signup_rejects_duplicate_email(client):
     }
     r2 = client.post("/auth/signup", json=payload2)
     assert r2.status_code == 400
+
+
+def test_metrics_require_token_or_local_request(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+):
+    # TestClient's peer is "testclient", which is not a local address.
+    assert client.get("/metrics").status_code == 403
+    local = TestClient(client.app, client=("127.0.0.1", 50000))
+    assert local.get("/metrics").status_code == 200
+    proxied = {"X-Forwarded-For": "203.0.113.9"}
+    assert local.get("/metrics", headers=proxied).status_code == 403
+
+    monkeypatch.setattr(main, "METRICS_TOKEN", "scrape")
+    assert local.get("/metrics").status_code == 401
+    r = client.get("/metrics", headers={"Authorization": "Bearer scrape"})
+    assert r.status_code == 200
+
+
+def test_shutdown_stops_hash_workers(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_WORKERS", 1)
+    with TestClient(main.app):
+        assert security._run(len, "abc") == 3
+        assert security._executor is not None
+    assert security._executor is None
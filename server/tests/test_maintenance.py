@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.maintenance import purge_refresh_sessions, reconcile_category_stats
+from app.models import CategoryDB, CategoryStats, RefreshSession, TaskDB, UserDB
+
+
+def _session(user_id: int, name: str, **fields) -> RefreshSession:
+    now = RefreshSession.now()
+    return RefreshSession(
+        user_id=user_id,
+        jti=name,
+        family_id=name,
+        token_hash=name,
+        expires_at=fields.pop("expires_at", now + timedelta(days=1)),
+        **fields,
+    )
+
+
+def test_purge_refresh_sessions(db_session: Session):
+    user = UserDB(username="u", email="u@example.com", password="x")
+    db_session.add(user)
+    db_session.flush()
+    now = RefreshSession.now()
+    db_session.add_all(
+        [
+            _session(user.id, "active"),
+            _session(user.id, "expired-1", expires_at=now - timedelta(minutes=1)),
+            _session(user.id, "expired-2", expires_at=now - timedelta(days=3)),
+            _session(
+                user.id,
+                "revoked-old",
+                revoked=True,
+                revoked_at=now - timedelta(days=2),
+            ),
+            _session(user.id, "revoked-recent", revoked=True, revoked_at=now),
+        ]
+    )
+    db_session.commit()
+
+    purged = purge_refresh_sessions(
+        db_session, batch_size=1, revoked_retention=timedelta(hours=1)
+    )
+
+    assert purged == 3
+    remaining = db_session.scalars(select(RefreshSession.jti)).all()
+    assert sorted(remaining) == ["active", "revoked-recent"]
+
+
+def test_reconcile_category_stats(db_session: Session):
+    user = UserDB(username="u", email="u@example.com", password="x")
+    categories = [CategoryDB(name=f"c{i}", user=user) for i in range(3)]
+    db_session.add_all([user, *categories])
+    db_session.flush()
+    for category in categories:
+        owned = {"user_id": user.id, "category": category}
+        db_session.add_all(
+            [
+                TaskDB(name="open", is_done=False, estimated_duration_s=60, **owned),
+                TaskDB(name="done", is_done=True, **owned),
+            ]
+        )
+    db_session.commit()
+    counters = select(
+        CategoryStats.category_id,
+        CategoryStats.open_count,
+        CategoryStats.done_count,
+        CategoryStats.estimated_duration_s,
+    ).order_by(CategoryStats.category_id)
+    expected = [(c.id, 1, 1, 60) for c in categories]
+    assert [tuple(row) for row in db_session.execute(counters)] == expected
+
+    # Drift: a wrong counter, a missing row and a row without a category.
+    db_session.execute(
+        update(CategoryStats)
+        .where(CategoryStats.category_id == categories[0].id)
+        .values(open_count=5)
+    )
+    db_session.execute(
+        delete(CategoryStats).where(CategoryStats.category_id == categories[1].id)
+    )
+    db_session.execute(insert(CategoryStats).values(category_id=9999))
+    db_session.commit()
+
+    assert reconcile_category_stats(db_session, batch_size=2) == 3
+    assert [tuple(row) for row in db_session.execute(counters)] == expected
+    assert reconcile_category_stats(db_session) == 0
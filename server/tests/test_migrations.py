@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+
+from app.database import Base
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+# Last revision before the SQLite triggers; the earliest revisions assume a
+# create_all schema (see migrate.py), so the chain cannot run from base.
+BEFORE_TRIGGERS = "7b2e9d4f6a58"
+
+
+def _create_all(url: str) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+def _sqlite_schema(url: str) -> dict[str, str]:
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL")
+        ).all()
+    engine.dispose()
+    return dict(rows)
+
+
+@pytest.fixture()
+def schemas(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    """The schema from create_all, and the same after the trigger migrations
+    ran against it: downgraded past them, then upgraded back to head."""
+    created = f"sqlite:///{tmp_path / 'created.db'}"
+    migrated = f"sqlite:///{tmp_path / 'migrated.db'}"
+    _create_all(created)
+    _create_all(migrated)
+
+    monkeypatch.setenv("DATABASE_URL", migrated)
+    config = Config(str(SERVER_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(SERVER_DIR / "alembic"))
+    command.stamp(config, "head")
+    command.downgrade(config, BEFORE_TRIGGERS)
+    assert "tasks_fts_ai" not in _sqlite_schema(migrated)
+    command.upgrade(config, "head")
+    return _sqlite_schema(created), _sqlite_schema(migrated)
+
+
+def _objects(schema: dict[str, str], prefix: str) -> dict[str, str]:
+    return {name: sql for name, sql in schema.items() if name.startswith(prefix)}
+
+
+def test_task_search_ddl_matches_migration(schemas):
+    created, migrated = schemas
+    assert set(_objects(created, "tasks_fts")) >= {
+        "tasks_fts",
+        "tasks_fts_ai",
+        "tasks_fts_ad",
+        "tasks_fts_au",
+    }
+    assert _objects(migrated, "tasks_fts") == _objects(created, "tasks_fts")
+
+
+def test_category_stats_ddl_matches_migration(schemas):
+    created, migrated = schemas
+    assert set(_objects(created, "category_stats")) == {
+        "category_stats",
+        "category_stats_ci",
+        "category_stats_cd",
+        "category_stats_ti",
+        "category_stats_td",
+        "category_stats_tu",
+    }
+    assert _objects(migrated, "category_stats") == _objects(created, "category_stats")
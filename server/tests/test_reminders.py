@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.events import event_bus
+from app.reminders import ReminderScheduler
+from app.schemas import TaskCreate
+from app.services import tasks as task_svc
+
+
+def test_reminder_scheduler(seed_user: dict, db_session: Session):
+    user_id = seed_user["id"]
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    clock = [now]
+
+    def create(name: str, minutes: int, is_done: bool = False) -> int:
+        task = TaskCreate(name=name, isDone=is_done, dueAt=now + timedelta(minutes=minutes))
+        task_id = task_svc.create_task(db_session, task, user_id).id
+        db_session.commit()
+        return task_id
+
+    soon = create("Soon", 10)
+    create("Done", 5, is_done=True)
+    create("Tomorrow", 24 * 60)
+
+    async def scenario():
+        subscription = event_bus.subscribe(user_id)
+        scheduler = ReminderScheduler(
+            sessionmaker(bind=db_session.get_bind()),
+            event_bus,
+            window_s=3600,
+            refresh_s=0,
+            clock=lambda: clock[0],
+        )
+        event_bus.add_listener(scheduler.on_event)
+        try:
+            assert scheduler.tick() == now + timedelta(minutes=10)
+            assert len(scheduler) == 1
+
+            # A write is picked up from its sync event.
+            moved = create("Moved in", 20)
+            task_svc.change_done(db_session, soon, True, user_id)
+            db_session.commit()
+            assert scheduler.tick() == now + timedelta(minutes=20)
+            assert len(scheduler) == 1
+
+            clock[0] = now + timedelta(minutes=25)
+            scheduler.tick()
+            received = []
+            while len(received) < 3:
+                received.append(await asyncio.wait_for(subscription.get(), 1))
+            return moved, [e for e in received if e["type"] == "reminder"], scheduler
+        finally:
+            event_bus.remove_listener(scheduler.on_event)
+            event_bus.unsubscribe(subscription)
+
+    moved, reminders, scheduler = asyncio.run(scenario())
+    assert reminders == [
+        {
+            "type": "reminder",
+            "task_id": moved,
+            "name": "Moved in",
+            "due_at": (now + timedelta(minutes=20)).isoformat(),
+        }
+    ]
+    assert len(scheduler) == 0
+
+
+def test_reminder_scheduler_reloads_writes_it_was_not_told_about(
+    seed_user: dict, db_session: Session
+):
+    # Another worker's write on the local channel never reaches this bus; the
+    # periodic reload still finds it. No listener is registered here.
+    user_id = seed_user["id"]
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    clock = [now]
+    scheduler = ReminderScheduler(
+        sessionmaker(bind=db_session.get_bind()),
+        event_bus,
+        window_s=3600,
+        refresh_s=60,
+        clock=lambda: clock[0],
+    )
+    assert scheduler.tick() == now + timedelta(seconds=60)
+    assert len(scheduler) == 0
+
+    due_at = now + timedelta(seconds=30)
+    task = TaskCreate(name="Elsewhere", isDone=False, dueAt=due_at)
+    task_id = task_svc.create_task(db_session, task, user_id).id
+    db_session.commit()
+
+    async def scenario():
+        subscription = event_bus.subscribe(user_id)
+        try:
+            clock[0] = now + timedelta(seconds=61)
+            assert scheduler.tick() == now + timedelta(seconds=121)
+            return await asyncio.wait_for(subscription.get(), 1)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    # Due before the reload ran, so it fires late instead of not at all.
+    assert asyncio.run(scenario()) == {
+        "type": "reminder",
+        "task_id": task_id,
+        "name": "Elsewhere",
+        "due_at": due_at.isoformat(),
+    }
+    assert len(scheduler) == 0
@@ -0,0 +1,136 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import replicas
+from app.database import SESSION_USER_ID, Base
+from app.models import UserDB
+from app.replicas import ReplicaSet, track_writes
+from app.services import sync as sync_svc
+
+
+def _replica_url(tmp_path, name: str) -> str:
+    db_url = f"sqlite:///{tmp_path / name}"
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return db_url
+
+
+def test_round_robin_skips_unhealthy_replicas(tmp_path):
+    replica_set = ReplicaSet(
+        [
+            _replica_url(tmp_path, "replica-a.db"),
+            _replica_url(tmp_path, "replica-b.db"),
+            f"sqlite:///{tmp_path / 'missing' / 'replica-c.db'}",
+        ]
+    )
+    replica_set.check_health()
+    picks = {replica_set.pick() for _ in range(6)}
+    assert picks == {0, 1}
+
+    replica_set.mark_down(0)
+    assert {replica_set.pick() for _ in range(3)} == {1}
+    replica_set.mark_down(1)
+    assert replica_set.pick() is None
+
+
+def test_committed_write_makes_user_sticky(tmp_path):
+    replica_set = ReplicaSet([_replica_url(tmp_path, "replica.db")], sticky_s=60)
+    primary = create_engine(_replica_url(tmp_path, "primary.db"))
+    Session = sessionmaker(bind=primary, expire_on_commit=False)
+    track_writes(Session, replica_set)
+
+    with Session() as db:
+        db.info[SESSION_USER_ID] = 7
+        db.add(UserDB(username="u", email="u@example.com", password="x"))
+        db.commit()
+
+    assert replica_set.is_sticky(7)
+    assert not replica_set.is_sticky(8)
+
+
+def test_list_reads_from_replica_until_user_writes(
+    client: TestClient,
+    seed_user: dict,
+    user_access_token: str,
+    seed_task: dict,
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # The replica is empty, standing in for one that has not caught up yet.
+    replica_set = ReplicaSet([_replica_url(tmp_path, "replica.db")], sticky_s=60)
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+
+    r = client.get("/sync/changes", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["tasks"] == []
+
+    replica_set.mark_write(seed_user["id"])
+    r = client.get("/sync/changes", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["tasks"] == [seed_task]
+
+
+def test_write_cookie_keeps_reads_on_primary_across_workers(
+    client: TestClient,
+    db_session,
+    user_access_token: str,
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # The write is tracked by one worker's ReplicaSet and read through another's.
+    writer = ReplicaSet([_replica_url(tmp_path, "replica.db")], sticky_s=60)
+    reader = ReplicaSet([_replica_url(tmp_path, "replica.db")], sticky_s=60)
+    track_writes(db_session, writer)
+    monkeypatch.setattr(replicas, "replica_set", reader)
+    monkeypatch.setattr(replicas, "is_local", True)
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+
+    r = client.post(
+        "/task/create", headers=headers, json={"name": "Code", "isDone": False}
+    )
+    assert r.status_code == 201, r.text
+    assert replicas.STICKY_COOKIE in r.cookies
+
+    r = client.get("/sync/changes", headers=headers)
+    assert r.status_code == 200, r.text
+    assert [t["name"] for t in r.json()["tasks"]] == ["Code"]
+
+    client.cookies.clear()
+    r = client.get("/sync/changes", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["tasks"] == []
+
+
+def test_collection_etag_and_body_come_from_primary_when_replica_lags(
+    client: TestClient,
+    db_session,
+    user_access_token: str,
+    seed_task: dict,
+    tmp_path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    replica_set = ReplicaSet([_replica_url(tmp_path, "replica.db")], sticky_s=60)
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    asked = []
+    current_version = sync_svc.current_version
+
+    def recording_current_version(db, user_id):
+        asked.append("primary" if db is db_session else "replica")
+        return current_version(db, user_id)
+
+    monkeypatch.setattr(sync_svc, "current_version", recording_current_version)
+
+    r = client.get("/task/list", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == [seed_task]
+    # The tag's version is reused to check the replica, not asked for again.
+    assert asked == ["primary", "replica"]
+
+    etag = r.headers["ETag"]
+    r = client.get("/task/list", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
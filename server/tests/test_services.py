@@ -1,6 +1,23 @@
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from app.schemas import TaskCreate, TaskRead, UserCreate, UserRead
+from app.errors import ForbiddenException, NotFoundException
+from app.maintenance import reconcile_category_stats
+from app.schemas import (
+    TaskCreate,
+    TaskRead,
+    TaskSearchQuery,
+    TaskToggleOp,
+    UserCreate,
+    UserRead,
+)
+from app.services import batch as batch_svc
+from app.services import categories as category_svc
+from app.services import importer as import_svc
 from app.services import tasks as task_svc
 from app.services import users as user_svc
 
@@ -55,3 +72,169 @@ def test_task_services_return_pydantic_models(db_session: Session):
     assert isinstance(updated, TaskRead)
     assert updated.name == "Updated"
     assert updated.is_done is True
+
+
+def test_task_toggle_does_not_reselect_the_row(db_session: Session):
+    user = user_svc.create_user(
+        db_session,
+        UserCreate(username="user_c", email="user_c@example.com", password="P@SSWORD123"),
+    )
+    created = task_svc.create_task(
+        db_session, TaskCreate(name="Code", isDone=False), user_id=user.id
+    )
+    db_session.commit()
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        changed = task_svc.change_done(db_session, created.id, True, user.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    assert changed.is_done is True
+    # The sync counter bump, then the ownership-scoped UPDATE ... RETURNING.
+    assert [s.split()[0].upper() for s in statements] == ["INSERT", "UPDATE"]
+
+
+def test_task_writes_distinguish_missing_from_foreign(db_session: Session):
+    owner = user_svc.create_user(
+        db_session,
+        UserCreate(username="owner", email="owner@example.com", password="P@SSWORD123"),
+    )
+    other = user_svc.create_user(
+        db_session,
+        UserCreate(username="other", email="other@example.com", password="P@SSWORD123"),
+    )
+    created = task_svc.create_task(
+        db_session, TaskCreate(name="Mine", isDone=False), user_id=owner.id
+    )
+
+    with pytest.raises(ForbiddenException):
+        task_svc.change_name(db_session, created.id, "Stolen", other.id)
+    with pytest.raises(NotFoundException):
+        task_svc.change_done(db_session, created.id + 100, True, owner.id)
+    with pytest.raises(ForbiddenException):
+        task_svc.create_task(
+            db_session,
+            TaskCreate(name="Sneaky", isDone=False, categoryId=created.category_id),
+            user_id=other.id,
+        )
+    assert task_svc.fetch_task(db_session, created.id, owner.id).name == "Mine"
+
+
+def test_delete_all_done_only_touches_the_owner(db_session: Session):
+    users = [
+        user_svc.create_user(
+            db_session,
+            UserCreate(username=name, email=f"{name}@example.com", password="P@SSWORD123"),
+        )
+        for name in ("done_a", "done_b")
+    ]
+    for user in users:
+        task_svc.create_task(
+            db_session, TaskCreate(name="Done", isDone=True), user_id=user.id
+        )
+
+    task_svc.delete_all_done(db_session, users[0].id)
+
+    assert task_svc.list_tasks(db_session, users[0].id) == []
+    assert [t.name for t in task_svc.list_tasks(db_session, users[1].id)] == ["Done"]
+
+
+def test_search_tasks_prefix_ranked_and_scoped(db_session: Session):
+    owner, other = (
+        user_svc.create_user(
+            db_session,
+            UserCreate(username=name, email=f"{name}@example.com", password="P@SSWORD123"),
+        )
+        for name in ("searcher", "bystander")
+    )
+    for name in ("Write report", "Report expenses report", "Café visit", "Buy milk"):
+        task_svc.create_task(db_session, TaskCreate(name=name, isDone=False), owner.id)
+    task_svc.create_task(db_session, TaskCreate(name="Report", isDone=False), other.id)
+
+    def search(q: str) -> list[str]:
+        rows = task_svc.search_tasks(db_session, owner.id, TaskSearchQuery(q=q))
+        return [row.name for row in rows]
+
+    assert search("rep") == ["Report expenses report", "Write report"]
+    assert search("wri REP") == ["Write report"]
+    assert search("cafe") == ["Café visit"]
+    assert search('"*') == []
+
+    milk = task_svc.search_tasks(db_session, owner.id, TaskSearchQuery(q="milk"))[0]
+    task_svc.change_name(db_session, milk.id, "Buy bread", owner.id)
+    assert search("milk") == []
+    assert search("bread") == ["Buy bread"]
+    task_svc.delete_task(db_session, milk.id, owner.id)
+    assert search("bread") == []
+
+
+def test_category_stats_follow_every_task_write(db_session: Session):
+    user = user_svc.create_user(
+        db_session,
+        UserCreate(username="stats", email="stats@example.com", password="P@SSWORD123"),
+    )
+    work = category_svc.create_category(db_session, category_name="Work", user_id=user.id)
+    home = category_svc.create_category(db_session, category_name="Home", user_id=user.id)
+    now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+    def create(name: str, category_id: int, estimate: int | None, **fields) -> TaskRead:
+        task = TaskCreate(
+            name=name,
+            isDone=False,
+            categoryId=category_id,
+            estimatedDurationS=estimate,
+            **fields,
+        )
+        return task_svc.create_task(db_session, task, user.id)
+
+    late = create("Late", work.id, 600, dueAt=now - timedelta(hours=1))
+    create("Later", work.id, None, dueAt=now + timedelta(hours=1))
+    moved = create("Moved", work.id, 300)
+    create("Done soon", home.id, 60)
+
+    task_svc.update_task(
+        TaskRead(id=moved.id, name="Moved", isDone=False, categoryId=home.id),
+        db_session,
+        user.id,
+    )
+    batch_svc.apply_batch(
+        db_session, [TaskToggleOp(op="task.toggle", id=late.id, isDone=True)], user.id
+    )
+    task_svc.change_done(db_session, late.id, False, user.id)
+    db_session.commit()
+
+    stats = {
+        row.name: row._asdict()
+        for row in category_svc.list_category_stats(db_session, user.id, now=now)
+    }
+    assert stats["Work"] == {
+        "id": work.id,
+        "name": "Work",
+        "open_count": 2,
+        "done_count": 0,
+        "estimated_duration_s": 600,
+        "open_estimated_duration_s": 600,
+        "overdue_count": 1,
+    }
+    assert stats["Home"]["open_count"] == 2
+    assert stats["Home"]["open_estimated_duration_s"] == 360
+
+    # Bulk paths keep the counters exact too.
+    task_svc.change_done(db_session, moved.id, True, user.id)
+    task_svc.delete_category_done(db_session, home.id, user.id)
+    import_svc.import_stream(
+        db_session,
+        user.id,
+        io.StringIO('{"name": "Imported", "category": "Home", "is_done": true}\n'),
+    )
+    category_svc.delete_category(db_session, work.id, user.id)
+    db_session.commit()
+    assert reconcile_category_stats(db_session) == 0
+    [home_stats] = category_svc.list_category_stats(db_session, user.id, now=now)
+    assert (home_stats.open_count, home_stats.done_count) == (1, 1)
@@ -0,0 +1,76 @@
+from fastapi.testclient import TestClient
+
+
+def test_changes_since_cursor(
+    client: TestClient, user_access_token: str, seed_tasks: list[dict]
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+
+    r = client.get("/sync/changes", headers=headers)
+    assert r.status_code == 200, r.text
+    full = r.json()
+    assert [t["id"] for t in full["tasks"]] == [t["id"] for t in seed_tasks]
+    assert [c["name"] for c in full["categories"]] == ["Inbox"]
+    cursor = full["cursor"]
+
+    r = client.get("/sync/changes", headers=headers, params={"since": cursor})
+    assert r.json()["tasks"] == []
+    assert r.json()["cursor"] == cursor
+
+    toggled, removed = seed_tasks[0], seed_tasks[1]
+    client.patch(f"/task/is_done/{toggled['id']}/true", headers=headers)
+    client.delete(f"/task/delete/{removed['id']}", headers=headers)
+
+    r = client.get("/sync/changes", headers=headers, params={"since": cursor})
+    delta = r.json()
+    assert [t["id"] for t in delta["tasks"]] == [toggled["id"]]
+    assert delta["tasks"][0]["isDone"] is True
+    assert delta["deletedTasks"] == [removed["id"]]
+    assert delta["categories"] == []
+    assert delta["cursor"] > cursor
+
+
+def test_deleting_category_records_its_tasks(
+    client: TestClient, user_access_token: str, seed_task: dict
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    cursor = client.get("/sync/changes", headers=headers).json()["cursor"]
+
+    r = client.delete(f"/category/delete/{seed_task['categoryId']}", headers=headers)
+    assert r.status_code == 200, r.text
+
+    delta = client.get(
+        "/sync/changes", headers=headers, params={"since": cursor}
+    ).json()
+    assert delta["deletedTasks"] == [seed_task["id"]]
+    assert delta["deletedCategories"] == [seed_task["categoryId"]]
+
+
+def test_bootstrap_snapshot(
+    client: TestClient, user_access_token: str, seed_tasks: list[dict]
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    client.patch(f"/task/is_done/{seed_tasks[0]['id']}/true", headers=headers)
+
+    r = client.get("/sync/bootstrap", headers=headers)
+    assert r.status_code == 200, r.text
+    snapshot = r.json()
+    assert snapshot["user"]["username"]
+    assert [t["id"] for t in snapshot["tasks"]] == [t["id"] for t in seed_tasks]
+    done = sum(t["isDone"] for t in snapshot["tasks"])
+    assert snapshot["tasks"][0]["isDone"] is True
+    assert snapshot["categories"] == [
+        {
+            "id": seed_tasks[0]["categoryId"],
+            "name": "Inbox",
+            "openCount": len(seed_tasks) - done,
+            "doneCount": done,
+        }
+    ]
+
+    changes = client.get("/sync/changes", headers=headers).json()
+    assert snapshot["cursor"] == changes["cursor"]
+    delta = client.get(
+        "/sync/changes", headers=headers, params={"since": snapshot["cursor"]}
+    ).json()
+    assert delta["tasks"] == [] and delta["categories"] == []
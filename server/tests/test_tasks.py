@@ -1,4 +1,6 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 
 def test_create_task_success(client: TestClient, user_access_token: str):
@@ -100,3 +102,175 @@ def test_task_change_name(client: TestClient, user_access_token: str, seed_task:
     body = r.json()
     assert body["id"] == seed_task["id"]
     assert body["name"] == "renamed"
+
+
+def test_create_task_commits_once(
+    client: TestClient, user_access_token: str, db_session: Session
+):
+    commits = []
+    engine = db_session.get_bind()
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    event.listen(engine, "commit", count_commit)
+    try:
+        # Creates the default category and the task in one unit of work.
+        r = client.post(
+            "/task/create",
+            headers={"Authorization": f"Bearer {user_access_token}"},
+            json={"name": "Code", "isDone": False},
+        )
+    finally:
+        event.remove(engine, "commit", count_commit)
+    assert r.status_code == 201, r.text
+    assert len(commits) == 1
+
+
+def test_list_tasks_keyset_pages(
+    client: TestClient, user_access_token: str, seed_tasks: list[dict]
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/task/list", headers=headers, params=params)
+        assert r.status_code == 200, r.text
+        seen += [t["id"] for t in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [t["id"] for t in seed_tasks]
+
+
+def test_list_tasks_filters(
+    client: TestClient, user_access_token: str, seed_tasks: list[dict]
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    r = client.get("/task/list", headers=headers, params={"is_done": True})
+    assert [t["name"] for t in r.json()] == ["Do dishes", "Study"]
+    assert "X-Next-Cursor" not in r.headers
+
+    r = client.get("/task/list", headers=headers, params={"has_estimate": True})
+    assert r.json() == []
+
+    r = client.get("/task/list", headers=headers, params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+
+def test_list_tasks_conditional_get(
+    client: TestClient, user_access_token: str, seed_task: dict, db_session: Session
+):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    r = client.get("/task/list", headers=headers)
+    etag = r.headers["ETag"]
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        r = client.get("/task/list", headers={**headers, "If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert r.status_code == 304
+    assert r.content == b""
+    assert not any("FROM tasks" in s for s in statements)
+
+    client.patch(f"/task/is_done/{seed_task['id']}/true", headers=headers)
+    r = client.get("/task/list", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+
+def test_search_tasks(client: TestClient, user_access_token: str, seed_tasks: list[dict]):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    r = client.get("/task/search", headers=headers, params={"q": "do dis"})
+    assert r.status_code == 200, r.text
+    assert r.json() == [seed_tasks[1]]
+
+    r = client.get("/task/search", headers=headers, params={"q": "c", "limit": 1})
+    assert len(r.json()) == 1
+    assert client.get("/task/search", headers=headers).status_code == 422
+
+
+def test_task_due_fields_round_trip(client: TestClient, user_access_token: str):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    r = client.post(
+        "/task/create",
+        headers=headers,
+        json={
+            "name": "Call",
+            "isDone": False,
+            "dueAt": "2026-03-01T10:00:00+02:00",
+            "estimatedDurationS": 900,
+        },
+    )
+    assert r.status_code == 201, r.text
+    task = r.json()
+    assert task["dueAt"] == "2026-03-01T08:00:00Z"
+    assert task["estimatedDurationS"] == 900
+
+    # Fields left out of an update keep their stored value.
+    base = {"id": task["id"], "name": "Call", "isDone": False, "categoryId": task["categoryId"]}
+    r = client.patch(
+        "/task/update",
+        headers=headers,
+        json={**base, "name": "Call back"},
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["dueAt"] == "2026-03-01T08:00:00Z"
+
+    r = client.patch(
+        "/task/update",
+        headers=headers,
+        json={**base, "dueAt": None},
+    )
+    assert r.json()["dueAt"] is None
+    assert r.json()["estimatedDurationS"] == 900
+
+
+def test_agenda(client: TestClient, user_access_token: str):
+    headers = {"Authorization": f"Bearer {user_access_token}"}
+    due = {
+        "late": "2026-02-27T23:00:00Z",
+        "today": "2026-02-28T09:00:00Z",
+        "later today": "2026-02-28T18:00:00Z",
+        "tomorrow": "2026-03-01T09:00:00Z",
+        "next month": "2026-04-01T09:00:00Z",
+    }
+    for name, due_at in due.items():
+        client.post(
+            "/task/create",
+            headers=headers,
+            json={"name": name, "isDone": False, "dueAt": due_at},
+        )
+    client.post(
+        "/task/create",
+        headers=headers,
+        json={"name": "done", "isDone": True, "dueAt": "2026-02-28T08:00:00Z"},
+    )
+    client.post("/task/create", headers=headers, json={"name": "someday", "isDone": False})
+
+    params = {"from": "2026-02-28T00:00:00Z", "to": "2026-03-07T00:00:00Z"}
+    r = client.get("/task/agenda", headers=headers, params=params)
+    assert r.status_code == 200, r.text
+    sections = {key: [t["name"] for t in tasks] for key, tasks in r.json().items()}
+    assert sections == {
+        "overdue": ["late"],
+        "today": ["today", "later today"],
+        "upcoming": ["tomorrow"],
+    }
+
+    r = client.get("/task/agenda", headers=headers, params={**params, "limit": 1})
+    assert [len(tasks) for tasks in r.json().values()] == [1, 1, 1]
+
+    r = client.get(
+        "/task/agenda",
+        headers=headers,
+        params={"from": params["to"], "to": params["from"]},
+    )
+    assert r.status_code == 400